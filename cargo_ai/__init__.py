@@ -1,21 +1,39 @@
 """CargoHub AI toolkit for RAG, QA generation, and hybrid chat."""
 
+from .bm25 import BM25Index
 from .documentation import (
     DocumentChunk,
     DocumentSection,
+    TokenCounter,
+    chunk_markdown_files,
+    iter_chunks,
+    iter_markdown_documents,
+    iter_markdown_sections,
+    load_markdown_chunks,
     load_markdown_documents,
+    load_markdown_file,
     make_chunks,
 )
+from .incremental_index import IncrementalIndex
 from .qa_generation import generate_datasets, generate_questions
 from .rag_pipeline import HybridResponder, RAGPipeline
 
 __all__ = [
     "DocumentChunk",
     "DocumentSection",
+    "TokenCounter",
+    "chunk_markdown_files",
+    "iter_chunks",
+    "iter_markdown_documents",
+    "iter_markdown_sections",
+    "load_markdown_chunks",
     "load_markdown_documents",
+    "load_markdown_file",
     "make_chunks",
     "generate_questions",
     "generate_datasets",
     "RAGPipeline",
     "HybridResponder",
+    "BM25Index",
+    "IncrementalIndex",
 ]
@@ -0,0 +1,185 @@
+"""Inverted-index BM25 retrieval with MaxScore early termination.
+
+``BM25Index`` is a drop-in alternative to :class:`RAGPipeline` for
+:class:`HybridResponder`: it exposes the same ``chunks`` / ``build`` /
+``retrieve`` / ``retrieve_batch`` interface and returns the same
+``RetrievalResult`` objects.
+
+Each posting stores a precomputed BM25 impact (the term's contribution to
+that chunk's score), so a query only walks the posting lists of its own
+terms. Query evaluation is MaxScore: terms are ordered by their maximum impact
+and terms whose combined maximum cannot lift a chunk above a lower bound
+of the k-th score are only probed (by binary search) for chunks that are
+already competitive.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .documentation import DocumentChunk
+from .rag_pipeline import RetrievalResult
+
+# Same as TfidfVectorizer's default token pattern
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+# Keeps float summation-order differences from pruning a chunk by mistake
+_BOUND_SLACK = 1e-9
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class PostingList:
+    """Chunk indices (ascending) and BM25 impacts for one term."""
+
+    __slots__ = ("doc_ids", "impacts", "max_impact")
+
+    def __init__(self, doc_ids, impacts) -> None:
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.max_impact = float(impacts.max())
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of chunk postings.
+
+    With *normalize_scores* (default) every score is divided by the highest
+    value the query could reach (``sum(idf * (k1 + 1))`` over its terms,
+    unknown terms included), so scores fall in ``[0, 1)`` and
+    ``HybridResponder.min_score`` thresholds mean the same thing for short
+    and long questions.
+    """
+
+    def __init__(
+        self, *, k1: float = 1.2, b: float = 0.75, normalize_scores: bool = True
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.normalize_scores = normalize_scores
+        self.chunks: Sequence[DocumentChunk] = []
+        self.postings: Dict[str, PostingList] = {}
+        self.idf: Dict[str, float] = {}
+
+    def build(self, chunks: Iterable[DocumentChunk]) -> None:
+        self.chunks = list(chunks)
+        if not self.chunks:
+            raise ValueError("Chunk list boş olamaz")
+
+        term_freqs: List[Dict[str, int]] = []
+        for chunk in self.chunks:
+            counts: Dict[str, int] = {}
+            for token in tokenize(chunk.text):
+                counts[token] = counts.get(token, 0) + 1
+            term_freqs.append(counts)
+
+        lengths = [sum(counts.values()) for counts in term_freqs]
+        average_length = sum(lengths) / len(lengths) or 1.0
+
+        raw: Dict[str, Tuple[List[int], List[int]]] = {}
+        for doc_id, counts in enumerate(term_freqs):
+            for term, tf in counts.items():
+                ids, tfs = raw.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        import numpy as np
+
+        total = len(self.chunks)
+        length_norm = self.k1 * (
+            1 - self.b + self.b * np.asarray(lengths, dtype=np.float64) / average_length
+        )
+        self.postings = {}
+        self.idf = {}
+        for term, (ids, tfs) in raw.items():
+            doc_ids = np.asarray(ids, dtype=np.int32)
+            tf = np.asarray(tfs, dtype=np.float64)
+            idf = math.log(1 + (total - len(ids) + 0.5) / (len(ids) + 0.5))
+            impacts = idf * tf * (self.k1 + 1) / (tf + length_norm[doc_ids])
+            self.idf[term] = idf
+            self.postings[term] = PostingList(doc_ids, impacts)
+
+    def retrieve(self, query: str, *, top_k: int = 3) -> List[RetrievalResult]:
+        if not self.postings:
+            raise RuntimeError("Index oluşturulmadan retrieval yapılamaz")
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        terms = [term for term in query_terms if term in self.postings]
+        if not terms or top_k <= 0:
+            return []
+
+        scale = 1.0
+        if self.normalize_scores:
+            # Unknown terms count with the largest IDF, so a question that
+            # only shares filler words with the corpus stays low
+            unseen_idf = math.log(1 + (len(self.chunks) + 0.5) / 0.5)
+            scale = 1.0 / sum(
+                self.idf.get(term, unseen_idf) * (self.k1 + 1) for term in query_terms
+            )
+        return [
+            RetrievalResult(chunk=self.chunks[doc_id], score=score * scale)
+            for doc_id, score in self._max_score(terms, top_k)
+        ]
+
+    def retrieve_batch(
+        self, queries: Sequence[str], *, top_k: int = 3
+    ) -> List[List[RetrievalResult]]:
+        return [self.retrieve(query, top_k=top_k) for query in queries]
+
+    def _max_score(self, terms: Sequence[str], k: int) -> List[Tuple[int, float]]:
+        """MaxScore over NumPy posting arrays; ties keep the lower chunk index first.
+
+        1. The chunks of the term with the highest maximum impact are scored
+           exactly; their k-th best score is a lower bound ``theta`` for the
+           final k-th score.
+        2. Terms are sorted by maximum impact. The longest prefix whose
+           summed maxima stays below ``theta`` is non-essential: a chunk that
+           only contains those terms cannot reach the top-k, so candidates
+           come from the essential lists alone.
+        3. Non-essential lists are probed only for candidates that can still
+           reach ``theta``, from the highest maximum impact down.
+        """
+        import numpy as np
+
+        lists = sorted(
+            (self.postings[term] for term in terms), key=lambda p: p.max_impact
+        )
+        bounds = np.cumsum([posting.max_impact for posting in lists])
+        bounds *= 1 + _BOUND_SLACK
+
+        def score(candidates, postings) -> Any:
+            totals = np.zeros(len(candidates))
+            for posting in postings:
+                positions = np.searchsorted(posting.doc_ids, candidates)
+                positions[positions == len(posting)] = 0
+                hit = posting.doc_ids[positions] == candidates
+                totals[hit] += posting.impacts[positions[hit]]
+            return totals
+
+        seed = lists[-1].doc_ids
+        theta = 0.0
+        if len(seed) >= k:
+            seed_scores = score(seed, lists)
+            theta = float(np.partition(seed_scores, len(seed) - k)[len(seed) - k])
+
+        essential = int(np.searchsorted(bounds, theta, side="left"))
+        candidates = np.unique(
+            np.concatenate([posting.doc_ids for posting in lists[essential:]])
+        )
+        totals = score(candidates, lists[essential:])
+        for i in range(essential - 1, -1, -1):
+            alive = totals + bounds[i] >= theta
+            candidates, totals = candidates[alive], totals[alive]
+            totals += score(candidates, [lists[i]])
+
+        from .rag_pipeline import _top_k
+
+        return _top_k(candidates, totals, k, 0)
+
+
+__all__ = ["BM25Index", "PostingList", "tokenize"]
@@ -2,9 +2,17 @@
 
 from __future__ import annotations
 
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Iterable, Iterator, List
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+# Sentence ends (., !, ?, …) followed by whitespace, and line breaks
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+_PIECE_RE = re.compile(r"\w{1,4}|[^\w\s]")
 
 
 @dataclass(slots=True)
@@ -42,37 +50,162 @@ def _normalize_document_id(path: Path) -> str:
     return path.stem.replace(" ", "_").lower()
 
 
-def load_markdown_documents(folder: Path | str) -> List[DocumentSection]:
-    """Parse markdown documents under *folder* and return extracted sections."""
+def load_markdown_documents(
+    folder: Path | str, *, workers: int = 1
+) -> List[DocumentSection]:
+    """Parse markdown documents under *folder* and return extracted sections.
+
+    With ``workers > 1`` files are parsed in a process pool; sections keep the
+    sorted file order of a serial run.
+    """
+
+    paths = _markdown_paths(folder)
+    if workers <= 1 or len(paths) <= 1:
+        return [section for path in paths for section in iter_markdown_sections(path)]
+
+    sections: List[DocumentSection] = []
+    for path, rows in zip(paths, _map_files(_pack_sections, paths, workers)):
+        document_id = _normalize_document_id(path)
+        sections.extend(DocumentSection(document_id, *row) for row in rows)
+    return sections
+
+
+def load_markdown_chunks(
+    folder: Path | str,
+    *,
+    max_words: int = 200,
+    overlap: int = 40,
+    workers: int = 1,
+    **options,
+) -> List[DocumentChunk]:
+    """Parse and chunk every document under *folder*, optionally in *workers* processes.
+
+    Chunks are created per file, so ids and order are the same for any
+    number of workers. Extra *options* (``max_tokens``, ``overlap_tokens``,
+    ``token_counter``) are passed to :func:`make_chunks`.
+    """
 
+    paths = _markdown_paths(folder)
+    if workers <= 1 or len(paths) <= 1:
+        sections = (
+            section for path in paths for section in iter_markdown_sections(path)
+        )
+        return make_chunks(sections, max_words=max_words, overlap=overlap, **options)
+
+    per_file = chunk_markdown_files(
+        paths, workers=workers, max_words=max_words, overlap=overlap, **options
+    )
+    return [chunk for chunks in per_file for chunk in chunks]
+
+
+def chunk_markdown_files(
+    paths: Sequence[Path | str], *, workers: int = 1, **options
+) -> List[List[DocumentChunk]]:
+    """Chunk every file of *paths*, in a process pool when ``workers > 1``.
+
+    Returns one chunk list per path, in the order of *paths*. *options* are
+    the keyword arguments of :func:`iter_chunks`.
+    """
+
+    paths = [Path(path) for path in paths]
+    if workers <= 1 or len(paths) <= 1:
+        return [list(iter_chunks(iter_markdown_sections(p), **options)) for p in paths]
+
+    task = partial(_pack_chunks, **options)
+    per_file: List[List[DocumentChunk]] = []
+    for path, rows in zip(paths, _map_files(task, paths, workers)):
+        document_id = _normalize_document_id(path)
+        per_file.append(
+            [
+                DocumentChunk(
+                    chunk_id,
+                    document_id,
+                    section_path,
+                    text,
+                    word_count,
+                    start_line,
+                    end_line,
+                    metadata={"heading": section_path[-1], "path": section_path},
+                )
+                for chunk_id, section_path, text, word_count, start_line, end_line in rows
+            ]
+        )
+    return per_file
+
+
+def iter_markdown_documents(folder: Path | str) -> Iterator[DocumentSection]:
+    """Lazily yield the sections of every markdown document under *folder*."""
+
+    for md_path in _markdown_paths(folder):
+        yield from iter_markdown_sections(md_path)
+
+
+def _markdown_paths(folder: Path | str) -> List[Path]:
     folder_path = Path(folder)
     if not folder_path.exists():
         raise FileNotFoundError(f"Document folder not found: {folder_path}")
+    return sorted(folder_path.glob("*.md"))
 
-    sections: List[DocumentSection] = []
 
-    for md_path in sorted(folder_path.glob("*.md")):
-        document_id = _normalize_document_id(md_path)
-        sections.extend(_parse_markdown_sections(md_path, document_id))
+def _map_files(
+    func: Callable[[Path], list], paths: List[Path], workers: int
+) -> List[list]:
+    workers = min(workers, len(paths))
+    # Batch small files per task to keep IPC overhead low; map() preserves order
+    chunksize = max(1, len(paths) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, paths, chunksize=chunksize))
 
-    return sections
 
+# Pool workers return plain tuples: unpickling them in the parent is the
+# serial part of a parallel run and is about half as costly as dataclasses.
+# The document id and chunk metadata are rebuilt from the path instead.
+def _pack_sections(md_path: Path) -> List[tuple]:
+    return [
+        (s.title, s.level, s.path, s.content, s.start_line, s.end_line)
+        for s in iter_markdown_sections(md_path)
+    ]
 
-def _parse_markdown_sections(md_path: Path, document_id: str) -> List[DocumentSection]:
-    text = md_path.read_text(encoding="utf-8")
-    lines = text.splitlines()
 
-    sections: List[DocumentSection] = []
+def _pack_chunks(md_path: Path, **options) -> List[tuple]:
+    chunks = iter_chunks(iter_markdown_sections(md_path), **options)
+    return [
+        (c.chunk_id, c.section_path, c.text, c.word_count, c.start_line, c.end_line)
+        for c in chunks
+    ]
+
+
+def load_markdown_file(md_path: Path | str) -> List[DocumentSection]:
+    """Parse a single markdown file; the document id is derived from its name."""
+
+    return list(iter_markdown_sections(md_path))
+
+
+def iter_markdown_sections(md_path: Path | str) -> Iterator[DocumentSection]:
+    """Stream *md_path* line by line, yielding each section once its heading closes.
+
+    Only the lines of the current section are held in memory, so large
+    exported knowledge-base dumps can be processed with flat memory use.
+    Line boundaries and numbers match ``str.splitlines`` on the whole text.
+    """
+
+    md_path = Path(md_path)
+    with md_path.open("r", encoding="utf-8") as fp:
+        yield from _parse_markdown_sections(fp, _normalize_document_id(md_path))
+
+
+def _parse_markdown_sections(
+    lines: Iterable[str], document_id: str
+) -> Iterator[DocumentSection]:
     current_lines: List[str] = []
     current_path: List[tuple[int, str]] = []
     current_level = 0
     start_line = 0
+    line_count = 0
 
-    def flush(end_index: int) -> None:
-        nonlocal current_lines
+    def flush(end_index: int) -> DocumentSection | None:
         if not current_path or not current_lines:
-            current_lines = []
-            return
+            return None
         titles = [title for _lvl, title in current_path]
         section = DocumentSection(
             document_id=document_id,
@@ -83,11 +216,13 @@ def _parse_markdown_sections(md_path: Path, document_id: str) -> List[DocumentSe
             start_line=start_line,
             end_line=end_index,
         )
-        if section.content:
-            sections.append(section)
-        current_lines = []
+        return section if section.content else None
 
-    for idx, raw_line in enumerate(lines):
+    # File iteration only breaks on \n and \r; splitlines also breaks on \f,
+    # \v, \x1c-\x1e, \x85, \u2028 and \u2029
+    logical_lines = (part for line in lines for part in line.splitlines())
+    for idx, raw_line in enumerate(logical_lines):
+        line_count = idx + 1
         line = raw_line.rstrip()
 
         if line.startswith("#"):
@@ -96,7 +231,10 @@ def _parse_markdown_sections(md_path: Path, document_id: str) -> List[DocumentSe
             if level < 1:
                 continue
 
-            flush(idx)
+            section = flush(idx)
+            current_lines = []
+            if section is not None:
+                yield section
 
             while current_path and current_path[-1][0] >= level:
                 current_path.pop()
@@ -108,48 +246,235 @@ def _parse_markdown_sections(md_path: Path, document_id: str) -> List[DocumentSe
 
         current_lines.append(line)
 
-    flush(len(lines))
-    return sections
+    section = flush(line_count)
+    if section is not None:
+        yield section
 
 
-def _chunk_text(text: str, max_words: int, overlap: int) -> Iterator[str]:
-    words = text.split()
-    if not words:
-        return
+def _chunk_windows(
+    word_count: int, max_words: int, overlap: int
+) -> Iterator[Tuple[int, int]]:
+    """Yield ``(first, last)`` word offsets of overlapping windows."""
 
     step = max(max_words - overlap, 1)
-    for start in range(0, len(words), step):
-        end = start + max_words
-        yield " ".join(words[start:end])
-        if end >= len(words):
+    for first in range(0, word_count, step):
+        last = min(first + max_words, word_count)
+        yield first, last
+        if last >= word_count:
             break
 
 
-def make_chunks(
+def iter_chunks(
     sections: Iterable[DocumentSection],
     *,
     max_words: int = 200,
     overlap: int = 40,
-) -> List[DocumentChunk]:
-    """Create retrieval-friendly chunks from *sections*."""
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+    token_counter: TokenCounter | None = None,
+) -> Iterator[DocumentChunk]:
+    """Lazily create retrieval-friendly chunks from *sections*.
+
+    By default chunks are windows of *max_words* whitespace words. With
+    *max_tokens* they are packed from whole sentences up to that many tokens
+    as measured by *token_counter*, repeating trailing sentences worth up to
+    *overlap_tokens* (default: a fifth of the budget) in the next chunk.
+    """
+
+    if max_tokens is not None:
+        counter = token_counter or TokenCounter()
+        if overlap_tokens is None:
+            overlap_tokens = max_tokens // 5
+        for section in sections:
+            yield from _token_chunks(section, counter, max_tokens, overlap_tokens)
+        return
 
-    chunks: List[DocumentChunk] = []
     for section in sections:
-        if not section.content:
+        words = section.content.split()
+        if not words:
             continue
 
-        for index, text in enumerate(_chunk_text(section.content, max_words, overlap)):
-            chunk_id = f"{section.document_id}#{section.title.replace(' ', '_').lower()}#{index}"
-            chunk = DocumentChunk(
-                chunk_id=chunk_id,
+        slug = section.title.replace(" ", "_").lower()
+        windows = _chunk_windows(len(words), max_words, overlap)
+        for index, (first, last) in enumerate(windows):
+            yield DocumentChunk(
+                chunk_id=f"{section.document_id}#{slug}#{index}",
                 document_id=section.document_id,
                 section_path=section.path,
-                text=text,
-                word_count=len(text.split()),
+                text=" ".join(words[first:last]),
+                word_count=last - first,
                 start_line=section.start_line,
                 end_line=section.end_line,
                 metadata={"heading": section.title, "path": section.path},
             )
-            chunks.append(chunk)
 
-    return chunks
+
+def make_chunks(
+    sections: Iterable[DocumentSection],
+    *,
+    max_words: int = 200,
+    overlap: int = 40,
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+    token_counter: TokenCounter | None = None,
+) -> List[DocumentChunk]:
+    """Create retrieval-friendly chunks from *sections*."""
+
+    return list(
+        iter_chunks(
+            sections,
+            max_words=max_words,
+            overlap=overlap,
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            token_counter=token_counter,
+        )
+    )
+
+
+class TokenCounter:
+    """Measure text length in tokens and cache per-section sentence counts.
+
+    *tokenizer* follows the Hugging Face interface
+    (``encode(text, add_special_tokens=False)``), e.g. the Gemma tokenizer of
+    the chat model. Without one, a fast local stand-in counts word pieces of
+    up to four characters plus punctuation marks, so long agglutinative
+    Turkish words weigh more than short ones, as they do for subword
+    tokenizers.
+
+    Sentence splits and counts are cached by section content (LRU, at most
+    *cache_size* sections), so re-chunking with other budgets re-tokenizes
+    nothing.
+    """
+
+    def __init__(self, tokenizer=None, *, cache_size: int = 4096) -> None:
+        self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self._sections: OrderedDict[str, List[Tuple[str, int, int]]] = OrderedDict()
+        self._words: OrderedDict[str, List[int]] = OrderedDict()
+
+    def count(self, text: str) -> int:
+        if self.tokenizer is None:
+            return len(_PIECE_RE.findall(text))
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def sentences(self, section: DocumentSection) -> List[Tuple[str, int, int]]:
+        """``(text, tokens, words)`` for each sentence of *section*."""
+
+        sentences = _lru_get(self._sections, section.content)
+        if sentences is None:
+            sentences = []
+            for raw in _SENTENCE_RE.split(section.content):
+                words = raw.split()
+                if words:
+                    text = " ".join(words)
+                    sentences.append((text, self.count(text), len(words)))
+            _lru_put(self._sections, section.content, sentences, self.cache_size)
+        return sentences
+
+    def split_words(self, text: str, max_tokens: int) -> List[Tuple[str, int, int]]:
+        """Break an over-long sentence into word runs of at most *max_tokens*.
+
+        A single word over the budget is cut into character pieces that fit.
+        """
+
+        words = text.split()
+        counts = _lru_get(self._words, text)
+        if counts is None:
+            counts = [self.count(word) for word in words]
+            _lru_put(self._words, text, counts, self.cache_size)
+
+        pieces: List[Tuple[str, int, int]] = []
+        run: List[str] = []
+        run_tokens = 0
+        for word, tokens in zip(words, counts):
+            parts = [(word, tokens)]
+            if tokens > max_tokens:
+                parts = self._split_word(word, max_tokens)
+            for part, part_tokens in parts:
+                if run and run_tokens + part_tokens > max_tokens:
+                    pieces.append((" ".join(run), run_tokens, len(run)))
+                    run, run_tokens = [], 0
+                run.append(part)
+                run_tokens += part_tokens
+        if run:
+            pieces.append((" ".join(run), run_tokens, len(run)))
+        return pieces
+
+    def _split_word(self, word: str, max_tokens: int) -> List[Tuple[str, int]]:
+        parts: List[Tuple[str, int]] = []
+        while word:
+            # Longest prefix within budget, found with O(log n) count() calls
+            low, high = 1, len(word)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self.count(word[:middle]) <= max_tokens:
+                    low = middle
+                else:
+                    high = middle - 1
+            parts.append((word[:low], self.count(word[:low])))
+            word = word[low:]
+        return parts
+
+
+def _lru_get(cache: OrderedDict, key: str):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: OrderedDict, key: str, value, size: int) -> None:
+    cache[key] = value
+    if len(cache) > size:
+        cache.popitem(last=False)
+
+
+def _token_chunks(
+    section: DocumentSection,
+    counter: TokenCounter,
+    max_tokens: int,
+    overlap_tokens: int,
+) -> Iterator[DocumentChunk]:
+    units: List[Tuple[str, int, int]] = []
+    for sentence in counter.sentences(section):
+        if sentence[1] > max_tokens:
+            units.extend(counter.split_words(sentence[0], max_tokens))
+        else:
+            units.append(sentence)
+    if not units:
+        return
+
+    # Chunk sizes are sums of sentence counts; a subword tokenizer may merge
+    # or split differently across a sentence gap, off by a token at most.
+    windows: List[List[Tuple[str, int, int]]] = []
+    window: List[Tuple[str, int, int]] = []
+    total = 0
+    for unit in units:
+        if window and total + unit[1] > max_tokens:
+            windows.append(window)
+            kept: List[Tuple[str, int, int]] = []
+            kept_tokens = 0
+            for previous in reversed(window):
+                size = kept_tokens + previous[1]
+                if size > overlap_tokens or size + unit[1] > max_tokens:
+                    break
+                kept.insert(0, previous)
+                kept_tokens = size
+            window, total = kept, kept_tokens
+        window.append(unit)
+        total += unit[1]
+    windows.append(window)
+
+    slug = section.title.replace(" ", "_").lower()
+    for index, window in enumerate(windows):
+        yield DocumentChunk(
+            chunk_id=f"{section.document_id}#{slug}#{index}",
+            document_id=section.document_id,
+            section_path=section.path,
+            text=" ".join(text for text, _tokens, _words in window),
+            word_count=sum(words for _text, _tokens, words in window),
+            start_line=section.start_line,
+            end_line=section.end_line,
+            metadata={"heading": section.title, "path": section.path},
+        )
@@ -0,0 +1,437 @@
+"""Incrementally updatable TF-IDF index with tombstones and compaction.
+
+The regular :class:`RAGPipeline` refits its vocabulary over the full corpus
+on every build. ``IncrementalIndex`` instead hashes terms into a fixed
+feature space (``HashingVectorizer``), so a chunk can be vectorised on its
+own and nothing else has to be re-read when a document changes.
+
+The index is made of two segments:
+
+* **main** – rows weighted with the IDF computed at the last compaction,
+  stored memory-mapped on disk;
+* **delta** – chunks added since then, re-weighted with the current IDF on
+  every update (the delta is small).
+
+Document frequencies are append-only: adding a chunk increments them,
+removing one only writes a tombstone (by ``chunk_id``) that hides the row
+from queries. :meth:`compact` drops tombstoned rows, recomputes exact
+document frequencies from the stored term counts and folds the delta into
+a new main segment — still without re-tokenising any text.
+
+:meth:`save` builds the new version in a staging directory (hard-linking
+segments that did not change) and swaps it in with the manifest written
+last, so the files a loaded index has mapped are never modified in place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .documentation import DocumentChunk
+from .index_store import (
+    MANIFEST_FILE,
+    load_array,
+    load_csr,
+    open_chunks,
+    replace_directory,
+    save_csr,
+    staging_directory,
+    write_chunks,
+)
+from .rag_pipeline import RetrievalResult, _top_k
+
+INCREMENTAL_FORMAT = "cargohub-incremental-index"
+INCREMENTAL_FORMAT_VERSION = 1
+
+DEFAULT_FEATURES = 2**18
+# Compaction is suggested once delta rows + tombstones exceed this share of main
+DEFAULT_COMPACT_RATIO = 0.25
+
+MAIN_SEGMENT = "main"
+DELTA_SEGMENT = "delta"
+CHUNK_KEYS_FILE = "chunk_keys.json"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class _Segment:
+    """Term counts, weighted rows, chunks and a live mask for one segment."""
+
+    def __init__(self, counts, weights, chunks, keys, live) -> None:
+        self.counts = counts
+        self.weights = weights
+        self.chunks: Sequence[DocumentChunk] = chunks
+        self.keys: List[Tuple[str, str]] = keys  # (chunk_id, content hash)
+        self.live = live
+        # Directory the segment was opened from; an unchanged segment is not rewritten
+        self.source: Path | None = None
+        self._term_major = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def term_major(self):
+        if self._term_major is None:
+            self._term_major = self.weights.tocsc()
+        return self._term_major
+
+
+class IncrementalIndex:
+    """Hashed TF-IDF retrieval index that supports upserts and deletions.
+
+    Exposes ``retrieve`` / ``retrieve_batch`` like :class:`RAGPipeline`, so
+    it can be handed to :class:`HybridResponder` directly.
+    """
+
+    def __init__(
+        self,
+        *,
+        n_features: int = DEFAULT_FEATURES,
+        compact_ratio: float = DEFAULT_COMPACT_RATIO,
+    ) -> None:
+        self.n_features = n_features
+        self.compact_ratio = compact_ratio
+        self.document_frequency = None
+        self.num_documents = 0
+        # Opaque label of the chunk data the index was last synced from
+        self.source_version: str | None = None
+        self.main = self._empty_segment()
+        self.delta = self._empty_segment()
+        self._locations: Dict[str, Tuple[_Segment, int]] = {}
+        self._vectorizer = None
+
+    # ------------------------------------------------------------------ utils
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            self._vectorizer = HashingVectorizer(
+                n_features=self.n_features, alternate_sign=False, norm=None
+            )
+        return self._vectorizer
+
+    def _empty_segment(self) -> _Segment:
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        empty = csr_matrix((0, self.n_features))
+        return _Segment(empty, empty, [], [], np.zeros(0, dtype=bool))
+
+    def _counts(self, chunks: Sequence[DocumentChunk]):
+        return self.vectorizer.transform([chunk.text for chunk in chunks]).tocsr()
+
+    def idf(self):
+        """Smoothed IDF (same formula as ``TfidfVectorizer``) from current stats."""
+        import numpy as np
+
+        return np.log((1 + self.num_documents) / (1 + self.document_frequency)) + 1.0
+
+    def _weigh(self, counts, idf):
+        from sklearn.preprocessing import normalize
+
+        if counts.shape[0] == 0:  # normalize() rejects empty matrices
+            return counts.astype(float)
+        return normalize(counts.multiply(idf).tocsr())
+
+    def _index_locations(self) -> None:
+        self._locations = {}
+        for segment in (self.main, self.delta):
+            for row, (chunk_id, _digest) in enumerate(segment.keys):
+                if segment.live[row]:
+                    self._locations[chunk_id] = (segment, row)
+
+    # ---------------------------------------------------------------- updates
+    def build(self, chunks: Iterable[DocumentChunk]) -> None:
+        import numpy as np
+
+        chunks = list(chunks)
+        if not chunks:
+            raise ValueError("Chunk list boş olamaz")
+        chunks = list({chunk.chunk_id: chunk for chunk in chunks}.values())
+        counts = self._counts(chunks)
+        self.document_frequency = np.bincount(
+            counts.indices, minlength=self.n_features
+        ).astype(np.int64)
+        self.num_documents = len(chunks)
+        self.main = _Segment(
+            counts,
+            self._weigh(counts, self.idf()),
+            chunks,
+            [(chunk.chunk_id, content_hash(chunk.text)) for chunk in chunks],
+            np.ones(len(chunks), dtype=bool),
+        )
+        self.delta = self._empty_segment()
+        self._index_locations()
+
+    def contains(self, chunk: DocumentChunk) -> bool:
+        """True if *chunk* is live with exactly the same text."""
+        location = self._locations.get(chunk.chunk_id)
+        if location is None:
+            return False
+        segment, row = location
+        return segment.keys[row][1] == content_hash(chunk.text)
+
+    def add(self, chunks: Iterable[DocumentChunk]) -> int:
+        """Insert or replace *chunks* by ``chunk_id``; unchanged ones are skipped.
+
+        Returns the number of chunks written to the delta segment.
+        """
+        import numpy as np
+        from scipy.sparse import vstack
+
+        if self.document_frequency is None:
+            raise RuntimeError("Index oluşturulmadan güncellenemez")
+        pending = {chunk.chunk_id: chunk for chunk in chunks}
+        fresh = [chunk for chunk in pending.values() if not self.contains(chunk)]
+        if not fresh:
+            return 0
+
+        self.remove(chunk.chunk_id for chunk in fresh)
+        counts = self._counts(fresh)
+        self.document_frequency += np.bincount(
+            counts.indices, minlength=self.n_features
+        )
+        self.num_documents += len(fresh)
+
+        delta = self.delta
+        start = len(delta)
+        all_counts = vstack([delta.counts, counts]).tocsr()
+        self.delta = _Segment(
+            all_counts,
+            self._weigh(all_counts, self.idf()),
+            list(delta.chunks) + fresh,
+            delta.keys + [(c.chunk_id, content_hash(c.text)) for c in fresh],
+            np.concatenate([delta.live, np.ones(len(fresh), dtype=bool)]),
+        )
+        for row, (chunk_id, _digest) in enumerate(delta.keys):
+            if delta.live[row]:
+                self._locations[chunk_id] = (self.delta, row)
+        for offset, chunk in enumerate(fresh):
+            self._locations[chunk.chunk_id] = (self.delta, start + offset)
+        return len(fresh)
+
+    def remove(self, chunk_ids: Iterable[str]) -> int:
+        """Tombstone the live rows of *chunk_ids*; returns how many were found."""
+        removed = 0
+        for chunk_id in chunk_ids:
+            location = self._locations.pop(chunk_id, None)
+            if location is None:
+                continue
+            segment, row = location
+            segment.live[row] = False
+            removed += 1
+        return removed
+
+    @property
+    def live_count(self) -> int:
+        return len(self._locations)
+
+    def chunk_ids(self) -> List[str]:
+        """``chunk_id`` of every live row."""
+        return list(self._locations)
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Delta rows plus tombstones exceed ``compact_ratio`` of the main rows."""
+        stale = len(self.delta) + int((~self.main.live).sum())
+        return stale > self.compact_ratio * max(len(self.main), 1)
+
+    def compact(self) -> None:
+        """Fold the delta into main, drop tombstones and recompute exact IDF."""
+        import numpy as np
+        from scipy.sparse import vstack
+
+        rows = [
+            (segment, np.flatnonzero(segment.live))
+            for segment in (self.main, self.delta)
+        ]
+        counts = vstack([segment.counts[live] for segment, live in rows]).tocsr()
+        chunks = [segment.chunks[int(row)] for segment, live in rows for row in live]
+        keys = [segment.keys[int(row)] for segment, live in rows for row in live]
+
+        self.document_frequency = np.bincount(
+            counts.indices, minlength=self.n_features
+        ).astype(np.int64)
+        self.num_documents = len(chunks)
+        self.main = _Segment(
+            counts,
+            self._weigh(counts, self.idf()),
+            chunks,
+            keys,
+            np.ones(len(chunks), dtype=bool),
+        )
+        self.delta = self._empty_segment()
+        self._index_locations()
+
+    # -------------------------------------------------------------- retrieval
+    def retrieve(self, query: str, *, top_k: int = 3) -> List[RetrievalResult]:
+        return self.retrieve_batch([query], top_k=top_k)[0]
+
+    def retrieve_batch(
+        self, queries: Sequence[str], *, top_k: int = 3
+    ) -> List[List[RetrievalResult]]:
+        """Cosine top-k over live rows of both segments (main rows rank first on ties)."""
+        import numpy as np
+
+        if self.document_frequency is None:
+            raise RuntimeError("Index oluşturulmadan retrieval yapılamaz")
+        results: List[List[RetrievalResult]] = [[] for _ in queries]
+        active = [index for index, query in enumerate(queries) if query.strip()]
+        if not active or top_k <= 0:
+            return results
+
+        query_matrix = self.vectorizer.transform([queries[i] for i in active])
+        query_matrix = self._weigh(query_matrix, self.idf())
+        segments = [segment for segment in (self.main, self.delta) if len(segment)]
+        if not segments:
+            return results
+        scores = [(query_matrix @ s.term_major.T).tocsr() for s in segments]
+
+        for row, query_index in enumerate(active):
+            indices, values, offset = [], [], 0
+            for segment, matrix in zip(segments, scores):
+                start, end = matrix.indptr[row], matrix.indptr[row + 1]
+                rows = matrix.indices[start:end]
+                alive = segment.live[rows]
+                indices.append(rows[alive].astype(np.int64) + offset)
+                values.append(matrix.data[start:end][alive])
+                offset += len(segment)
+            for position, score in _top_k(
+                np.concatenate(indices), np.concatenate(values), top_k, 0
+            ):
+                segment, row = self._locate(segments, position)
+                results[query_index].append(
+                    RetrievalResult(chunk=segment.chunks[row], score=score)
+                )
+        return results
+
+    @staticmethod
+    def _locate(segments: Sequence[_Segment], position: int) -> Tuple[_Segment, int]:
+        for segment in segments:
+            if position < len(segment):
+                return segment, position
+            position -= len(segment)
+        raise IndexError(position)
+
+    # ------------------------------------------------------------ persistence
+    def save(self, output_dir: Path | str) -> Path:
+        """Write both segments, tombstones and term statistics to *output_dir*.
+
+        *output_dir* is replaced as a whole; see the module docstring.
+        """
+        output_path = Path(output_dir)
+        staging = staging_directory(output_path)
+        try:
+            self._write(staging, output_path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        replace_directory(staging, output_path)
+        for name, segment in ((MAIN_SEGMENT, self.main), (DELTA_SEGMENT, self.delta)):
+            segment.source = (output_path / name).resolve()
+        return output_path
+
+    def _write(self, output_path: Path, previous: Path) -> None:
+        import numpy as np
+
+        for name, segment in ((MAIN_SEGMENT, self.main), (DELTA_SEGMENT, self.delta)):
+            directory = output_path / name
+            directory.mkdir()
+            if segment.source == (previous / name).resolve():
+                _link_files(segment.source, directory)
+                continue
+            save_csr(directory, segment.counts, prefix="counts_")
+            save_csr(directory, segment.weights, prefix="weights_")
+            write_chunks(directory, segment.chunks)
+            (directory / CHUNK_KEYS_FILE).write_text(
+                json.dumps(segment.keys, ensure_ascii=False), encoding="utf-8"
+            )
+        np.save(output_path / "document_frequency.npy", self.document_frequency)
+        np.save(
+            output_path / "tombstones.npy",
+            np.flatnonzero(~self.main.live).astype(np.int64),
+        )
+        np.save(
+            output_path / "delta_tombstones.npy",
+            np.flatnonzero(~self.delta.live).astype(np.int64),
+        )
+        manifest = {
+            "format": INCREMENTAL_FORMAT,
+            "version": INCREMENTAL_FORMAT_VERSION,
+            "n_features": self.n_features,
+            "num_documents": self.num_documents,
+            "source_version": self.source_version,
+            "segments": {MAIN_SEGMENT: len(self.main), DELTA_SEGMENT: len(self.delta)},
+        }
+        (output_path / MANIFEST_FILE).write_text(
+            json.dumps(manifest, indent=2), encoding="utf-8"
+        )
+
+    @classmethod
+    def load(
+        cls, index_dir: Path | str, *, compact_ratio: float = DEFAULT_COMPACT_RATIO
+    ) -> "IncrementalIndex":
+        import numpy as np
+
+        index_path = Path(index_dir)
+        manifest = json.loads((index_path / MANIFEST_FILE).read_text(encoding="utf-8"))
+        if manifest.get("format") != INCREMENTAL_FORMAT:
+            raise ValueError(f"Unknown index format: {manifest.get('format')!r}")
+        if manifest.get("version") != INCREMENTAL_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported index version {manifest.get('version')!r}"
+                f" (expected {INCREMENTAL_FORMAT_VERSION})"
+            )
+
+        index = cls(n_features=manifest["n_features"], compact_ratio=compact_ratio)
+        index.num_documents = manifest["num_documents"]
+        index.source_version = manifest.get("source_version")
+        index.document_frequency = np.array(
+            load_array(index_path, "document_frequency.npy")
+        )
+        for name, tombstones in (
+            (MAIN_SEGMENT, "tombstones.npy"),
+            (DELTA_SEGMENT, "delta_tombstones.npy"),
+        ):
+            directory = index_path / name
+            shape = (manifest["segments"][name], index.n_features)
+            keys = [
+                tuple(key)
+                for key in json.loads(
+                    (directory / CHUNK_KEYS_FILE).read_text(encoding="utf-8")
+                )
+            ]
+            live = np.ones(len(keys), dtype=bool)
+            live[load_array(index_path, tombstones)] = False
+            segment = _Segment(
+                load_csr(directory, shape, prefix="counts_"),
+                load_csr(directory, shape, prefix="weights_"),
+                open_chunks(directory),
+                keys,
+                live,
+            )
+            segment.source = directory.resolve()
+            setattr(index, name, segment)
+        index._index_locations()
+        return index
+
+
+def _link_files(source: Path, target: Path) -> None:
+    """Hard-link (or copy, across filesystems) every file of *source* into *target*."""
+    for path in source.iterdir():
+        try:
+            os.link(path, target / path.name)
+        except OSError:
+            shutil.copy2(path, target / path.name)
+
+
+__all__ = ["IncrementalIndex", "content_hash"]
@@ -0,0 +1,368 @@
+"""Versioned, pickle-free on-disk format for the TF-IDF RAG index.
+
+An index directory contains::
+
+    manifest.json        format name, version, shapes and vectorizer settings
+    indptr.npy           CSR row pointers of the chunk-term matrix
+    indices.npy          CSR column indices
+    data.npy             CSR values
+    csc_*.npy            the same matrix, L2-normalised and term-major (CSC)
+    idf.npy              IDF weight per vocabulary column
+    vocabulary.txt       one term per line, line number == column index
+    chunks.jsonl         one chunk per line
+    chunk_offsets.npy    byte offset of every line in chunks.jsonl (+ file size)
+
+The numeric arrays are opened with ``mmap_mode="r"`` and ``chunks.jsonl`` is
+memory-mapped, so every worker process that loads the same index shares one
+page-cached copy and a chunk is only decoded when it is retrieved. The
+term-major copy used for scoring is stored too, so it is mapped rather than
+rebuilt in every process.
+
+Indexes are never rewritten in place: a new version is written to a sibling
+staging directory and renamed over the old one. The old files are unlinked,
+not truncated, so processes that still map them keep reading valid pages.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, overload
+
+from .documentation import DocumentChunk
+
+INDEX_FORMAT = "cargohub-tfidf-index"
+INDEX_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+VOCABULARY_FILE = "vocabulary.txt"
+CHUNKS_FILE = "chunks.jsonl"
+
+# TfidfVectorizer settings that change how a query is turned into a vector
+VECTORIZER_PARAMS = (
+    "lowercase",
+    "strip_accents",
+    "token_pattern",
+    "ngram_range",
+    "analyzer",
+    "norm",
+    "use_idf",
+    "smooth_idf",
+    "sublinear_tf",
+    "binary",
+)
+
+
+def chunk_to_dict(chunk: DocumentChunk) -> Dict[str, Any]:
+    return {
+        "chunk_id": chunk.chunk_id,
+        "document_id": chunk.document_id,
+        "section_path": chunk.section_path,
+        "text": chunk.text,
+        "word_count": chunk.word_count,
+        "start_line": chunk.start_line,
+        "end_line": chunk.end_line,
+        "metadata": chunk.metadata,
+    }
+
+
+def chunk_from_dict(payload: Dict[str, Any]) -> DocumentChunk:
+    return DocumentChunk(
+        chunk_id=payload["chunk_id"],
+        document_id=payload["document_id"],
+        section_path=payload["section_path"],
+        text=payload["text"],
+        word_count=payload["word_count"],
+        start_line=payload["start_line"],
+        end_line=payload["end_line"],
+        metadata=payload.get("metadata", {}),
+    )
+
+
+class ChunkStore(Sequence[DocumentChunk]):
+    """Read-only sequence of chunks backed by a memory-mapped JSONL file."""
+
+    def __init__(self, jsonl_path: Path | str, offsets) -> None:
+        self.path = Path(jsonl_path)
+        self._offsets = offsets
+        with self.path.open("rb") as fp:
+            if os.fstat(fp.fileno()).st_size:
+                self._buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> DocumentChunk: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[DocumentChunk]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+        start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return chunk_from_dict(json.loads(self._buffer[start:end]))
+
+
+@dataclass
+class LoadedIndex:
+    """Arrays and chunks read back from an index directory."""
+
+    manifest: Dict[str, Any]
+    matrix: Any
+    vocabulary: List[str]
+    idf: Any
+    chunks: ChunkStore
+    term_matrix: Any = None
+
+
+def save_csr(directory: Path, matrix, prefix: str = "") -> None:
+    """Save a CSR matrix as ``<prefix>{indptr,indices,data}.npy``."""
+    import numpy as np
+
+    matrix = matrix.tocsr()
+    matrix.sort_indices()
+    np.save(directory / f"{prefix}indptr.npy", matrix.indptr)
+    np.save(directory / f"{prefix}indices.npy", matrix.indices)
+    np.save(directory / f"{prefix}data.npy", matrix.data)
+
+
+def save_csc(directory: Path, matrix, prefix: str = "csc_") -> None:
+    """Save a CSC matrix as ``<prefix>{indptr,indices,data}.npy``."""
+    import numpy as np
+
+    matrix = matrix.tocsc()
+    matrix.sort_indices()
+    np.save(directory / f"{prefix}indptr.npy", matrix.indptr)
+    np.save(directory / f"{prefix}indices.npy", matrix.indices)
+    np.save(directory / f"{prefix}data.npy", matrix.data)
+
+
+def load_array(directory: Path, name: str):
+    import numpy as np
+
+    return np.load(directory / name, mmap_mode="r", allow_pickle=False)
+
+
+def load_csr(directory: Path, shape: Tuple[int, int], prefix: str = ""):
+    """Open a matrix written by :func:`save_csr` on top of read-only memory maps."""
+    from scipy.sparse import csr_matrix
+
+    return csr_matrix(
+        (
+            load_array(directory, f"{prefix}data.npy"),
+            load_array(directory, f"{prefix}indices.npy"),
+            load_array(directory, f"{prefix}indptr.npy"),
+        ),
+        shape=shape,
+        copy=False,
+    )
+
+
+def load_csc(directory: Path, shape: Tuple[int, int], prefix: str = "csc_"):
+    """Open a matrix written by :func:`save_csc` on top of read-only memory maps."""
+    from scipy.sparse import csc_matrix
+
+    return csc_matrix(
+        (
+            load_array(directory, f"{prefix}data.npy"),
+            load_array(directory, f"{prefix}indices.npy"),
+            load_array(directory, f"{prefix}indptr.npy"),
+        ),
+        shape=shape,
+        copy=False,
+    )
+
+
+def write_chunks(directory: Path, chunks: Iterable[DocumentChunk]) -> int:
+    """Write ``chunks.jsonl`` and its offset table; return the chunk count."""
+    import numpy as np
+
+    offsets = [0]
+    with (directory / CHUNKS_FILE).open("wb") as fp:
+        for chunk in chunks:
+            line = json.dumps(chunk_to_dict(chunk), ensure_ascii=False) + "\n"
+            offsets.append(offsets[-1] + fp.write(line.encode("utf-8")))
+    np.save(directory / "chunk_offsets.npy", np.asarray(offsets, dtype=np.int64))
+    return len(offsets) - 1
+
+
+def open_chunks(directory: Path) -> ChunkStore:
+    return ChunkStore(
+        directory / CHUNKS_FILE, load_array(directory, "chunk_offsets.npy")
+    )
+
+
+def staging_directory(target: Path | str) -> Path:
+    """Create an empty sibling of *target* to build a new version in."""
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+    # mkdtemp creates 0700; the index must stay readable like a regular mkdir
+    staging.chmod(0o755)
+    return staging
+
+
+def replace_directory(staging: Path, target: Path | str) -> Path:
+    """Move *staging* to *target*, retiring the directory it replaces.
+
+    ``rename`` cannot replace a non-empty directory, so the old version is
+    first renamed aside; a reader opening *target* in that instant sees it
+    missing rather than half written.
+    """
+    target = Path(target)
+    if not target.exists():
+        os.replace(staging, target)
+        return target
+    retired = Path(tempfile.mkdtemp(prefix=f".{target.name}.old.", dir=target.parent))
+    os.replace(target, retired / target.name)
+    os.replace(staging, target)
+    shutil.rmtree(retired)
+    return target
+
+
+def write_index(
+    output_dir: Path | str,
+    *,
+    chunks: Iterable[DocumentChunk],
+    matrix,
+    vocabulary: Sequence[str],
+    idf,
+    vectorizer_params: Dict[str, Any],
+    term_matrix=None,
+) -> Path:
+    """Write *matrix* (CSR), vocabulary, IDF and *chunks* into *output_dir*.
+
+    *term_matrix* is the normalised matrix to score against; it is stored
+    column-major next to the CSR. The files are built in a staging directory that then replaces
+    *output_dir* as a whole.
+    """
+    staging = staging_directory(output_dir)
+    try:
+        _write_index_files(
+            staging,
+            chunks=chunks,
+            matrix=matrix,
+            vocabulary=vocabulary,
+            idf=idf,
+            vectorizer_params=vectorizer_params,
+            term_matrix=term_matrix,
+        )
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return replace_directory(staging, output_dir)
+
+
+def _write_index_files(
+    output_path: Path,
+    *,
+    chunks: Iterable[DocumentChunk],
+    matrix,
+    vocabulary: Sequence[str],
+    idf,
+    vectorizer_params: Dict[str, Any],
+    term_matrix=None,
+) -> None:
+    import numpy as np
+
+    if write_chunks(output_path, chunks) != matrix.shape[0]:
+        raise ValueError("Chunk count does not match the matrix row count")
+
+    save_csr(output_path, matrix)
+    if term_matrix is not None:
+        save_csc(output_path, term_matrix)
+    np.save(output_path / "idf.npy", np.asarray(idf))
+    (output_path / VOCABULARY_FILE).write_text(
+        "".join(f"{term}\n" for term in vocabulary), encoding="utf-8"
+    )
+
+    manifest = {
+        "format": INDEX_FORMAT,
+        "version": INDEX_FORMAT_VERSION,
+        "num_chunks": int(matrix.shape[0]),
+        "num_features": int(matrix.shape[1]),
+        "nnz": int(matrix.nnz),
+        "term_major": term_matrix is not None,
+        "vectorizer": {
+            key: vectorizer_params[key]
+            for key in VECTORIZER_PARAMS
+            if key in vectorizer_params
+        },
+    }
+    (output_path / MANIFEST_FILE).write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+
+def read_manifest(index_dir: Path | str) -> Dict[str, Any]:
+    manifest_path = Path(index_dir) / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Index manifest not found: {manifest_path}")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format") != INDEX_FORMAT:
+        raise ValueError(f"Unknown index format: {manifest.get('format')!r}")
+    if manifest.get("version") != INDEX_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported index version {manifest.get('version')!r}"
+            f" (expected {INDEX_FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def read_index(index_dir: Path | str) -> LoadedIndex:
+    """Open an index directory; arrays stay memory-mapped and read-only."""
+    index_path = Path(index_dir)
+    manifest = read_manifest(index_path)
+
+    shape = (manifest["num_chunks"], manifest["num_features"])
+    matrix = load_csr(index_path, shape)
+    # Every term ends with "\n"; splitlines would also split on other separators
+    vocabulary = (
+        (index_path / VOCABULARY_FILE).read_text(encoding="utf-8").split("\n")[:-1]
+    )
+    if len(vocabulary) != shape[1]:
+        raise ValueError("Vocabulary size does not match the index manifest")
+
+    return LoadedIndex(
+        manifest=manifest,
+        matrix=matrix,
+        vocabulary=vocabulary,
+        idf=load_array(index_path, "idf.npy"),
+        chunks=open_chunks(index_path),
+        term_matrix=load_csc(index_path, shape) if manifest.get("term_major") else None,
+    )
+
+
+__all__ = [
+    "INDEX_FORMAT",
+    "INDEX_FORMAT_VERSION",
+    "ChunkStore",
+    "LoadedIndex",
+    "chunk_from_dict",
+    "chunk_to_dict",
+    "load_array",
+    "load_csc",
+    "load_csr",
+    "open_chunks",
+    "read_index",
+    "read_manifest",
+    "replace_directory",
+    "save_csc",
+    "save_csr",
+    "staging_directory",
+    "write_chunks",
+    "write_index",
+]
@@ -1,12 +1,16 @@
-"""Lightweight RAG toolkit built around TF-IDF embeddings for offline tests."""
+"""Lightweight RAG toolkit built around TF-IDF embeddings for offline tests.
+
+scikit-learn is imported on first use (fitting, loading or querying an
+index), so importing this module stays cheap for callers that never touch
+the policy assistant.
+"""
 
 from __future__ import annotations
 
+import warnings
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Iterable, List, Sequence
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import Any, Callable, Dict, Iterable, List, Sequence
 
 from .documentation import DocumentChunk
 
@@ -21,9 +25,55 @@ class TfidfEmbedder:
     """Simple TF-IDF embedder with cosine similarity."""
 
     def __init__(self, max_features: int = 4096) -> None:
-        self.vectorizer = TfidfVectorizer(max_features=max_features)
+        self.max_features = max_features
+        self._vectorizer = None
         self.document_matrix = None
 
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            self._vectorizer = TfidfVectorizer(max_features=self.max_features)
+        return self._vectorizer
+
+    @vectorizer.setter
+    def vectorizer(self, value) -> None:
+        self._vectorizer = value
+
+    def export(self) -> tuple[List[str], Any, Dict[str, Any]]:
+        """Return vocabulary (column order), IDF weights and vectorizer settings."""
+        if self.document_matrix is None:
+            raise RuntimeError("Embedder must be fitted before exporting.")
+        params = self.vectorizer.get_params()
+        params["ngram_range"] = list(params["ngram_range"])
+        return (
+            list(self.vectorizer.get_feature_names_out()),
+            self.vectorizer.idf_,
+            params,
+        )
+
+    def restore(
+        self,
+        vocabulary: Sequence[str],
+        idf,
+        params: Dict[str, Any],
+        document_matrix,
+    ) -> None:
+        """Rebuild a fitted vectorizer from exported arrays without refitting."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        settings = dict(params)
+        if "ngram_range" in settings:
+            settings["ngram_range"] = tuple(settings["ngram_range"])
+        vectorizer = TfidfVectorizer(
+            vocabulary={term: column for column, term in enumerate(vocabulary)},
+            **settings,
+        )
+        vectorizer.idf_ = idf
+        self.vectorizer = vectorizer
+        self.document_matrix = document_matrix
+
     def fit(self, texts: Sequence[str]) -> None:
         self.document_matrix = self.vectorizer.fit_transform(texts)
 
@@ -41,10 +91,14 @@ class TfidfEmbedder:
 class RAGPipeline:
     """Retrieval augmented answering pipeline."""
 
+    INDEX_DIRNAME = "tfidf_index"
+
     def __init__(self, *, embedder: TfidfEmbedder | None = None) -> None:
         self.embedder = embedder or TfidfEmbedder()
-        self.chunks: List[DocumentChunk] = []
+        self.chunks: Sequence[DocumentChunk] = []
         self.matrix = None
+        self._term_matrix = None
+        self._term_matrix_source = None
 
     def build(self, chunks: Iterable[DocumentChunk]) -> None:
         self.chunks = list(chunks)
@@ -54,42 +108,150 @@ class RAGPipeline:
         self.embedder.fit(texts)
         self.matrix = self.embedder.encode(texts)
 
-    def save(self, output_dir: Path | str) -> None:
-        import pickle
+    def save(self, output_dir: Path | str) -> Path:
+        """Write the index to ``<output_dir>/tfidf_index`` and return that path."""
+        from .index_store import write_index
 
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        payload = {
-            "chunks": self.chunks,
-            "vectorizer": self.embedder.vectorizer,
-            "matrix": self.matrix,
-        }
-        with (output_path / "tfidf_index.pkl").open("wb") as fp:
-            pickle.dump(payload, fp)
+        if self.matrix is None:
+            raise RuntimeError("Index oluşturulmadan kaydedilemez")
+        vocabulary, idf, params = self.embedder.export()
+        return write_index(
+            Path(output_dir) / self.INDEX_DIRNAME,
+            chunks=self.chunks,
+            matrix=self.matrix,
+            vocabulary=vocabulary,
+            idf=idf,
+            vectorizer_params=params,
+            term_matrix=self._term_major(),
+        )
 
     def load(self, index_path: Path | str) -> None:
+        """Open an index directory written by :meth:`save` (memory-mapped).
+
+        Legacy ``tfidf_index.pkl`` files are still readable but deprecated;
+        rebuild them with ``scripts/build_rag_index.py``.
+        """
+        index_path = Path(index_path)
+        if index_path.is_file():
+            self._load_pickle(index_path)
+            return
+
+        from .index_store import read_index
+
+        index = read_index(index_path)
+        self.embedder.restore(
+            index.vocabulary,
+            index.idf,
+            index.manifest["vectorizer"],
+            index.matrix,
+        )
+        self.chunks = index.chunks
+        self.matrix = index.matrix
+        if index.term_matrix is not None:
+            # Mapped from disk: shared between processes instead of rebuilt
+            self._term_matrix = index.term_matrix
+            self._term_matrix_source = index.matrix
+
+    def _load_pickle(self, index_path: Path) -> None:
         import pickle
 
-        with Path(index_path).open("rb") as fp:
+        warnings.warn(
+            "Pickle RAG indexes are deprecated; rebuild the index with"
+            " scripts/build_rag_index.py",
+            DeprecationWarning,
+            stacklevel=3,
+        )
+        with index_path.open("rb") as fp:
             payload = pickle.load(fp)
         self.chunks = payload["chunks"]
         self.embedder.vectorizer = payload["vectorizer"]
+        self.embedder.document_matrix = payload["matrix"]
         self.matrix = payload["matrix"]
 
     def retrieve(self, query: str, *, top_k: int = 3) -> List[RetrievalResult]:
-        if not query.strip():
-            return []
+        return self.retrieve_batch([query], top_k=top_k)[0]
+
+    def retrieve_batch(
+        self, queries: Sequence[str], *, top_k: int = 3
+    ) -> List[List[RetrievalResult]]:
+        """Score all *queries* with one sparse matrix product and return top-k each.
+
+        Rows are L2-normalised TF-IDF vectors, so the dot product is the cosine
+        similarity. Ties keep the lower chunk index first, as a stable sort would.
+        """
         if self.matrix is None:
             raise RuntimeError("Index oluşturulmadan retrieval yapılamaz")
-        query_vec = self.embedder.transform(query)
-        similarities = cosine_similarity(query_vec, self.matrix)[0]
-        cosine_scores = list(enumerate(map(float, similarities)))
-        cosine_scores.sort(key=lambda item: item[1], reverse=True)
-        results: List[RetrievalResult] = []
-        for idx, score in cosine_scores[:top_k]:
-            results.append(RetrievalResult(chunk=self.chunks[idx], score=score))
+        results: List[List[RetrievalResult]] = [[] for _ in queries]
+        active = [index for index, query in enumerate(queries) if query.strip()]
+        if not active or top_k <= 0:
+            return results
+
+        query_matrix = self.embedder.encode([queries[index] for index in active])
+        if self.embedder.vectorizer.norm != "l2":
+            from sklearn.preprocessing import normalize
+
+            query_matrix = normalize(query_matrix)
+        scores = (query_matrix @ self._term_major().T).tocsr()
+
+        for row, query_index in enumerate(active):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            for idx, score in _top_k(
+                scores.indices[start:end],
+                scores.data[start:end],
+                top_k,
+                self.matrix.shape[0],
+            ):
+                results[query_index].append(
+                    RetrievalResult(chunk=self.chunks[idx], score=score)
+                )
         return results
 
+    def _term_major(self):
+        """CSC copy of the (normalised) matrix, built once per index.
+
+        Multiplying against it only touches the columns of the query terms,
+        so scoring cost follows posting-list length instead of corpus size.
+        Indexes written by :meth:`save` store it, so loading maps it instead.
+        """
+        if self._term_matrix_source is not self.matrix:
+            matrix = self.matrix
+            if self.embedder.vectorizer.norm != "l2":
+                from sklearn.preprocessing import normalize
+
+                matrix = normalize(matrix)
+            self._term_matrix = matrix.tocsc()
+            self._term_matrix_source = self.matrix
+        return self._term_matrix
+
+
+def _top_k(indices, values, k: int, size: int) -> List[tuple[int, float]]:
+    """Top-*k* of a sparse score row (missing entries score 0) via argpartition."""
+    import numpy as np
+
+    indices = np.asarray(indices, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    positive = values > 0
+    indices, values = indices[positive], values[positive]
+
+    if len(values) > k:
+        kth = values[np.argpartition(-values, k - 1)[k - 1]]
+        above = values > kth
+        # Ties at the cut-off keep the lowest chunk indices
+        ties = np.flatnonzero(values == kth)
+        ties = ties[np.argsort(indices[ties], kind="stable")][: k - above.sum()]
+        keep = np.concatenate([np.flatnonzero(above), ties])
+        indices, values = indices[keep], values[keep]
+
+    order = np.lexsort((indices, -values))
+    top = [(int(indices[i]), float(values[i])) for i in order]
+
+    missing = min(k, size) - len(top)
+    if missing > 0:
+        # Chunks sharing no term with the query follow with score 0, by index
+        zeros = np.setdiff1d(np.arange(len(top) + missing), indices)[:missing]
+        top.extend((int(idx), 0.0) for idx in zeros)
+    return top
+
 
 class HybridResponder:
     """RAG-first responder that can fall back to a fine-tuned model."""
@@ -3,13 +3,18 @@ import time
 import streamlit as st
 
 from cargo_chat import (
-    cargo_status_bot,
+    ChangeSet,
+    cargo_status_bot_stream,
     create_cancel_request,
     create_return_request,
-    load_cargo_data,
-    load_model,
-    save_cargo_data,
+    ensure_database_schema,
+    get_model,
+    get_user,
+    save_cargo_changes,
+    start_warmup,
+    warmup,
 )
+from warmup import FAILED, LOADING, PENDING, READY, UNAVAILABLE
 
 # Sayfa konfigürasyonu - Modern görünüm
 st.set_page_config(
@@ -145,16 +150,12 @@ st.markdown(
 
 # Kullanıcı girişi kontrolü
 def check_user_login(user_id):
-    cargo_data = load_cargo_data()
-    return user_id in cargo_data
+    return get_user(user_id) is not None
 
 
 # Kullanıcının kargolarını getir
 def get_user_cargos(user_id):
-    cargo_data = load_cargo_data()
-    if user_id in cargo_data:
-        return cargo_data[user_id]
-    return None
+    return get_user(user_id)
 
 
 # Durum badge'i oluştur
@@ -198,6 +199,22 @@ def main():
         st.markdown("📱 0850 123 45 67")
         st.markdown("🕒 08:00 - 24:00")
 
+        st.markdown("---")
+        # Bileşenlerin hazır olma durumu
+        st.markdown("### ⚙️ Sistem Durumu")
+        state_labels = {
+            PENDING: "⏳ Sırada",
+            LOADING: "🔄 Yükleniyor",
+            READY: "✅ Hazır",
+            UNAVAILABLE: "⚪ Kullanılamıyor",
+            FAILED: "❌ Hata",
+        }
+        component_names = {"policy_index": "Politika indeksi", "model": "AI modeli"}
+        for name, info in warmup.snapshot().items():
+            st.markdown(
+                f"{component_names.get(name, name)}: {state_labels[info['state']]}"
+            )
+
     # Ana başlık
     st.markdown(
         """
@@ -209,8 +226,13 @@ def main():
         unsafe_allow_html=True,
     )
 
-    # Modeli yükle
-    pipe = load_model()
+    # Veritabanı şemasını (indeksler dahil) güncelle
+    ensure_database_schema()
+
+    # Model ve politika indeksi arka planda yüklenir; sayfa beklemeden çizilir.
+    # Model hazır olana kadar pipe None'dır ve sohbet şablon cevaplarla sürer
+    start_warmup()
+    pipe = get_model()
 
     # Session state yönetimi
     if "logged_in" not in st.session_state:
@@ -423,6 +445,11 @@ def main():
             # Tab 2: AI Asistan
             with tab2:
                 st.markdown("### 💬 AI Müşteri Hizmetleri Asistanı")
+                if pipe is None and warmup.status("model") in (PENDING, LOADING):
+                    st.info(
+                        "🤖 AI modeli arka planda yükleniyor. Bu sırada hazır "
+                        "cevaplarla yardımcı oluyoruz."
+                    )
 
                 # Chat history
                 if "chat_history" not in st.session_state:
@@ -459,6 +486,14 @@ def main():
                                     unsafe_allow_html=True,
                                 )
 
+                # Son model cevabının gecikmesi (ilk tokena kadar geçen süre)
+                stream_metrics = st.session_state.get("last_stream_metrics")
+                if stream_metrics is not None and stream_metrics.ttft_seconds:
+                    st.caption(
+                        f"⏱️ İlk token: {stream_metrics.ttft_seconds:.2f} sn · "
+                        f"Toplam: {stream_metrics.total_seconds:.2f} sn"
+                    )
+
                 # Chat input
                 st.markdown("#### 💭 Sorunuzu Sorun")
                 with st.form("chat_form", clear_on_submit=True):
@@ -477,11 +512,12 @@ def main():
                             {"role": "user", "content": user_question}
                         )
 
-                        # AI yanıtı al
-                        with st.spinner("🤖 AI düşünüyor..."):
-                            ai_response = cargo_status_bot(
+                        # AI yanıtı token token yazılır (model yoksa tek parça)
+                        ai_response = st.write_stream(
+                            cargo_status_bot_stream(
                                 pipe, user_question, st.session_state.user_data
                             )
+                        )
 
                         # AI yanıtını ekle
                         st.session_state.chat_history.append(
@@ -552,29 +588,40 @@ def main():
                                         type="primary",
                                     ):
                                         # İşlemi gerçekleştir
-                                        cargo_data = load_cargo_data()
                                         user_id = st.session_state.user_id
+                                        user_data = get_user(user_id)
+                                        changes = ChangeSet(user_id=user_id)
 
-                                        if action["type"] == "return":
+                                        if user_data is None:
+                                            success, message = (
+                                                False,
+                                                "Kullanıcı verileri yüklenemedi",
+                                            )
+                                        elif action["type"] == "return":
                                             success, message = create_return_request(
                                                 action["tracking_number"],
-                                                cargo_data[user_id],
+                                                user_data,
                                                 action["reason"],
+                                                changes,
                                             )
                                         else:  # cancel
                                             success, message = create_cancel_request(
                                                 action["tracking_number"],
-                                                cargo_data[user_id],
+                                                user_data,
                                                 action["reason"],
+                                                changes,
+                                            )
+
+                                        # Veritabanına yalnızca değişen kargoyu yaz
+                                        if success and not save_cargo_changes(changes):
+                                            success, message = (
+                                                False,
+                                                "Veritabanına kaydedilemedi",
                                             )
 
                                         if success:
-                                            # Veritabanını güncelle
-                                            save_cargo_data(cargo_data)
                                             # Session state'i güncelle
-                                            st.session_state.user_data = cargo_data[
-                                                user_id
-                                            ]
+                                            st.session_state.user_data = user_data
                                             # İşlemi listeden çıkar
                                             st.session_state.pending_actions.pop(i)
 
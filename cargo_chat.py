@@ -1,18 +1,41 @@
+import importlib.util
 import logging
 import os
-import re
 import sqlite3
+import sys
+import threading
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
 
 import streamlit as st
-from huggingface_hub import login
 
-try:  # Transformers import - GPU bağımlı
-    from transformers import pipeline
-except ImportError as e:
-    print(f"WARNING: Transformers yüklenemedi: {e}")
-    pipeline = None  # type: ignore
+from cargo_repository import (
+    CargoRepository,
+    ChangeSet,
+    bump_versions,
+    cargo_key,
+    ensure_version_table,
+    load_all_users,
+    user_key,
+)
+from db_connection import get_manager
+from db_migrations import migrate
+from intent_classifier import (
+    CANCEL_KEYWORDS,
+    POLICY_KEYWORDS,
+    POLICY_NEGATIVE_KEYWORDS,
+    RETURN_KEYWORDS,
+    TRACKING_NUMBER_RE,
+    IntentClassifier,
+    MessageIntent,
+)
+from llm_batching import BatchScheduler
+from llm_streaming import stream_pipeline
+from model_backends import DEFAULT_BACKEND, build_pipeline
+from prompt_builder import PrefixCachedPipeline, PromptBuilder
+from response_cache import ResponseCache, SQLiteResponseStore, response_cache_key
+from warmup import Warmup
 
 # Veritabanı bağlantısı için global değişken
 DB_PATH = "cargo_database.db"
@@ -30,24 +53,51 @@ except Exception as rag_import_error:  # pragma: no cover - ortam bağımlı
     HybridResponder = None  # type: ignore
     RAGPipeline = None  # type: ignore
 
-POLICY_KEYWORDS = [
-    "teslimat",
-    "iade",
-    "garanti",
-    "iptal",
-    "kusurlu",
-    "yoğun",
-    "kredi kartı",
-    "fiyat",
-]
-
-POLICY_NEGATIVE_KEYWORDS = [
-    "fiyat",
-    "kredi kart",
-    "piyasaya",
-    "lansman",
-    "ödeme kart",
-]
+# Tüm anahtar kelime listeleri tek bir derlenmiş ifadede, mesaj başına bir tarama
+intent_classifier = IntentClassifier(
+    return_keywords=RETURN_KEYWORDS,
+    cancel_keywords=CANCEL_KEYWORDS,
+    policy_keywords=POLICY_KEYWORDS,
+    policy_negative_keywords=POLICY_NEGATIVE_KEYWORDS,
+)
+
+# Gemma üretim parametreleri (normal ve akışlı mod ortak)
+GENERATION_KWARGS = {
+    "max_new_tokens": 300,
+    "do_sample": True,
+    "temperature": 0.7,
+    "top_k": 50,
+    "top_p": 0.9,
+    "return_full_text": False,
+}
+
+# CPU çıkarım arka ucu: fp32 (varsayılan), int8, bf16 veya onnx
+MODEL_BACKEND = os.environ.get("CARGOHUB_MODEL_BACKEND", DEFAULT_BACKEND)
+
+# Oturumlar arası mikro-toplama; LLM_BATCH_SIZE > 1 iken etkin olur. Toplama
+# açıkken akış modu kullanılmaz: cevap toplu üretimden tek parça gelir
+LLM_BATCH_SIZE = int(os.environ.get("CARGOHUB_LLM_BATCH_SIZE", "1"))
+LLM_BATCH_WAIT_MS = float(os.environ.get("CARGOHUB_LLM_BATCH_WAIT_MS", "20"))
+LLM_QUEUE_SIZE = int(os.environ.get("CARGOHUB_LLM_QUEUE_SIZE", "64"))
+# Kuyrukta ve üretimde beklenecek en uzun süre; dolarsa oturum hata alır
+LLM_BATCH_TIMEOUT_S = float(os.environ.get("CARGOHUB_LLM_BATCH_TIMEOUT_S", "120"))
+
+_batch_scheduler = None
+_batch_scheduler_lock = threading.Lock()
+
+# Prompt token bütçesi ve sabit sistem öneki için KV önbelleği
+PROMPT_TOKEN_BUDGET = int(os.environ.get("CARGOHUB_PROMPT_TOKEN_BUDGET", "1024"))
+PREFIX_KV_CACHE = os.environ.get("CARGOHUB_PREFIX_KV_CACHE", "1") == "1"
+
+# Politika retrieval motoru: tfidf (varsayılan), bm25 (ters indeks) veya
+# incremental (build_rag_index.py --incremental ile güncellenen indeks)
+RAG_ENGINE = os.environ.get("CARGOHUB_RAG_ENGINE", "tfidf")
+# Skor ölçekleri farklı olduğundan eşik motora göre seçilir
+RAG_MIN_SCORES = {"tfidf": 0.22, "bm25": 0.09, "incremental": 0.22}
+RAG_INDEX_PATHS = {"incremental": Path("data/index/incremental_index")}
+
+_prompt_builder = None
+_prompt_builder_lock = threading.Lock()
 
 POLICY_NO_RESULT_RESPONSE = (
     "Bu konuda resmi kayıtlarda bilgi bulunmuyor. Detay için müşteri hizmetleri"
@@ -56,14 +106,77 @@ POLICY_NO_RESULT_RESPONSE = (
 
 
 def get_db_connection():
-    """SQLite veritabanı bağlantısı oluşturur"""
-    return sqlite3.connect(DB_PATH)
+    """İş parçacığına ait, WAL modunda paylaşılan SQLite bağlantısını döndürür
+
+    Bağlantı havuzdan gelir; kapatılmamalıdır. İşlem için ``with conn:`` kullanın.
+    """
+    return get_manager(DB_PATH).connection()
+
+
+@st.cache_resource
+def ensure_database_schema():
+    """Veritabanı şemasını (tablolar ve indeksler) en son sürüme yükseltir
+
+    İşlem başına bir kez çalışır; bekleyen göç yoksa yalnızca sürümü okur.
+    """
+    manager = get_manager(DB_PATH)
+    try:
+        return manager.run_with_retry(lambda: migrate(manager.connection()))
+    except sqlite3.Error as e:
+        logger.error(f"Şema yükseltme hatası: {str(e)}")
+        return None
+
+
+# Kullanıcı bazlı veri erişimi - işlem başına sabit bellek (LRU + TTL önbellek)
+repository = CargoRepository(DB_PATH)
+
+# LLM cevap önbelleği; RESPONSE_CACHE_DB verilirse tüm işçiler dosyayı paylaşır
+RESPONSE_CACHE_DB = os.environ.get("CARGOHUB_RESPONSE_CACHE_DB")
+response_cache = ResponseCache(
+    SQLiteResponseStore(RESPONSE_CACHE_DB) if RESPONSE_CACHE_DB else None
+)
+
+
+def transformers_available() -> bool:
+    """Transformers'ı import etmeden kurulu olup olmadığını kontrol eder
+
+    Ağır model bağımlılıkları (transformers, torch, huggingface_hub) modül
+    yüklenirken değil, model ilk kez kurulurken import edilir.
+    """
+    try:
+        return importlib.util.find_spec("transformers") is not None
+    except ValueError:  # sys.modules'a elle eklenmiş modül (ör. test mock'u)
+        return sys.modules.get("transformers") is not None
 
 
 # Güvenli login - ortam değişkeni kullan
+def build_model():
+    """
+    Modeli arayüz çağrısı yapmadan yükler (arka plan ısınması için)
+    Transformers ya da token yoksa None döner, yükleme hataları yükseltilir
+    """
+    if not transformers_available():
+        logger.warning("Transformers kurulu değil, model yüklenmeyecek")
+        return None  # Transformers yüklenemedi
+
+    token = os.environ.get("HF_TOKEN")
+    if not token:
+        logger.warning("Hugging Face token bulunamadı, model yüklenmeyecek")
+        return None  # Token yoksa model yüklenmez
+
+    from huggingface_hub import login
+
+    login(token=token)
+    # Gemma modelini yükle
+    pipe = build_pipeline(MODEL_BACKEND)
+    if PREFIX_KV_CACHE:
+        pipe = PrefixCachedPipeline(pipe, PromptBuilder().prefix)
+    return pipe
+
+
 @st.cache_resource
 def load_model():
-    if pipeline is None:
+    if not transformers_available():
         return None  # Transformers yüklenemedi
 
     token = os.environ.get("HF_TOKEN")
@@ -72,49 +185,94 @@ def load_model():
         return None  # Token yoksa model yüklenmez
 
     try:
-        login(token=token)
-        # Gemma modelini yükle
         with st.spinner("🤖 AI modeli yükleniyor..."):
-            pipe = pipeline("text-generation", model="google/gemma-2b-it")
-        return pipe
+            return build_model()
     except Exception as e:
         st.error(f"❌ Model yüklenirken hata: {str(e)}")
         return None
 
 
+def classify_message(prompt: str) -> MessageIntent:
+    """Mesajın niyetini, takip numaralarını ve politika bayraklarını çıkarır"""
+    return intent_classifier.classify(prompt)
+
+
 def is_policy_question(prompt: str) -> bool:
-    prompt_lower = prompt.lower()
-    return any(keyword in prompt_lower for keyword in POLICY_KEYWORDS)
+    return classify_message(prompt).is_policy
 
 
-@st.cache_resource
-def load_policy_assistant():
+def build_policy_assistant():
     if HybridResponder is None or RAGPipeline is None:
         return None
 
-    index_path = Path("data/index/tfidf_index.pkl")
+    index_path = RAG_INDEX_PATHS.get(RAG_ENGINE, Path("data/index/tfidf_index"))
     if not index_path.exists():
         logger.info("Politika RAG indeksi bulunamadı, hibrit asistan pasif")
         return None
 
     try:
+        if RAG_ENGINE == "incremental":
+            from cargo_ai.incremental_index import IncrementalIndex
+
+            return HybridResponder(
+                IncrementalIndex.load(index_path),
+                min_score=RAG_MIN_SCORES["incremental"],
+            )
         pipeline = RAGPipeline()
         pipeline.load(index_path)
-        return HybridResponder(pipeline, min_score=0.22)
+        if RAG_ENGINE == "bm25":
+            from cargo_ai.bm25 import BM25Index
+
+            engine = BM25Index()
+            engine.build(pipeline.chunks)
+            return HybridResponder(engine, min_score=RAG_MIN_SCORES["bm25"])
+        return HybridResponder(pipeline, min_score=RAG_MIN_SCORES["tfidf"])
     except Exception as exc:  # pragma: no cover - IO hataları
         logger.warning("Politika RAG pipeline başlatılamadı: %s", exc)
         return None
 
 
-def maybe_answer_policy_question(prompt: str) -> tuple[bool, str | None]:
-    if not is_policy_question(prompt):
+@st.cache_resource
+def load_policy_assistant():
+    return build_policy_assistant()
+
+
+# Arka plan ısınması: politika indeksi (hızlı) önce, model sonra yüklenir
+warmup = Warmup({"policy_index": build_policy_assistant, "model": build_model})
+
+# Politika sorusu geldiğinde indeks henüz yükleniyorsa beklenecek en uzun süre
+POLICY_WARMUP_TIMEOUT_SECONDS = 10.0
+
+
+def start_warmup():
+    """Isınmayı süreç başına bir kez başlatır; arayüzü bekletmez"""
+    return warmup.start()
+
+
+def get_model():
+    """Isınma başladıysa hazır modeli (yoksa None), başlamadıysa load_model'i döndürür"""
+    if warmup.started:
+        return warmup.get("model")
+    return load_model()
+
+
+def get_policy_assistant():
+    if warmup.started:
+        return warmup.wait("policy_index", POLICY_WARMUP_TIMEOUT_SECONDS)
+    return load_policy_assistant()
+
+
+def maybe_answer_policy_question(
+    prompt: str, intent: MessageIntent | None = None
+) -> tuple[bool, str | None]:
+    intent = intent or classify_message(prompt)
+    if not intent.is_policy:
         return False, None
 
-    lowered = prompt.lower()
-    if any(keyword in lowered for keyword in POLICY_NEGATIVE_KEYWORDS):
+    if intent.is_policy_negative:
         return True, POLICY_NO_RESULT_RESPONSE
 
-    responder = load_policy_assistant()
+    responder = get_policy_assistant()
     if responder is None:
         return True, POLICY_NO_RESULT_RESPONSE
 
@@ -130,85 +288,63 @@ def maybe_answer_policy_question(prompt: str) -> tuple[bool, str | None]:
 def load_cargo_data():
     """SQLite veritabanından tüm kargo verilerini yükler"""
     try:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
+        with get_db_connection() as conn:
+            # Kullanıcı/kargo birleşimi ve tüm hareket geçmişi tek sıralı sorguda
+            return load_all_users(conn)
 
-            # Users ve cargos verilerini birleştir
-            cursor.execute(
-                """
-                SELECT u.id, u.name, u.email, u.phone, u.member_since,
-                       c.tracking_number, c.status, c.location, c.last_update,
-                       c.estimated_delivery, c.description, c.weight, c.dimensions,
-                       c.carrier, c.insurance, c.return_reason
-                FROM users u
-                LEFT JOIN cargos c ON u.id = c.user_id
-                ORDER BY u.id, c.tracking_number
-            """
-            )
+    except Exception as e:
+        logger.error(f"Veritabanı yükleme hatası: {e}")
+        st.error(f"❌ Veritabanı yükleme hatası: {e}")
+        return {}
 
-            data = {}
-            for row in cursor.fetchall():
-                user_id = row[0]
-                if user_id not in data:
-                    data[user_id] = {
-                        "name": row[1],
-                        "email": row[2],
-                        "phone": row[3],
-                        "member_since": row[4],
-                        "cargos": {},
-                    }
-
-                if row[5]:  # tracking_number varsa
-                    tracking_num = row[5]
-                    data[user_id]["cargos"][tracking_num] = {
-                        "status": row[6],
-                        "location": row[7],
-                        "last_update": row[8],
-                        "estimated_delivery": row[9],
-                        "description": row[10],
-                        "weight": row[11],
-                        "dimensions": row[12],
-                        "carrier": row[13],
-                        "insurance": row[14],
-                        "return_reason": row[15],
-                        "tracking_history": [],
-                    }
-
-            # Tracking history'leri ekle
-            for user_id in data:
-                for tracking_num in data[user_id]["cargos"]:
-                    cursor.execute(
-                        """
-                        SELECT date, status, location
-                        FROM tracking_history
-                        WHERE tracking_number = ?
-                        ORDER BY date
-                    """,
-                        (tracking_num,),
-                    )
 
-                    history = []
-                    for h_row in cursor.fetchall():
-                        history.append(
-                            {"date": h_row[0], "status": h_row[1], "location": h_row[2]}
-                        )
-                    data[user_id]["cargos"][tracking_num]["tracking_history"] = history
+# Tek kullanıcının verilerini getir
+def get_user(user_id):
+    """Kullanıcıyı kargoları ve hareket geçmişiyle getirir, bulunamazsa None"""
+    try:
+        return repository.get_user(user_id)
+    except sqlite3.Error as e:
+        logger.error(f"Kullanıcı yükleme hatası: {e}")
+        st.error(f"❌ Veritabanı yükleme hatası: {e}")
+        return None
+
+
+# Tek kargonun verilerini getir
+def get_cargo(tracking_number):
+    """Kargoyu hareket geçmişiyle getirir, bulunamazsa None"""
+    try:
+        return repository.get_cargo(tracking_number)
+    except sqlite3.Error as e:
+        logger.error(f"Kargo yükleme hatası: {e}")
+        return None
 
-        return data
+
+# Yalnızca değişen kayıtları kaydet
+def save_cargo_changes(changes):
+    """
+    ChangeSet içindeki kargo alanlarını günceller ve yeni hareketleri ekler.
+    Tüm yazma tek kısa işlemde yapılır; diğer kullanıcı ve kargolara dokunulmaz.
+    """
+    try:
+        repository.save_changes(changes)
+        return True
 
     except Exception as e:
-        logger.error(f"Veritabanı yükleme hatası: {e}")
-        st.error(f"❌ Veritabanı yükleme hatası: {e}")
-        return {}
+        logger.error(f"Veri kaydetme hatası: {str(e)}")
+        st.error(f"❌ Veri kaydetme hatası: {str(e)}")
+        return False
 
 
 # Kargo verilerini kaydet
 def save_cargo_data(cargo_data):
     """
     Güncellenmiş kargo verilerini SQLite veritabanına kaydeder
+    Verilen tüm kullanıcı ve kargoları yeniden yazar; tekil işlemler için
+    save_cargo_changes kullanın.
     """
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with get_db_connection() as conn:
+            ensure_version_table(conn)
             cursor = conn.cursor()
 
             # Tüm verileri güncelle (basit yaklaşım - production'da daha akıllı yap)
@@ -273,10 +409,20 @@ def save_cargo_data(cargo_data):
                                 ),
                             )
 
+            # Diğer işçiler yalnızca bu kayıtları yeniden yükler
+            changed_keys = []
+            for user_id, user_data in cargo_data.items():
+                changed_keys.append(user_key(user_id))
+                changed_keys.extend(cargo_key(tn) for tn in user_data["cargos"])
+            bump_versions(conn, changed_keys)
             conn.commit()
 
-        # Cache'i temizle
+        # Tam anlık görüntü önbelleği kayıt bazlı güncellenemez
         load_cargo_data.clear()
+        for user_id, user_data in cargo_data.items():
+            repository.invalidate_user(user_id)
+            for tracking_num in user_data["cargos"]:
+                repository.invalidate_cargo(tracking_num)
 
         return True
 
@@ -289,52 +435,39 @@ def save_cargo_data(cargo_data):
 # Tracking number'ı prompt'tan çıkar
 def extract_tracking_number(prompt):
     # TR ile başlayan 9 haneli tracking number ara
-    match = re.search(r"\b(TR\d{9})\b", prompt)
+    match = TRACKING_NUMBER_RE.search(prompt)
     return match.group(1) if match else None
 
 
+# Birden çok takip numarasını kullanıcının kargolarında tek seferde bul
+def lookup_user_cargos(user_cargos, tracking_numbers):
+    """
+    Takip numaralarını (tekrarlar atılarak, mesajdaki sırayla) kullanıcının
+    kargolarında arar
+    Returns: ({takip_no: kargo_bilgisi}, [bulunamayan takip numaraları])
+    """
+    cargos = user_cargos["cargos"]
+    found = {}
+    missing = []
+    for tracking_number in dict.fromkeys(tracking_numbers):
+        cargo_info = cargos.get(tracking_number)
+        if cargo_info is None:
+            missing.append(tracking_number)
+        else:
+            found[tracking_number] = cargo_info
+    return found, missing
+
+
 # İade veya iptal talebi var mı kontrol et
 def detect_return_cancel_intent(prompt):
     """
     Kullanıcı mesajında iade veya iptal isteği var mı kontrol eder
     Returns: ('return', tracking_number) veya ('cancel', tracking_number) veya (None, None)
     """
-    prompt_lower = prompt.lower()
-
-    # İade anahtar kelimeleri
-    return_keywords = [
-        "iade",
-        "döndür",
-        "gönder geri",
-        "geri gönder",
-        "iptal et",
-        "vazgeç",
-    ]
-
-    # İptal anahtar kelimeleri (henüz yola çıkmamış kargolar için)
-    cancel_keywords = ["iptal", "iptal et", "vazgeç", "dur", "durdur"]
-
-    tracking_number = extract_tracking_number(prompt)
-
-    if not tracking_number:
+    intent = classify_message(prompt)
+    if intent.action is None:
         return None, None
-
-    # İade isteği mi kontrol et
-    if any(keyword in prompt_lower for keyword in return_keywords):
-        # İade kelimeleri varsa ve iptal kelimeleri yoksa iade olarak kabul et
-        if not any(keyword in prompt_lower for keyword in ["iptal et", "vazgeç"]):
-            return "return", tracking_number
-        # Hem iade hem iptal varsa, bağlama göre karar ver
-        if "teslim" in prompt_lower or "aldım" in prompt_lower:
-            return "return", tracking_number
-
-    # İptal isteği mi kontrol et
-    if any(keyword in prompt_lower for keyword in cancel_keywords):
-        # İptal ama iade değilse
-        if not any(keyword in prompt_lower for keyword in ["iade", "döndür"]):
-            return "cancel", tracking_number
-
-    return None, None
+    return intent.action, intent.tracking_number
 
 
 # İade uygunluğu kontrolü
@@ -398,9 +531,12 @@ def check_cancel_eligibility(cargo_info):
 
 
 # İade talebi oluştur
-def create_return_request(tracking_number, user_cargos, reason="Müşteri talebi"):
+def create_return_request(
+    tracking_number, user_cargos, reason="Müşteri talebi", changes=None
+):
     """
     İade talebi oluşturur ve kargo durumunu günceller
+    changes (ChangeSet) verilirse yapılan değişiklikler kaydedilmek üzere eklenir
     """
     if tracking_number not in user_cargos["cargos"]:
         return False, "Kargo bulunamadı"
@@ -419,13 +555,12 @@ def create_return_request(tracking_number, user_cargos, reason="Müşteri talebi
     if "tracking_history" not in cargo_info:
         cargo_info["tracking_history"] = []
 
-    cargo_info["tracking_history"].append(
-        {
-            "date": current_time,
-            "status": "İade talebi alındı",
-            "location": "İstanbul İade Merkezi",
-        }
-    )
+    event = {
+        "date": current_time,
+        "status": "İade talebi alındı",
+        "location": "İstanbul İade Merkezi",
+    }
+    cargo_info["tracking_history"].append(event)
 
     # Durumu güncelle
     cargo_info["status"] = "İade İşlemi"
@@ -433,13 +568,26 @@ def create_return_request(tracking_number, user_cargos, reason="Müşteri talebi
     cargo_info["last_update"] = current_time
     cargo_info["return_reason"] = reason
 
+    if changes is not None:
+        changes.update_cargo(
+            tracking_number,
+            status=cargo_info["status"],
+            location=cargo_info["location"],
+            last_update=current_time,
+            return_reason=reason,
+        )
+        changes.add_history(tracking_number, event)
+
     return True, "İade talebiniz başarıyla oluşturuldu"
 
 
 # İptal talebi oluştur
-def create_cancel_request(tracking_number, user_cargos, reason="Müşteri talebi"):
+def create_cancel_request(
+    tracking_number, user_cargos, reason="Müşteri talebi", changes=None
+):
     """
     İptal talebi oluşturur ve kargo durumunu günceller
+    changes (ChangeSet) verilirse yapılan değişiklikler kaydedilmek üzere eklenir
     """
     if tracking_number not in user_cargos["cargos"]:
         return False, "Kargo bulunamadı"
@@ -458,13 +606,12 @@ def create_cancel_request(tracking_number, user_cargos, reason="Müşteri talebi
     if "tracking_history" not in cargo_info:
         cargo_info["tracking_history"] = []
 
-    cargo_info["tracking_history"].append(
-        {
-            "date": current_time,
-            "status": "İptal talebi alındı",
-            "location": "İstanbul Depo",
-        }
-    )
+    event = {
+        "date": current_time,
+        "status": "İptal talebi alındı",
+        "location": "İstanbul Depo",
+    }
+    cargo_info["tracking_history"].append(event)
 
     # Durumu güncelle
     cargo_info["status"] = "İptal Edildi"
@@ -472,14 +619,26 @@ def create_cancel_request(tracking_number, user_cargos, reason="Müşteri talebi
     cargo_info["last_update"] = current_time
     cargo_info["cancel_reason"] = reason
 
+    if changes is not None:
+        # cancel_reason için kolon yok; yalnızca durum alanları yazılır
+        changes.update_cargo(
+            tracking_number,
+            status=cargo_info["status"],
+            location=cargo_info["location"],
+            last_update=current_time,
+        )
+        changes.add_history(tracking_number, event)
+
     return True, "İptal talebiniz başarıyla gerçekleştirildi"
 
 
 # Kargo durumu chatbot fonksiyonu
-def cargo_status_bot(pipe, prompt, user_cargos):
+def cargo_status_bot(pipe, prompt, user_cargos, stream=False):
     """
     Kargo durumu sorgulama ve iade/iptal işlemleri chatbot'u
     Kullanıcının kendi kargoları için sorgu yapabilir ve işlemler başlatabilir
+    stream=True iken model cevapları metin parçaları üreten bir iterator olarak
+    döner; diğer tüm cevaplar yine str'dir
     """
 
     # Session state başlatma
@@ -492,8 +651,11 @@ def cargo_status_bot(pipe, prompt, user_cargos):
     if user_cargos is None:
         return "Kullanıcı verileri bulunamadı. Lütfen tekrar giriş yapın."
 
+    # Mesaj tek taramada sınıflandırılır: niyet, takip numarası, politika
+    intent = classify_message(prompt)
+
     # Önce iade veya iptal talebi var mı kontrol et
-    action_type, tracking_number = detect_return_cancel_intent(prompt)
+    action_type, tracking_number = intent.action, intent.tracking_number
 
     if action_type and tracking_number:
         # İade veya iptal talebi var
@@ -559,10 +721,10 @@ def cargo_status_bot(pipe, prompt, user_cargos):
 İptal işlemini başlatmak için lütfen aşağıdaki onay bölümünden onaylayın. Bu işlem geri alınamaz."""
 
     # Normal kargo durumu sorgulama
-    tracking_number = extract_tracking_number(prompt)
+    tracking_number = intent.tracking_number
 
     if not tracking_number:
-        handled, policy_response = maybe_answer_policy_question(prompt)
+        handled, policy_response = maybe_answer_policy_question(prompt, intent)
         if handled and policy_response:
             st.session_state.chat_history.append({"role": "user", "content": prompt})
             st.session_state.chat_history.append(
@@ -572,6 +734,13 @@ def cargo_status_bot(pipe, prompt, user_cargos):
 
         return "Üzgünüm, takip numaranızı bulamadım. Lütfen TR ile başlayan 9 haneli takip numaranızı belirtin (örn: TR123456789). İade veya iptal talepleriniz için de takip numaranızı belirtmeniz gerekir."
 
+    # Birden çok takip numarası tek aramada bulunur ve tek cevapta birleştirilir
+    if len(set(intent.tracking_numbers)) > 1:
+        response = multi_cargo_status_response(
+            pipe, prompt, user_cargos, intent.tracking_numbers, stream=stream
+        )
+        return remember_exchange(prompt, response)
+
     # Kullanıcının kargolarında bu takip numarası var mı kontrol et
     if tracking_number not in user_cargos["cargos"]:
         available_tracking = list(user_cargos["cargos"].keys())
@@ -621,65 +790,201 @@ def cargo_status_bot(pipe, prompt, user_cargos):
 
         return response
 
-    # Sohbet geçmişini hazırla
-    chat_history_text = ""
-    if st.session_state.chat_history:
-        recent_messages = st.session_state.chat_history[-6:]  # Son 6 mesaj (3 sohbet)
-        chat_history_text = "\nÖnceki sohbet:\n" + "\n".join(
-            [
-                f"{'Kullanıcı' if msg['role'] == 'user' else 'Asistan'}: {msg['content']}"
-                for msg in recent_messages
-            ]
-        )
-
     # Gemma ile doğal cevap oluştur
-    context = f"""
-    Kargo bilgisi:
-    - Takip Numarası: {tracking_number}
+    result = generate_cargo_answer(
+        pipe, prompt, user_cargos["name"], {tracking_number: cargo_info}, stream=stream
+    )
+
+    # Sohbet geçmişine ekle
+    return remember_exchange(prompt, result)
+
+
+# Akışlı chatbot cevabı
+def cargo_status_bot_stream(pipe, prompt, user_cargos):
+    """
+    cargo_status_bot'un üreteç sürümü: model cevabını token token verir
+    Şablon ve hata cevapları tek parça olarak gelir (st.write_stream ile uyumlu)
+    """
+    reply = cargo_status_bot(pipe, prompt, user_cargos, stream=True)
+    if isinstance(reply, str):
+        yield reply
+    else:
+        yield from reply
+
+
+# Soru-cevap çiftini sohbet geçmişine ekle
+def remember_exchange(prompt, response):
+    """
+    Cevap str ise hemen, iterator ise akış tamamlandığında geçmişe eklenir
+    """
+    if isinstance(response, str):
+        st.session_state.chat_history.append({"role": "user", "content": prompt})
+        st.session_state.chat_history.append({"role": "assistant", "content": response})
+        return response
+
+    def record():
+        chunks = []
+        for chunk in response:
+            chunks.append(chunk)
+            yield chunk
+        remember_exchange(prompt, "".join(chunks).strip())
+
+    return record()
+
+
+# Tek kargonun prompt bağlamı
+def format_cargo_context(tracking_number, cargo_info):
+    """Kargo alanlarını modele verilecek madde listesine dönüştürür"""
+    return f"""    - Takip Numarası: {tracking_number}
     - Durum: {cargo_info['status']}
     - Konum: {cargo_info['location']}
     - Son Güncelleme: {cargo_info['last_update']}
     - Tahmini Teslimat: {cargo_info['estimated_delivery']}
     - Ürün Açıklaması: {cargo_info.get('description', 'Belirtilmemiş')}
     - Ağırlık: {cargo_info.get('weight', 'Belirtilmemiş')}
-    - Kargo Firması: {cargo_info.get('carrier', 'CargoHub')}
-    {chat_history_text}
-    """
+    - Kargo Firması: {cargo_info.get('carrier', 'CargoHub')}"""
 
-    system_prompt = f"""Sen {user_cargos['name']} kullanıcısının CargoHub kargo şirketi müşteri hizmetleri asistanısın.
 
-Görevlerin:
-- Kargo durumunu Türkçe olarak nazik, profesyonel ve yardımcı bir şekilde açıkla
-- Kullanıcıyı adıyla selamla ve kişisel bir tonda konuş
-- Detaylı bilgi ver ve gerekirse ek yardım öner
-- CargoHub'in kaliteli hizmet anlayışını vurgula
-- İade veya iptal talepleri için kullanıcıyı yönlendir
-- Kullanıcının sorularına doğrudan cevap ver (örneğin "ne zaman teslim edilecek?" sorusuna tahmini tarihi söyle)
-- Sohbeti doğal tut, kısa ve samimi yanıtlar ver
-- Önceki sohbet geçmişini dikkate al ve bağlamı sürdür
-- Kullanıcıyı memnun etmek için ekstra bilgi veya öneriler sun"""
+# Kargo bağlamıyla tek üretim çağrısı (önbellekli)
+def generate_cargo_answer(pipe, prompt, user_name, cargos, stream=False):
+    """
+    Sistem talimatı, kargoların bağlamı ve soruyla modelden tek cevap üretir
+    Aynı soru, kargo durumu ve sohbet geçmişi için önbellekteki cevap döner
+    stream=True iken önbellekte olmayan cevap parça parça üretilir ve akış
+    tamamlanınca önbelleğe yazılır
+    """
+    if len(cargos) == 1:
+        header = "Kargo bilgisi:"
+    else:
+        header = f"Kargo bilgileri ({len(cargos)} kargo):"
+    cargo_contexts = "\n\n".join(
+        format_cargo_context(tracking_number, cargo_info)
+        for tracking_number, cargo_info in cargos.items()
+    )
 
-    full_prompt = (
-        f"{system_prompt}\n\n{context}\n\nKullanıcı sorusu: {prompt}\n\nCevabın:"
+    # Sohbet geçmişi token bütçesine sığdırılır; sabit sistem talimatı önektir
+    built = get_prompt_builder(pipe).build(
+        prompt,
+        user_name=user_name,
+        context=f"{header}\n{cargo_contexts}",
+        history=st.session_state.chat_history or [],
+    )
+    full_prompt = built.text
+    key = response_cache_key(
+        prompt, cargos, history_text=built.history_text, user_name=user_name
     )
+    if not stream:
+        return response_cache.get_or_generate(
+            key, cargos, lambda: run_generation(pipe, full_prompt)
+        )
+
+    cached = response_cache.get(key, cargos)
+    if cached is not None:
+        return cached
+    if get_batch_scheduler(pipe) is not None:
+        response = run_generation(pipe, full_prompt)
+        response_cache.set(key, cargos, response)
+        return response
 
-    output = pipe(
-        full_prompt,
-        max_new_tokens=300,
-        do_sample=True,
-        temperature=0.7,
-        top_k=50,
-        top_p=0.9,
-        return_full_text=False,
+    def cache_when_done(chunks):
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        response_cache.set(key, cargos, "".join(parts).strip())
+
+    return cache_when_done(
+        stream_pipeline(
+            pipe, full_prompt, on_complete=record_stream_metrics, **GENERATION_KWARGS
+        )
     )
 
-    result = output[0]["generated_text"].strip()
 
-    # Sohbet geçmişine ekle
-    st.session_state.chat_history.append({"role": "user", "content": prompt})
-    st.session_state.chat_history.append({"role": "assistant", "content": result})
+# Son akışın gecikme ölçümleri (TTFT) arayüzde gösterilir
+def record_stream_metrics(metrics):
+    st.session_state.last_stream_metrics = metrics
+
+
+# Pipeline'ın tokenizer'ıyla ölçen, pipeline başına tek prompt oluşturucu
+def get_prompt_builder(pipe):
+    global _prompt_builder
+    tokenizer = getattr(pipe, "tokenizer", None)
+    with _prompt_builder_lock:
+        if _prompt_builder is None or _prompt_builder.tokenizer is not tokenizer:
+            _prompt_builder = PromptBuilder(tokenizer, max_tokens=PROMPT_TOKEN_BUDGET)
+        return _prompt_builder
+
+
+def run_generation(pipe, full_prompt):
+    scheduler = get_batch_scheduler(pipe)
+    if scheduler is not None:
+        return scheduler.generate(
+            full_prompt, timeout=LLM_BATCH_TIMEOUT_S, **GENERATION_KWARGS
+        )
+    output = pipe(full_prompt, **GENERATION_KWARGS)
+    return output[0]["generated_text"].strip()
+
+
+# Paylaşılan pipeline için tek mikro-toplama zamanlayıcısı
+def get_batch_scheduler(pipe):
+    """Toplama etkinse pipeline'a bağlı zamanlayıcıyı döndürür, değilse None"""
+    global _batch_scheduler
+    if LLM_BATCH_SIZE <= 1:
+        return None
+    with _batch_scheduler_lock:
+        if _batch_scheduler is None or _batch_scheduler.pipe is not pipe:
+            if _batch_scheduler is not None:
+                _batch_scheduler.close()
+            _batch_scheduler = BatchScheduler(
+                pipe,
+                max_batch_size=LLM_BATCH_SIZE,
+                max_wait_ms=LLM_BATCH_WAIT_MS,
+                max_queue_size=LLM_QUEUE_SIZE,
+            )
+        return _batch_scheduler
+
+
+# Birden çok kargo için birleşik cevap
+def multi_cargo_status_response(
+    pipe, prompt, user_cargos, tracking_numbers, stream=False
+):
+    """
+    Mesajdaki tüm takip numaralarını tek aramada bulur ve tek cevap üretir
+    Model yoksa her kargo için bir şablon bloğu, varsa tek bir üretim çağrısı
+    kullanılır; bulunamayan numaralar cevabın sonunda listelenir
+    """
+    found, missing = lookup_user_cargos(user_cargos, tracking_numbers)
+
+    if not found:
+        available_tracking = list(user_cargos["cargos"].keys())
+        return f"Takip numaraları {', '.join(missing)} sizin kargolarınız arasında bulunamadı. Mevcut kargolarınız: {', '.join(available_tracking)}"
+
+    if pipe is None:
+        blocks = [
+            f"""**{tracking_number}** - {cargo_info.get('description') or 'Kargo'}
+- Durum: {cargo_info['status']}
+- Konum: {cargo_info['location']}
+- Son Güncelleme: {cargo_info['last_update']}
+- Tahmini Teslimat: {cargo_info['estimated_delivery']}"""
+            for tracking_number, cargo_info in found.items()
+        ]
+        response = (
+            f"Merhaba {user_cargos['name']}, sorduğunuz {len(found)} kargonun durumu:\n\n"
+            + "\n\n".join(blocks)
+        )
+    else:
+        response = generate_cargo_answer(
+            pipe, prompt, user_cargos["name"], found, stream=stream
+        )
+
+    if missing:
+        note = f"\n\nŞu takip numaraları kargolarınız arasında bulunamadı: {', '.join(missing)}"
+        if isinstance(response, str):
+            response += note
+        else:
+            response = chain(response, [note])
 
-    return result
+    return response
 
 
 # Pending actions'ı işle
@@ -713,20 +1018,27 @@ def process_pending_actions(user_cargos):
                     # İşlemi onayla
                     success = False
                     message = "Bilinmeyen işlem tipi"
+                    changes = ChangeSet()
 
                     if action["type"] == "return":
                         success, message = create_return_request(
-                            action["tracking_number"], user_cargos, action["reason"]
+                            action["tracking_number"],
+                            user_cargos,
+                            action["reason"],
+                            changes,
                         )
                     elif action["type"] == "cancel":
                         success, message = create_cancel_request(
-                            action["tracking_number"], user_cargos, action["reason"]
+                            action["tracking_number"],
+                            user_cargos,
+                            action["reason"],
+                            changes,
                         )
 
                     if success:
                         st.success(message)
                         # Veritabanına kaydet
-                        save_cargo_data(user_cargos)
+                        save_cargo_changes(changes)
                         # Pending action'ı kaldır
                         st.session_state.pending_actions.pop(i)
                         st.rerun()
@@ -0,0 +1,472 @@
+"""CargoHub SQLite veri erişim katmanı.
+
+Kullanıcı, kargo ve hareket geçmişi kayıtlarını uygulamanın kullandığı
+sözlük yapısına dönüştürür. Sorgular küme tabanlıdır: hareket geçmişi kargo
+başına ayrı sorgu yerine tek sıralı sorguyla okunur ve tek geçişte gruplanır.
+
+``CargoRepository`` tüm veritabanını belleğe almak yerine yalnızca istenen
+kullanıcının satırlarını okur ve LRU + TTL önbellekte tutar. Yazmalar
+``ChangeSet`` üzerinden yapılır: yalnızca değişen kargo alanları güncellenir
+ve yeni hareketler eklenir.
+
+Önbellek geçersiz kılma kayıt bazlıdır: her yazma ``entity_versions``
+tablosunda ``user:<id>`` / ``cargo:<takip no>`` anahtarlarının sürümünü
+artırır. Diğer işçiler ``PRAGMA data_version`` değiştiğinde yalnızca son
+gördükleri sürümden yeni anahtarları okuyup o kayıtları düşürür.
+"""
+
+from __future__ import annotations
+
+import copy
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Set
+
+from db_connection import ConnectionManager, get_manager
+from db_migrations import VERSION_INDEX_SQL, VERSION_TABLE_SQL
+
+_USER_CARGO_SELECT = """
+    SELECT u.id, u.name, u.email, u.phone, u.member_since,
+           c.tracking_number, c.status, c.location, c.last_update,
+           c.estimated_delivery, c.description, c.weight, c.dimensions,
+           c.carrier, c.insurance, c.return_reason
+    FROM users u
+    LEFT JOIN cargos c ON u.id = c.user_id
+"""
+
+USER_CARGO_QUERY = _USER_CARGO_SELECT + " ORDER BY u.id, c.tracking_number"
+
+SINGLE_USER_QUERY = _USER_CARGO_SELECT + " WHERE u.id = ? ORDER BY c.tracking_number"
+
+SINGLE_CARGO_QUERY = _USER_CARGO_SELECT + " WHERE c.tracking_number = ?"
+
+HISTORY_QUERY = """
+    SELECT tracking_number, date, status, location
+    FROM tracking_history
+    ORDER BY tracking_number, date, id
+"""
+
+USER_HISTORY_QUERY = """
+    SELECT th.tracking_number, th.date, th.status, th.location
+    FROM cargos c
+    JOIN tracking_history th ON th.tracking_number = c.tracking_number
+    WHERE c.user_id = ?
+    ORDER BY th.tracking_number, th.date, th.id
+"""
+
+CARGO_HISTORY_QUERY = """
+    SELECT tracking_number, date, status, location
+    FROM tracking_history
+    WHERE tracking_number = ?
+    ORDER BY date, id
+"""
+
+# ChangeSet ile güncellenebilecek cargos kolonları
+CARGO_FIELDS = (
+    "status",
+    "location",
+    "last_update",
+    "estimated_delivery",
+    "description",
+    "weight",
+    "dimensions",
+    "carrier",
+    "insurance",
+    "return_reason",
+)
+
+INSERT_HISTORY_SQL = """
+    INSERT INTO tracking_history (tracking_number, date, status, location)
+    VALUES (?, ?, ?, ?)
+"""
+
+BUMP_VERSION_SQL = """
+    INSERT INTO entity_versions (entity_key, version) VALUES (?, ?)
+    ON CONFLICT (entity_key) DO UPDATE SET version = excluded.version
+"""
+
+CHANGED_KEYS_QUERY = """
+    SELECT entity_key, version FROM entity_versions WHERE version > ?
+"""
+
+_MISSING = object()
+
+
+def _user_from_row(row) -> dict:
+    return {
+        "name": row[1],
+        "email": row[2],
+        "phone": row[3],
+        "member_since": row[4],
+        "cargos": {},
+    }
+
+
+def _cargo_from_row(row) -> dict:
+    return {
+        "status": row[6],
+        "location": row[7],
+        "last_update": row[8],
+        "estimated_delivery": row[9],
+        "description": row[10],
+        "weight": row[11],
+        "dimensions": row[12],
+        "carrier": row[13],
+        "insurance": row[14],
+        "return_reason": row[15],
+        "tracking_history": [],
+    }
+
+
+def attach_tracking_history(rows: Iterable, cargo_index: Dict[str, dict]) -> None:
+    """Takip numarasına göre sıralı hareket satırlarını tek geçişte kargolara ekler.
+
+    *rows* ``(tracking_number, date, status, location)`` demetleri üretmelidir;
+    imleç doğrudan verilebilir, satırlar belleğe toplu alınmaz.
+    """
+
+    for tracking_num, group in groupby(rows, key=itemgetter(0)):
+        cargo = cargo_index.get(tracking_num)
+        if cargo is None:  # Sahipsiz hareket kaydı
+            continue
+        cargo["tracking_history"] = [
+            {"date": h_row[1], "status": h_row[2], "location": h_row[3]}
+            for h_row in group
+        ]
+
+
+def load_all_users(conn: sqlite3.Connection) -> Dict[str, dict]:
+    """Tüm kullanıcıları, kargolarını ve hareket geçmişlerini iki sorguyla yükler"""
+
+    data: Dict[str, dict] = {}
+    cargo_index: Dict[str, dict] = {}
+
+    cursor = conn.execute(USER_CARGO_QUERY)
+    for row in cursor:
+        user_id = row[0]
+        user = data.get(user_id)
+        if user is None:
+            user = data[user_id] = _user_from_row(row)
+
+        if row[5]:  # tracking_number varsa
+            cargo = _cargo_from_row(row)
+            user["cargos"][row[5]] = cargo
+            cargo_index[row[5]] = cargo
+
+    if cargo_index:
+        attach_tracking_history(conn.execute(HISTORY_QUERY), cargo_index)
+
+    return data
+
+
+def load_user(conn: sqlite3.Connection, user_id: str) -> dict | None:
+    """Tek kullanıcıyı kargoları ve hareket geçmişiyle indeksli sorgularla yükler"""
+
+    user = None
+    cargo_index: Dict[str, dict] = {}
+    for row in conn.execute(SINGLE_USER_QUERY, (user_id,)):
+        if user is None:
+            user = _user_from_row(row)
+        if row[5]:
+            cargo = _cargo_from_row(row)
+            user["cargos"][row[5]] = cargo
+            cargo_index[row[5]] = cargo
+
+    if cargo_index:
+        attach_tracking_history(
+            conn.execute(USER_HISTORY_QUERY, (user_id,)), cargo_index
+        )
+    return user
+
+
+def load_cargo(conn: sqlite3.Connection, tracking_number: str) -> dict | None:
+    """Tek kargoyu hareket geçmişiyle birlikte yükler"""
+
+    row = conn.execute(SINGLE_CARGO_QUERY, (tracking_number,)).fetchone()
+    if row is None:
+        return None
+    cargo = _cargo_from_row(row)
+    attach_tracking_history(
+        conn.execute(CARGO_HISTORY_QUERY, (tracking_number,)),
+        {tracking_number: cargo},
+    )
+    return cargo
+
+
+@dataclass
+class ChangeSet:
+    """Bir işlemin veritabanına yazılacak farkları.
+
+    ``update_cargo`` değişen kolonları, ``add_history`` yeni hareketleri
+    kaydeder; ``apply_changes`` bunları tek işlemde yazar.
+    """
+
+    user_id: str | None = None
+    cargo_updates: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    history_events: List[tuple[str, dict]] = field(default_factory=list)
+
+    def update_cargo(self, tracking_number: str, **fields: Any) -> None:
+        unknown = set(fields) - set(CARGO_FIELDS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen kargo alanları: {sorted(unknown)}")
+        self.cargo_updates.setdefault(tracking_number, {}).update(fields)
+
+    def add_history(self, tracking_number: str, event: dict) -> None:
+        self.history_events.append((tracking_number, event))
+
+    @property
+    def tracking_numbers(self) -> Set[str]:
+        return set(self.cargo_updates) | {tn for tn, _event in self.history_events}
+
+    def __bool__(self) -> bool:
+        return bool(self.cargo_updates or self.history_events)
+
+
+def user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def cargo_key(tracking_number: str) -> str:
+    return f"cargo:{tracking_number}"
+
+
+def ensure_version_table(conn: sqlite3.Connection) -> None:
+    """Sürüm sayacı tablosunu (eski veritabanlarında yoksa) oluşturur"""
+    conn.execute(VERSION_TABLE_SQL)
+    conn.execute(VERSION_INDEX_SQL)
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute(
+        "SELECT COALESCE(MAX(version), 0) FROM entity_versions"
+    ).fetchone()[0]
+
+
+def bump_versions(conn: sqlite3.Connection, keys: Iterable[str]) -> int:
+    """*keys* için yeni ortak sürüm numarası yazar; açık işlem içinde çağrılmalı"""
+    version = current_version(conn) + 1
+    conn.executemany(BUMP_VERSION_SQL, ((key, version) for key in keys))
+    return version
+
+
+def apply_changes(conn: sqlite3.Connection, changes: ChangeSet) -> Set[str]:
+    """*changes* içeriğini tek işlemde yazar ve etkilenen kullanıcıları döndürür.
+
+    Kullanıcı ve kargo sürümleri aynı işlemde artırılır; hata olursa hepsi
+    geri alınır.
+    """
+
+    ensure_version_table(conn)
+    tracking_numbers = changes.tracking_numbers
+    with conn:
+        # Yazma kilidi baştan alınır; okuma işleminin yazmaya yükseltilmesi
+        # WAL modunda meşgul beklemesine rağmen SQLITE_BUSY ile sonuçlanabilir
+        conn.execute("BEGIN IMMEDIATE")
+        for tracking_num, fields in changes.cargo_updates.items():
+            # Kolon adları CARGO_FIELDS ile doğrulandı
+            assignments = ", ".join(f"{name}=?" for name in fields)
+            conn.execute(
+                f"UPDATE cargos SET {assignments} WHERE tracking_number=?",
+                (*fields.values(), tracking_num),
+            )
+        conn.executemany(
+            INSERT_HISTORY_SQL,
+            [
+                (tracking_num, event["date"], event["status"], event.get("location"))
+                for tracking_num, event in changes.history_events
+            ],
+        )
+
+        if changes.user_id is not None:
+            user_ids = {changes.user_id}
+        else:
+            placeholders = ", ".join("?" * len(tracking_numbers))
+            user_ids = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT user_id FROM cargos"
+                    f" WHERE tracking_number IN ({placeholders})",
+                    tuple(tracking_numbers),
+                )
+            }
+        bump_versions(
+            conn,
+            [user_key(uid) for uid in user_ids]
+            + [cargo_key(tn) for tn in tracking_numbers],
+        )
+    return user_ids
+
+
+class TTLCache:
+    """LRU tahliyeli ve kayıt başına yaşam süresi olan iş parçacığı güvenli önbellek"""
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 60.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize en az 1 olmalı")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class CargoRepository:
+    """Kullanıcı ve kargo kayıtlarına tek tek, önbellekli erişim sağlar.
+
+    Bellek kullanımı tablo boyutundan bağımsızdır: en fazla *max_users*
+    kullanıcı ve *max_cargos* kargo tutulur, kayıtlar *ttl_seconds* sonra
+    yeniden okunur. Dönen sözlükler kopyadır; çağıran taraf güvenle
+    değiştirebilir.
+
+    Her okumadan önce ``refresh`` çağrılır: başka bağlantıların yazmaları
+    ``PRAGMA data_version`` ile algılanır ve yalnızca sürümü artan kayıtlar
+    önbellekten düşürülür.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        max_users: int = 256,
+        max_cargos: int = 1024,
+        ttl_seconds: float = 60.0,
+        connections: ConnectionManager | None = None,
+    ) -> None:
+        self.db_path = db_path
+        self.connections = connections or get_manager(db_path)
+        self._users = TTLCache(max_users, ttl_seconds)
+        self._cargos = TTLCache(max_cargos, ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._watch_conn: sqlite3.Connection | None = None
+        self._watch_lock = threading.Lock()
+        self._data_version: int | None = None
+        self._seen_version = 0
+
+    def _watch(self) -> sqlite3.Connection:
+        # data_version bağlantıya özeldir; aynı bağlantı açık tutulmalı
+        if self._watch_conn is None:
+            conn = self.connections.connect(check_same_thread=False)
+            ensure_version_table(conn)
+            self._seen_version = current_version(conn)
+            self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            self._watch_conn = conn
+        return self._watch_conn
+
+    def refresh(self) -> None:
+        """Başka bağlantıların yazdığı kayıtları önbellekten düşürür"""
+        with self._watch_lock:
+            conn = self._watch()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+            rows = conn.execute(CHANGED_KEYS_QUERY, (self._seen_version,)).fetchall()
+            if rows:
+                self._seen_version = max(version for _key, version in rows)
+        if rows:
+            self._invalidate_keys([key for key, _version in rows])
+
+    def _invalidate_keys(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            kind, _, value = key.partition(":")
+            if kind == "user":
+                self.invalidate_user(value)
+            elif kind == "cargo":
+                self.invalidate_cargo(value)
+
+    def _cached(self, cache: TTLCache, key: str, loader) -> dict | None:
+        self.refresh()
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            value = loader(self.connections.connection(), key)
+            if value is None:  # Bulunamayan kayıtlar önbelleğe alınmaz
+                return None
+            cache.set(key, value)
+        else:
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def get_user(self, user_id: str) -> dict | None:
+        """Kullanıcıyı kargolarıyla döndürür, yoksa None"""
+        if not user_id:
+            return None
+        return self._cached(self._users, user_id, load_user)
+
+    def get_cargo(self, tracking_number: str) -> dict | None:
+        """Kargoyu hareket geçmişiyle döndürür, yoksa None"""
+        if not tracking_number:
+            return None
+        return self._cached(self._cargos, tracking_number, load_cargo)
+
+    def save_changes(self, changes: ChangeSet) -> None:
+        """Değişiklikleri yazar ve etkilenen önbellek kayıtlarını düşürür"""
+        if not changes:
+            return
+        user_ids = self.connections.run_with_retry(
+            lambda: apply_changes(self.connections.connection(), changes)
+        )
+
+        # Kendi yazmalarımız beklemeden düşürülür; diğer işçiler refresh ile görür
+        for user_id in user_ids:
+            self.invalidate_user(user_id)
+        for tracking_num in changes.tracking_numbers:
+            self.invalidate_cargo(tracking_num)
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.invalidations += 1
+        self._users.pop(user_id)
+
+    def invalidate_cargo(self, tracking_number: str) -> None:
+        self.invalidations += 1
+        self._cargos.pop(tracking_number)
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._cargos.clear()
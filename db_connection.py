@@ -0,0 +1,179 @@
+"""Paylaşılan SQLite bağlantı yöneticisi.
+
+``cargo_chat`` ve ``db_viewer`` her fonksiyon çağrısında yeni bağlantı açmak
+yerine iş parçacığı başına tek bir bağlantıyı yeniden kullanır; iş parçacığı
+sona erdiğinde bağlantısı da kapatılır (Streamlit her yeniden çalıştırmayı
+yeni bir iş parçacığında yürütür). Bağlantılar
+WAL günlük modunda açılır; böylece okuyucular iade/iptal onayı yazılırken
+beklemez. Sorgu metinleri modül sabitlerinde tutulduğundan ``sqlite3``'ün
+hazırlanmış ifade önbelleği (``cached_statements``) aynı ifadeleri yeniden
+derlemeden kullanır.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Kilitli veritabanında beklenecek süre (ms); aşılırsa işlem yeniden denenir
+BUSY_TIMEOUT_MS = 5000
+BUSY_RETRIES = 3
+BUSY_BACKOFF_SECONDS = 0.05
+
+# Bağlantı başına hazırlanmış ifade önbelleği
+STATEMENT_CACHE_SIZE = 256
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    # WAL ile NORMAL: commit başına fsync yok, çökme sonrası tutarlılık korunur
+    "synchronous": "NORMAL",
+    # Negatif değer KiB cinsindendir (~32 MB sayfa önbelleği)
+    "cache_size": -32000,
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def configure_connection(
+    conn: sqlite3.Connection,
+    *,
+    pragmas: Dict[str, object] | None = None,
+    busy_timeout_ms: int = BUSY_TIMEOUT_MS,
+) -> sqlite3.Connection:
+    """Bağlantıya meşgul bekleme süresi ve performans pragmalarını uygular"""
+
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    for name, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def is_busy_error(exc: BaseException) -> bool:
+    message = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and (
+        "locked" in message or "busy" in message
+    )
+
+
+class _ThreadConnection:
+    """İş parçacığının yerel deposunda tutulur; iş parçacığı bitince toplanır"""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+
+class ConnectionManager:
+    """İş parçacığı başına yapılandırılmış, yeniden kullanılan SQLite bağlantıları"""
+
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        busy_timeout_ms: int = BUSY_TIMEOUT_MS,
+        retries: int = BUSY_RETRIES,
+        pragmas: Dict[str, object] | None = None,
+    ) -> None:
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.retries = retries
+        self.pragmas = pragmas
+        self._local = threading.local()
+        # Sonlandırıcı, kilidi tutan iş parçacığında GC sırasında da çalışabilir
+        self._lock = threading.RLock()
+        self._connections: set[sqlite3.Connection] = set()
+
+    def connect(self, *, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Havuz dışı, yapılandırılmış yeni bir bağlantı açar"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=check_same_thread,
+        )
+        return configure_connection(
+            conn, pragmas=self.pragmas, busy_timeout_ms=self.busy_timeout_ms
+        )
+
+    def connection(self) -> sqlite3.Connection:
+        """Çağıran iş parçacığının bağlantısını döndürür; kapatılmamalıdır"""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            # Yalnızca sahibi iş parçacığı kullanır; close_all ve sonlandırıcı
+            # başka iş parçacığından kapatabilsin diye kontrol kapalı
+            conn = self.connect(check_same_thread=False)
+            holder = _ThreadConnection(conn)
+            with self._lock:
+                self._connections.add(conn)
+            # İş parçacığı bitince yerel deposu silinir ve bağlantı kapatılır
+            weakref.finalize(holder, self._release, conn)
+            self._local.holder = holder
+        return holder.conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if conn not in self._connections:
+                return
+            self._connections.discard(conn)
+        conn.close()
+
+    @property
+    def open_connections(self) -> int:
+        with self._lock:
+            return len(self._connections)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yazma kilidini baştan alan (BEGIN IMMEDIATE) kısa bir işlem açar"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def run_with_retry(self, operation: Callable[[], T]) -> T:
+        """*operation*'ı kilit hatalarında artan beklemeyle yeniden dener"""
+        attempt = 0
+        while True:
+            try:
+                return operation()
+            except sqlite3.OperationalError as exc:
+                if not is_busy_error(exc) or attempt >= self.retries:
+                    raise
+                delay = BUSY_BACKOFF_SECONDS * (2**attempt)
+                attempt += 1
+                logger.warning("Veritabanı meşgul, %.2fs sonra tekrar: %s", delay, exc)
+                time.sleep(delay)
+
+    def close_all(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_path: str) -> ConnectionManager:
+    """*db_path* için işlem genelinde paylaşılan yöneticiyi döndürür"""
+    with _managers_lock:
+        manager = _managers.get(db_path)
+        if manager is None:
+            manager = _managers[db_path] = ConnectionManager(db_path)
+        return manager
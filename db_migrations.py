@@ -0,0 +1,212 @@
+"""CargoHub veritabanı şema sürümleri ve yerinde yükseltme.
+
+Her göç (migration) sıralı bir sürüm numarası ve DDL ifadelerinden oluşur.
+Uygulanan son sürüm ``PRAGMA user_version`` içinde tutulur; ``migrate``
+yalnızca bekleyen göçleri, her birini kendi işleminde uygular. İfadeler
+``IF NOT EXISTS`` ile yazıldığından sürüm bilgisi olmayan eski
+``cargo_database.db`` dosyaları da yerinde yükseltilebilir::
+
+    python db_migrations.py --db cargo_database.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sqlite3
+from typing import List, NamedTuple, Sequence
+
+logger = logging.getLogger(__name__)
+
+USERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT,
+        phone TEXT,
+        member_since DATE
+    )
+"""
+
+CARGOS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS cargos (
+        tracking_number TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        location TEXT,
+        last_update DATETIME,
+        estimated_delivery DATE,
+        description TEXT,
+        weight TEXT,
+        dimensions TEXT,
+        carrier TEXT,
+        insurance TEXT,
+        return_reason TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+"""
+
+TRACKING_HISTORY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS tracking_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tracking_number TEXT NOT NULL,
+        date DATETIME NOT NULL,
+        status TEXT NOT NULL,
+        location TEXT,
+        FOREIGN KEY (tracking_number) REFERENCES cargos (tracking_number)
+    )
+"""
+
+# Önbellek geçersiz kılma için kayıt bazlı sürüm sayacı
+VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS entity_versions (
+        entity_key TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+"""
+
+VERSION_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_entity_versions_version
+    ON entity_versions (version)
+"""
+
+# Ad -> DDL; toplu içe aktarma bu indeksleri yükleme sonrasına erteler
+QUERY_INDEXES = {
+    # Kullanıcının kargoları (giriş, kullanıcı sayfası, kargo sayısı):
+    # user_id ile arama + tracking_number sırası, COUNT için kapsayıcı
+    "idx_cargos_user_tracking": """
+        CREATE INDEX IF NOT EXISTS idx_cargos_user_tracking
+        ON cargos (user_id, tracking_number)
+    """,
+    # Durum filtresi ve durum dağılımı (GROUP BY status) için kapsayıcı
+    "idx_cargos_status_last_update": """
+        CREATE INDEX IF NOT EXISTS idx_cargos_status_last_update
+        ON cargos (status, last_update)
+    """,
+    # Kargo listesi ORDER BY last_update DESC LIMIT
+    "idx_cargos_last_update": """
+        CREATE INDEX IF NOT EXISTS idx_cargos_last_update
+        ON cargos (last_update)
+    """,
+    # Kargo firması dağılımı için kapsayıcı
+    "idx_cargos_carrier": """
+        CREATE INDEX IF NOT EXISTS idx_cargos_carrier
+        ON cargos (carrier)
+    """,
+    # Kargo başına hareket geçmişi; rowid (id) indekste son kolondur, böylece
+    # ORDER BY tracking_number, date, id ek sıralama gerektirmez
+    "idx_tracking_history_tracking_date": """
+        CREATE INDEX IF NOT EXISTS idx_tracking_history_tracking_date
+        ON tracking_history (tracking_number, date)
+    """,
+    # Son hareketler ORDER BY date DESC LIMIT
+    "idx_tracking_history_date": """
+        CREATE INDEX IF NOT EXISTS idx_tracking_history_date
+        ON tracking_history (date)
+    """,
+}
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: Sequence[str]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Temel şema: users, cargos, tracking_history",
+        (USERS_TABLE_SQL, CARGOS_TABLE_SQL, TRACKING_HISTORY_TABLE_SQL),
+    ),
+    Migration(
+        2,
+        "Önbellek geçersiz kılma için entity_versions",
+        (VERSION_TABLE_SQL, VERSION_INDEX_SQL),
+    ),
+    Migration(
+        3, "Sık kullanılan sorgular için indeksler", tuple(QUERY_INDEXES.values())
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int | None = None) -> int:
+    """Bekleyen göçleri sırayla uygular ve ulaşılan sürümü döndürür"""
+
+    target = LATEST_VERSION if target is None else target
+    current = get_schema_version(conn)
+    if current > LATEST_VERSION:
+        raise RuntimeError(
+            f"Veritabanı şeması ({current}) bu koddan ({LATEST_VERSION}) daha yeni"
+        )
+
+    for migration in MIGRATIONS:
+        if migration.version <= current or migration.version > target:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in migration.statements:
+                conn.execute(statement)
+            # PRAGMA parametre almaz; sürüm tamsayıdır
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(
+            "Şema sürümü %s uygulandı: %s", migration.version, migration.description
+        )
+        current = migration.version
+
+    return current
+
+
+def drop_query_indexes(conn: sqlite3.Connection) -> None:
+    """Sorgu indekslerini kaldırır (toplu yükleme öncesi)"""
+    for name in QUERY_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def create_query_indexes(conn: sqlite3.Connection) -> None:
+    """Sorgu indekslerini (yoksa) tek geçişte yeniden oluşturur"""
+    for statement in QUERY_INDEXES.values():
+        conn.execute(statement)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="CargoHub veritabanı şemasını yerinde yükseltir"
+    )
+    parser.add_argument(
+        "--db",
+        default="cargo_database.db",
+        help="Yükseltilecek SQLite veritabanı dosyası",
+    )
+    parser.add_argument(
+        "--target",
+        type=int,
+        default=None,
+        help="Hedef şema sürümü (varsayılan: en son)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    conn = sqlite3.connect(args.db)
+    try:
+        before = get_schema_version(conn)
+        after = migrate(conn, args.target)
+    finally:
+        conn.close()
+    print(f"✅ Şema sürümü: {before} → {after}")
+
+
+if __name__ == "__main__":
+    main()
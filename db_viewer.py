@@ -1,9 +1,11 @@
 import json
-import sqlite3
 
 import pandas as pd
 import streamlit as st
 
+from db_connection import get_manager
+from db_migrations import migrate
+
 # Sayfa konfigürasyonu
 st.set_page_config(
     page_title="📊 CargoHub Database Viewer",
@@ -51,8 +53,17 @@ DB_PATH = "cargo_database.db"
 
 
 def get_db_connection():
-    """SQLite veritabanı bağlantısı oluşturur"""
-    return sqlite3.connect(DB_PATH)
+    """İş parçacığına ait, WAL modunda paylaşılan SQLite bağlantısını döndürür
+
+    Bağlantı havuzdan gelir ve uygulama boyunca yeniden kullanılır; kapatılmaz.
+    """
+    return get_manager(DB_PATH).connection()
+
+
+@st.cache_resource
+def ensure_database_schema():
+    """Eksik tablo ve indeksleri oluşturarak şemayı en son sürüme yükseltir"""
+    return get_manager(DB_PATH).run_with_retry(lambda: migrate(get_db_connection()))
 
 
 def get_table_info():
@@ -85,7 +96,6 @@ def get_table_info():
     )
     stats["carrier_distribution"] = dict(cursor.fetchall())
 
-    conn.close()
     return stats
 
 
@@ -107,16 +117,14 @@ def get_users_data(search_term=None, limit=50):
     else:
         params = ()
 
-    query += (
-        " GROUP BY u.id, u.name, u.email, u.phone, u.member_since ORDER BY u.id LIMIT ?"
-    )
+    # u.id birincil anahtar: gruplama ve sıralama indeks sırasıyla yapılır
+    query += " GROUP BY u.id ORDER BY u.id LIMIT ?"
     params = params + (limit,)
 
     cursor.execute(query, params)
     columns = [desc[0] for desc in cursor.description]
     data = cursor.fetchall()
 
-    conn.close()
     return columns, data
 
 
@@ -154,7 +162,6 @@ def get_cargos_data(user_filter=None, status_filter=None, limit=100):
     columns = [desc[0] for desc in cursor.description]
     data = cursor.fetchall()
 
-    conn.close()
     return columns, data
 
 
@@ -182,7 +189,34 @@ def get_tracking_history(tracking_number=None, limit=200):
     columns = [desc[0] for desc in cursor.description]
     data = cursor.fetchall()
 
-    conn.close()
+    return columns, data
+
+
+def get_user_cargo_list(user_id):
+    """Kullanıcının kargolarını takip numarası sırasıyla döndürür"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+        SELECT tracking_number, status, description, last_update
+        FROM cargos WHERE user_id = ?
+        ORDER BY tracking_number
+    """,
+        (user_id,),
+    )
+    return cursor.fetchall()
+
+
+def get_table_preview(table_name, limit=20):
+    """Tablonun ilk *limit* satırını kolon adlarıyla döndürür"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(f"SELECT * FROM {table_name} LIMIT ?", (limit,))
+    columns = [desc[0] for desc in cursor.description]
+    data = cursor.fetchall()
+
     return columns, data
 
 
@@ -195,8 +229,6 @@ def export_data(table_name, format_type="json"):
     columns = [desc[0] for desc in cursor.description]
     data = cursor.fetchall()
 
-    conn.close()
-
     if format_type == "json":
         result = []
         for row in data:
@@ -209,6 +241,9 @@ def export_data(table_name, format_type="json"):
 
 # Ana uygulama
 def main():
+    # Eksik indeksleri oluştur (eski veritabanları yerinde yükseltilir)
+    ensure_database_schema()
+
     # Başlık
     st.markdown(
         """
@@ -319,11 +354,7 @@ def main():
 
         # Users tablosu
         st.markdown("### 👥 Users Tablosu")
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users LIMIT 20")
-        user_columns = [desc[0] for desc in cursor.description]
-        user_data = cursor.fetchall()
+        user_columns, user_data = get_table_preview("users")
         if user_data:
             user_df = pd.DataFrame(user_data, columns=user_columns)
             st.table(user_df)
@@ -332,9 +363,7 @@ def main():
 
         # Cargos tablosu
         st.markdown("### 📦 Cargos Tablosu")
-        cursor.execute("SELECT * FROM cargos LIMIT 20")
-        cargo_columns = [desc[0] for desc in cursor.description]
-        cargo_data = cursor.fetchall()
+        cargo_columns, cargo_data = get_table_preview("cargos")
         if cargo_data:
             cargo_df = pd.DataFrame(cargo_data, columns=cargo_columns)
             st.table(cargo_df)
@@ -343,17 +372,13 @@ def main():
 
         # Tracking History tablosu
         st.markdown("### 📋 Tracking History Tablosu")
-        cursor.execute("SELECT * FROM tracking_history LIMIT 20")
-        history_columns = [desc[0] for desc in cursor.description]
-        history_data = cursor.fetchall()
+        history_columns, history_data = get_table_preview("tracking_history")
         if history_data:
             history_df = pd.DataFrame(history_data, columns=history_columns)
             st.table(history_df)
         else:
             st.info("Tracking History tablosunda veri bulunamadı")
 
-        conn.close()
-
     elif page == "Kullanıcılar":
         st.markdown("## 👥 Kullanıcılar")
 
@@ -381,17 +406,7 @@ def main():
                 st.markdown(f"**Seçilen Kullanıcı:** {user_id}")
 
                 # Kullanıcının kargolarını göster
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT tracking_number, status, description, last_update
-                    FROM cargos WHERE user_id = ?
-                """,
-                    (user_id,),
-                )
-                user_cargos = cursor.fetchall()
-                conn.close()
+                user_cargos = get_user_cargo_list(user_id)
 
                 if user_cargos:
                     cargo_df = pd.DataFrame(
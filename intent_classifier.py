@@ -0,0 +1,229 @@
+"""Sohbet mesajları için tek geçişli niyet sınıflandırıcı.
+
+Tüm anahtar kelime listeleri (iade, iptal, politika, politika dışı) tek bir
+önceden derlenmiş düzenli ifadede birleştirilir. İfade, ortak önekleri
+paylaşan bir trie olarak kurulur ve her konumda başlayan en uzun anahtar
+kelimeyi yakalar. Bir anahtar kelime bulunduğunda, içinde alt dize olarak
+geçen diğer kelimeler de bulunmuş sayılır ("iptal et" → "iptal"); eşleşmeyle
+örtüşerek başlayan kelimeler önceden hesaplanan aday listesinden denetlenir.
+Böylece sonuç, her kelime için ayrı ``keyword in text`` taramasıyla birebir
+aynıdır.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, FrozenSet, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+TRACKING_NUMBER_RE = re.compile(r"\b(TR\d{9})\b")
+
+# Sabit "TR" önekiyle başlayan ifade hızlı ön ek aramasıyla taranır; baştaki
+# kelime sınırı (\b) eşleşmeden sonra denetlenir
+_TRACKING_CANDIDATE_RE = re.compile(r"TR\d{9}\b")
+
+POLICY_KEYWORDS = [
+    "teslimat",
+    "iade",
+    "garanti",
+    "iptal",
+    "kusurlu",
+    "yoğun",
+    "kredi kartı",
+    "fiyat",
+]
+
+POLICY_NEGATIVE_KEYWORDS = [
+    "fiyat",
+    "kredi kart",
+    "piyasaya",
+    "lansman",
+    "ödeme kart",
+]
+
+# İade anahtar kelimeleri
+RETURN_KEYWORDS = [
+    "iade",
+    "döndür",
+    "gönder geri",
+    "geri gönder",
+    "iptal et",
+    "vazgeç",
+]
+
+# İptal anahtar kelimeleri (henüz yola çıkmamış kargolar için)
+CANCEL_KEYWORDS = ["iptal", "iptal et", "vazgeç", "dur", "durdur"]
+
+
+def find_tracking_numbers(text: str) -> Tuple[str, ...]:
+    """Metindeki tüm takip numaralarını ``TRACKING_NUMBER_RE`` sırasıyla döndürür"""
+    numbers = []
+    for match in _TRACKING_CANDIDATE_RE.finditer(text):
+        start = match.start()
+        if start:
+            previous = text[start - 1]
+            if previous.isalnum() or previous == "_":
+                continue
+        numbers.append(match.group())
+    return tuple(numbers)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Kelimelerden, en uzun eşleşmeyi tercih eden trie biçimli ifade kurar"""
+
+    root: Dict[str, dict] = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [
+            re.escape(char) + emit(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Kelime burada bitebiliyorsa devamı isteğe bağlıdır (açgözlü: en uzun)
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(root)
+
+
+class KeywordScanner:
+    """Metinde hangi anahtar kelime gruplarının geçtiğini tek taramada bulur
+
+    Her anahtar kelime, içinde geçtiği tüm grupların bitlerini taşır;
+    ``scan`` bulunan grupların bit maskesini döndürür.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]) -> None:
+        self.bits = {name: 1 << index for index, name in enumerate(groups)}
+        owners: Dict[str, int] = {}
+        for name, keywords in groups.items():
+            for keyword in keywords:
+                if not keyword:
+                    raise ValueError("Anahtar kelimeler boş olamaz")
+                owners[keyword] = owners.get(keyword, 0) | self.bits[name]
+        if not owners:
+            raise ValueError("En az bir anahtar kelime gerekli")
+
+        words = sorted(owners)
+        self.pattern = re.compile(_trie_pattern(words), re.DOTALL)
+        # Bulunan kelimenin içindeki diğer kelimeler de bulunmuş sayılır
+        self._masks: Dict[str, int] = {}
+        for word in words:
+            mask = 0
+            for other in words:
+                if other in word:
+                    mask |= owners[other]
+            self._masks[word] = mask
+        # Eşleşmeler örtüşmeden ilerler. Bir kelime ancak bulunan bir kelimenin
+        # son ekiyle başlıyorsa (ör. "iptal e|t|eslim") atlanabilir; yeni bit
+        # getiren bu adaylar ayrıca ``in`` ile denetlenir.
+        self._overlaps: Dict[str, Tuple[str, ...]] = {
+            word: tuple(
+                other
+                for other in words
+                if self._masks[other] & ~self._masks[word]
+                and any(
+                    len(other) > len(word) - offset and other.startswith(word[offset:])
+                    for offset in range(1, len(word))
+                )
+            )
+            for word in words
+        }
+
+    def scan(self, text: str) -> int:
+        mask = 0
+        masks = self._masks
+        found = self.pattern.findall(text)
+        for word in found:
+            mask |= masks[word]
+        for word in found:
+            for other in self._overlaps[word]:
+                if masks[other] & ~mask and other in text:
+                    mask |= masks[other]
+        return mask
+
+    def groups(self, mask: int) -> FrozenSet[str]:
+        return frozenset(name for name, bit in self.bits.items() if mask & bit)
+
+
+class MessageIntent(NamedTuple):
+    """Bir mesajın sınıflandırma sonucu"""
+
+    action: Optional[str]
+    tracking_numbers: Tuple[str, ...]
+    is_policy: bool
+    is_policy_negative: bool
+
+    @property
+    def tracking_number(self) -> Optional[str]:
+        return self.tracking_numbers[0] if self.tracking_numbers else None
+
+
+class IntentClassifier:
+    """İade/iptal niyeti, takip numaraları ve politika bayraklarını çıkarır
+
+    Karar kuralları:
+
+    - Takip numarası yoksa işlem niyeti yoktur.
+    - İade kelimesi varsa ve iptal kelimeleri (``return_blockers``) yoksa
+      ya da teslim bağlamı (``return_context``) varsa: ``"return"``.
+    - Aksi halde iptal kelimesi varsa ve iade kelimeleri
+      (``cancel_blockers``) yoksa: ``"cancel"``.
+    """
+
+    def __init__(
+        self,
+        *,
+        return_keywords: Iterable[str] = RETURN_KEYWORDS,
+        cancel_keywords: Iterable[str] = CANCEL_KEYWORDS,
+        policy_keywords: Iterable[str] = POLICY_KEYWORDS,
+        policy_negative_keywords: Iterable[str] = POLICY_NEGATIVE_KEYWORDS,
+        return_blockers: Iterable[str] = ("iptal et", "vazgeç"),
+        return_context: Iterable[str] = ("teslim", "aldım"),
+        cancel_blockers: Iterable[str] = ("iade", "döndür"),
+    ) -> None:
+        self.scanner = KeywordScanner(
+            {
+                "return": return_keywords,
+                "cancel": cancel_keywords,
+                "policy": policy_keywords,
+                "policy_negative": policy_negative_keywords,
+                "return_blocker": return_blockers,
+                "return_context": return_context,
+                "cancel_blocker": cancel_blockers,
+            }
+        )
+        bits = self.scanner.bits
+        self._return = bits["return"]
+        self._cancel = bits["cancel"]
+        self._policy = bits["policy"]
+        self._policy_negative = bits["policy_negative"]
+        self._return_blocker = bits["return_blocker"]
+        self._return_context = bits["return_context"]
+        self._cancel_blocker = bits["cancel_blocker"]
+
+    def classify(self, prompt: str) -> MessageIntent:
+        # Anahtar kelimeler küçük harfe çevrilmiş metinde, takip numaraları
+        # (büyük "TR" önekiyle) özgün metinde aranır
+        found = self.scanner.scan(prompt.lower())
+        tracking_numbers = find_tracking_numbers(prompt)
+
+        action = None
+        if tracking_numbers:
+            if found & self._return and (
+                not found & self._return_blocker or found & self._return_context
+            ):
+                action = "return"
+            elif found & self._cancel and not found & self._cancel_blocker:
+                action = "cancel"
+
+        return MessageIntent(
+            action,
+            tracking_numbers,
+            bool(found & self._policy),
+            bool(found & self._policy_negative),
+        )
@@ -0,0 +1,217 @@
+"""Eş zamanlı LLM çağrıları için mikro-toplama (micro-batching) zamanlayıcısı.
+
+Streamlit oturumları aynı pipeline'ı paylaşır; her istek ayrı çalıştırılınca
+CPU'nun toplu işlem kapasitesi boşa gider. ``BatchScheduler`` istekleri bir
+kuyruğa alır, kısa bir bekleme penceresi içinde ya da en fazla
+``max_batch_size`` isteğe ulaşana kadar toplar ve tek bir dolgulu (padded)
+pipeline çağrısıyla üretir. Sonuçlar her isteğin ``Future`` nesnesine
+yazılır; bekleyen oturum yalnızca kendi cevabını alır.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 20.0
+DEFAULT_MAX_QUEUE_SIZE = 64
+
+_STOP = object()
+
+
+class _Request(NamedTuple):
+    prompt: str
+    options: Tuple[Tuple[str, Any], ...]
+    future: Future
+
+
+class BatchScheduler:
+    """Pipeline önünde istekleri toplayıp tek ``generate`` çağrısında çalıştırır
+
+    Yalnızca aynı üretim parametrelerine sahip istekler aynı toplu çağrıya
+    girer. Kuyruk ``max_queue_size`` isteğe ulaşınca ``submit`` bekler;
+    *timeout* dolarsa ``queue.Full`` yükseltir.
+    """
+
+    def __init__(
+        self,
+        pipe,
+        *,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size en az 1 olmalı")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size en az 1 olmalı")
+        self.pipe = pipe
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue(max_queue_size)
+        # close() ile kapanır; iş parçacığı çıkarken kuyruğu boşaltıp drained yapar
+        self._state_lock = threading.Lock()
+        self._closed = False
+        self._drained = False
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+        # Çözücü (decoder-only) modellerde toplu üretim soldan dolgu gerektirir
+        tokenizer = getattr(pipe, "tokenizer", None)
+        if tokenizer is not None:
+            tokenizer.padding_side = "left"
+            if getattr(tokenizer, "pad_token", None) is None:
+                tokenizer.pad_token = tokenizer.eos_token
+
+        self._worker = threading.Thread(
+            target=self._run, name="llm-batch-scheduler", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, prompt: str, *, timeout: float | None = None, **options) -> Future:
+        """İsteği kuyruğa alır; cevap metni ``Future`` üzerinden gelir"""
+        with self._state_lock:
+            if self._closed or not self._worker.is_alive():
+                raise RuntimeError("Zamanlayıcı kapatıldı")
+        future: Future = Future()
+        request = _Request(prompt, tuple(sorted(options.items())), future)
+        self._queue.put(request, timeout=timeout)
+        with self._state_lock:
+            # Kuyruk boşaltıldıktan sonra eklenen istek hiç işlenmeyecek
+            if self._drained and not future.done():
+                future.set_exception(RuntimeError("Zamanlayıcı kapatıldı"))
+        return future
+
+    def generate(self, prompt: str, *, timeout: float | None = None, **options) -> str:
+        """İsteği gönderir ve cevabı bekler
+
+        *timeout* kuyruğa ekleme ve cevap beklemenin toplam süresidir; dolarsa
+        henüz üretime alınmamış istek iptal edilir ve
+        ``concurrent.futures.TimeoutError`` yükselir.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        future = self.submit(prompt, timeout=timeout, **options)
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def close(self, timeout: float | None = None) -> None:
+        """Kuyruktaki istekler bitirildikten sonra iş parçacığını durdurur
+
+        Kapanıştan sonra gelen istekler ``RuntimeError`` ile sonuçlanır.
+        """
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "average_batch": self.requests / self.batches if self.batches else 0.0,
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def _collect(self, first: _Request) -> Tuple[List[_Request], bool]:
+        """İlk istekten sonra pencere dolana ya da toplu iş büyüklüğüne kadar toplar"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        try:
+            self._serve()
+        finally:
+            self._drain()
+
+    def _drain(self) -> None:
+        """Durduktan sonra kuyrukta kalan isteklere hata yazar"""
+        with self._state_lock:
+            self._drained = True
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP and not item.future.done():
+                    item.future.set_exception(RuntimeError("Zamanlayıcı kapatıldı"))
+
+    def _serve(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stopping = self._collect(first)
+
+            groups: Dict[Tuple[Tuple[str, Any], ...], List[_Request]] = {}
+            for request in batch:
+                groups.setdefault(request.options, []).append(request)
+            for options, requests in groups.items():
+                # Hangi adımda olursa olsun hata yalnızca bu grubun isteklerine
+                # yazılır; iş parçacığı ayakta kalır, diğer istekler beklemez
+                try:
+                    self._execute(requests, dict(options))
+                except Exception as exc:
+                    logger.error(
+                        "Toplu üretim hatası (%d istek): %s", len(requests), exc
+                    )
+                    for request in requests:
+                        if not request.future.done():
+                            request.future.set_exception(exc)
+
+    def _execute(self, requests: List[_Request], options: Dict[str, Any]) -> None:
+        # İptal edilen (artık beklenmeyen) istekler üretime alınmaz
+        requests = [r for r in requests if r.future.set_running_or_notify_cancel()]
+        if not requests:
+            return
+        self.batches += 1
+        self.requests += len(requests)
+        self.largest_batch = max(self.largest_batch, len(requests))
+
+        prompts = [request.prompt for request in requests]
+        outputs = self.pipe(prompts, batch_size=len(prompts), **options)
+        if len(outputs) != len(requests):
+            raise RuntimeError(
+                f"Pipeline {len(requests)} istem için {len(outputs)} çıktı döndürdü"
+            )
+
+        # Önce tüm çıktılar çözülür; bozuk bir çıktı grubun tamamını düşürür
+        texts = []
+        for output in outputs:
+            # Liste girdide pipeline her istem için bir aday listesi döndürür
+            candidate = output[0] if isinstance(output, list) else output
+            text = candidate["generated_text"]
+            if not isinstance(text, str):
+                raise TypeError(f"Beklenmeyen üretim çıktısı: {type(text).__name__}")
+            texts.append(text.strip())
+        for request, text in zip(requests, texts):
+            request.future.set_result(text)
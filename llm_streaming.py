@@ -0,0 +1,105 @@
+"""Metin üretimi için akış (streaming) yardımcıları.
+
+``transformers`` pipeline'ı tüm tokenları üretmeden dönmez. Akış modunda
+üretim arka plan iş parçacığında çalışır ve ``TextIteratorStreamer``
+tokenları çözüldükçe kuyruğa bırakır; çağıran taraf bir üreteçten parça
+parça okur. Gecikme metriği olarak ilk tokena kadar geçen süre (TTFT)
+ölçülür.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Streamer kuyruğunda token beklenecek en uzun süre (sn)
+STREAM_TIMEOUT_SECONDS = 120.0
+
+
+def _streamer_class():
+    """``TextIteratorStreamer`` sınıfını ilk akışta import eder
+
+    Transformers opsiyoneldir; yoksa None döner ve tek parça çıktıya düşülür.
+    """
+    try:
+        from transformers import TextIteratorStreamer
+    except ImportError:  # pragma: no cover - ortam bağımlı
+        return None
+    return TextIteratorStreamer
+
+
+@dataclass
+class StreamMetrics:
+    """Tek akışın gecikme ölçümleri"""
+
+    ttft_seconds: Optional[float] = None
+    total_seconds: float = 0.0
+    chunks: int = 0
+
+
+def stream_pipeline(
+    pipe,
+    prompt: str,
+    *,
+    on_complete: Callable[[StreamMetrics], None] | None = None,
+    timeout: float = STREAM_TIMEOUT_SECONDS,
+    **generate_kwargs,
+) -> Iterator[str]:
+    """*pipe* üretimini arka plan iş parçacığında çalıştırıp metni parça parça verir
+
+    Pipeline'ın tokenizer'ı ya da ``TextIteratorStreamer`` yoksa üretim
+    aynı iş parçacığında yapılır ve cevap tek parça olarak verilir.
+    *on_complete* akış tükendiğinde ölçümlerle çağrılır.
+    """
+
+    metrics = StreamMetrics()
+    started = time.perf_counter()
+
+    def record(chunk: str) -> str:
+        if metrics.ttft_seconds is None:
+            metrics.ttft_seconds = time.perf_counter() - started
+        metrics.chunks += 1
+        return chunk
+
+    tokenizer = getattr(pipe, "tokenizer", None)
+    streamer_class = _streamer_class() if tokenizer is not None else None
+    if streamer_class is None:
+        output = pipe(prompt, **generate_kwargs)
+        yield record(output[0]["generated_text"].strip())
+    else:
+        streamer = streamer_class(
+            tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout
+        )
+        errors: list[BaseException] = []
+
+        def generate() -> None:
+            try:
+                pipe(prompt, streamer=streamer, **generate_kwargs)
+            except BaseException as exc:  # Hata tüketici iş parçacığına taşınır
+                errors.append(exc)
+                streamer.end()
+
+        worker = threading.Thread(target=generate, name="llm-stream", daemon=True)
+        worker.start()
+        # Tüketici erken bırakırsa iş parçacığı beklenmez; üretim kendiliğinden biter
+        for chunk in streamer:
+            if chunk:
+                yield record(chunk)
+        worker.join(timeout)
+        if errors:
+            raise errors[0]
+
+    metrics.total_seconds = time.perf_counter() - started
+    logger.info(
+        "LLM akışı: TTFT %.2fs, toplam %.2fs, %d parça",
+        metrics.ttft_seconds or 0.0,
+        metrics.total_seconds,
+        metrics.chunks,
+    )
+    if on_complete is not None:
+        on_complete(metrics)
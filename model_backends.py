@@ -0,0 +1,117 @@
+"""CPU çıkarımı için seçilebilir model arka uçları.
+
+``load_model`` varsayılan olarak tam hassasiyetli (fp32) pipeline kurar.
+Yalnızca CPU bulunan sunucularda aşağıdaki arka uçlar seçilebilir:
+
+- ``int8``: ``torch`` dinamik nicemleme; ``Linear`` ağırlıkları int8 tutulur,
+  aktivasyonlar çalışma anında nicemlenir.
+- ``bf16``: İşlemci bfloat16 destekliyorsa ağırlıklar bf16 yüklenir; destek
+  yoksa fp32'ye düşülür.
+- ``onnx``: ``optimum[onnxruntime]`` kuruluysa model ONNX'e aktarılır ve
+  ONNX Runtime ile çalıştırılır.
+
+Ağır bağımlılıklar (``torch``, ``transformers``, ``optimum``) yalnızca ilgili
+arka uç kurulurken içe aktarılır.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_ID = "google/gemma-2b-it"
+DEFAULT_BACKEND = "fp32"
+
+
+def bf16_supported() -> bool:
+    """İşlemcinin bfloat16 matris işlemlerini donanımda desteklediğini denetler"""
+    import torch
+
+    checks = ("_is_avx512_bf16_supported", "_is_amx_tile_supported")
+    for name in checks:
+        check = getattr(torch.cpu, name, None)
+        if check is not None and check():
+            return True
+    return False
+
+
+def _load_tokenizer(model_id: str):
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(model_id)
+
+
+def _text_generation(model, tokenizer):
+    from transformers import pipeline
+
+    return pipeline("text-generation", model=model, tokenizer=tokenizer)
+
+
+def _build_fp32(model_id: str):
+    from transformers import pipeline
+
+    return pipeline("text-generation", model=model_id)
+
+
+def _build_int8(model_id: str):
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32)
+    model.eval()
+    quantized = torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return _text_generation(quantized, _load_tokenizer(model_id))
+
+
+def _build_bf16(model_id: str):
+    if not bf16_supported():
+        logger.warning("İşlemci bfloat16 desteklemiyor, fp32 arka uca geçiliyor")
+        return _build_fp32(model_id)
+
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.bfloat16)
+    model.eval()
+    return _text_generation(model, _load_tokenizer(model_id))
+
+
+def _build_onnx(model_id: str):
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM
+    except ImportError as exc:
+        raise RuntimeError(
+            "ONNX arka ucu için 'optimum[onnxruntime]' paketi gereklidir."
+        ) from exc
+
+    model = ORTModelForCausalLM.from_pretrained(model_id, export=True)
+    return _text_generation(model, _load_tokenizer(model_id))
+
+
+BACKENDS: Dict[str, Callable[[str], object]] = {
+    "fp32": _build_fp32,
+    "int8": _build_int8,
+    "bf16": _build_bf16,
+    "onnx": _build_onnx,
+}
+
+
+def available_backends() -> Tuple[str, ...]:
+    return tuple(BACKENDS)
+
+
+def build_pipeline(backend: str = DEFAULT_BACKEND, model_id: str = MODEL_ID):
+    """Seçilen arka uçla ``text-generation`` pipeline'ı kurar"""
+    try:
+        builder = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Bilinmeyen model arka ucu: {backend!r} "
+            f"(seçenekler: {', '.join(BACKENDS)})"
+        ) from None
+    logger.info("Model yükleniyor: %s (%s arka ucu)", model_id, backend)
+    return builder(model_id)
@@ -0,0 +1,279 @@
+"""Token bütçeli prompt oluşturucu ve sabit sistem önekinin KV önbelleği.
+
+Prompt iki parçadan oluşur: tüm isteklerde birebir aynı olan sistem talimatı
+(önek) ve isteğe özel son ek (müşteri adı, kargo bilgisi, sohbet geçmişi,
+soru). ``PromptBuilder`` toplam uzunluğu tokenizer ile ölçüp bütçeye sığdırır:
+uzun mesajlar kısaltılır, sığmayan eski mesajlar atılır ve yalnızca içlerinde
+geçen takip numaraları tek satırlık özet olarak korunur.
+
+``PrefixCachedPipeline`` önekin ``past_key_values`` değerlerini bir kez
+hesaplar ve her istekte kopyasını ``generate``'e verir; böylece yalnızca son
+ek için ön doldurma (prefill) yapılır.
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import threading
+from typing import Mapping, NamedTuple, Sequence
+
+from intent_classifier import find_tracking_numbers
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = """Sen CargoHub kargo şirketi müşteri hizmetleri asistanısın.
+
+Görevlerin:
+- Kargo durumunu Türkçe olarak nazik, profesyonel ve yardımcı bir şekilde açıkla
+- Kullanıcıyı adıyla selamla ve kişisel bir tonda konuş
+- Detaylı bilgi ver ve gerekirse ek yardım öner
+- CargoHub'in kaliteli hizmet anlayışını vurgula
+- İade veya iptal talepleri için kullanıcıyı yönlendir
+- Kullanıcının sorularına doğrudan cevap ver (örneğin "ne zaman teslim edilecek?" sorusuna tahmini tarihi söyle)
+- Sohbeti doğal tut, kısa ve samimi yanıtlar ver
+- Önceki sohbet geçmişini dikkate al ve bağlamı sürdür
+- Kullanıcıyı memnun etmek için ekstra bilgi veya öneriler sun"""
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 1024
+DEFAULT_HISTORY_MESSAGES = 6
+DEFAULT_MESSAGE_TOKENS = 128
+
+_ELLIPSIS = " …"
+
+
+class BuiltPrompt(NamedTuple):
+    """Önek ve son ek ayrı tutulur; önek KV önbelleğinin anahtarıdır"""
+
+    prefix: str
+    suffix: str
+    history_text: str
+    tokens: int
+    dropped_messages: int
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+
+class PromptBuilder:
+    """Sohbet geçmişini token bütçesine sığdırarak prompt oluşturur
+
+    *tokenizer* verilmezse token sayısı kelime sayısıyla yaklaşık hesaplanır.
+    """
+
+    def __init__(
+        self,
+        tokenizer=None,
+        *,
+        system_prompt: str = SYSTEM_PROMPT,
+        max_tokens: int = DEFAULT_PROMPT_TOKEN_BUDGET,
+        max_history_messages: int = DEFAULT_HISTORY_MESSAGES,
+        max_message_tokens: int = DEFAULT_MESSAGE_TOKENS,
+    ) -> None:
+        self.tokenizer = tokenizer
+        self.prefix = system_prompt + "\n\n"
+        self.max_tokens = max_tokens
+        self.max_history_messages = max_history_messages
+        self.max_message_tokens = max_message_tokens
+        self.prefix_tokens = self.count_tokens(self.prefix)
+
+    def count_tokens(self, text: str) -> int:
+        if self.tokenizer is None:
+            return len(text.split())
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Metni ilk *max_tokens* tokena kısaltır ve sonuna üç nokta ekler"""
+        if self.tokenizer is None:
+            words = text.split()
+            if len(words) <= max_tokens:
+                return text
+            return " ".join(words[:max_tokens]) + _ELLIPSIS
+        ids = self.tokenizer.encode(text, add_special_tokens=False)
+        if len(ids) <= max_tokens:
+            return text
+        head = self.tokenizer.decode(ids[:max_tokens], skip_special_tokens=True)
+        return head.rstrip() + _ELLIPSIS
+
+    def _suffix(self, question: str, user_name: str, context: str, history: str):
+        history_block = f"\n{history}" if history else ""
+        return (
+            f"Müşteri adı: {user_name}\n{context}{history_block}\n\n"
+            f"Kullanıcı sorusu: {question}\n\nCevabın:"
+        )
+
+    def build(
+        self,
+        question: str,
+        *,
+        user_name: str,
+        context: str,
+        history: Sequence[Mapping[str, str]] = (),
+    ) -> BuiltPrompt:
+        """Önek + bağlam + bütçeye sığan en yeni sohbet mesajlarıyla prompt kurar"""
+        fixed = self.prefix_tokens + self.count_tokens(
+            self._suffix(question, user_name, context, "")
+        )
+        header = "Önceki sohbet:"
+        remaining = self.max_tokens - fixed - self.count_tokens(header)
+
+        window = list(history[-self.max_history_messages :])
+        lines: list[str] = []
+        kept = 0
+        for message in reversed(window):
+            role = "Kullanıcı" if message["role"] == "user" else "Asistan"
+            content = self.truncate(message["content"], self.max_message_tokens)
+            line = f"{role}: {content}"
+            cost = self.count_tokens(line)
+            if cost > remaining:
+                break
+            lines.append(line)
+            remaining -= cost
+            kept += 1
+        lines.reverse()
+
+        dropped = window[: len(window) - kept]
+        if dropped:
+            numbers = dict.fromkeys(
+                number
+                for message in dropped
+                for number in find_tracking_numbers(message["content"])
+            )
+            if numbers:
+                summary = (
+                    "(Daha önce konuşulan takip numaraları: " + ", ".join(numbers) + ")"
+                )
+                if self.count_tokens(summary) <= remaining:
+                    lines.insert(0, summary)
+
+        history_text = "\n".join([header, *lines]) if lines else ""
+        suffix = self._suffix(question, user_name, context, history_text)
+        return BuiltPrompt(
+            self.prefix,
+            suffix,
+            history_text,
+            self.prefix_tokens + self.count_tokens(suffix),
+            len(dropped),
+        )
+
+
+# Önbellekli üretimin bu modelde desteklenmediğini gösteren hatalar
+_UNSUPPORTED_ERRORS = (TypeError, ValueError, NotImplementedError)
+
+
+class _WatchedStreamer:
+    """Akış nesnesine bir şey gönderilip gönderilmediğini kaydeder"""
+
+    def __init__(self, streamer) -> None:
+        self.streamer = streamer
+        self.used = False
+
+    def put(self, value) -> None:
+        self.used = True
+        self.streamer.put(value)
+
+    def end(self) -> None:
+        self.used = True
+        self.streamer.end()
+
+
+class PrefixCachedPipeline:
+    """``text-generation`` pipeline'ı yerine geçer; sabit önekin KV değerlerini yeniden kullanır
+
+    *prefix* ile başlayan tekil istemlerde önek bir kez ileri geçişten
+    geçirilir, sonraki isteklerde ``past_key_values`` kopyası verilir.
+    Diğer istemler (toplu listeler, farklı önek) doğrudan pipeline'a gider.
+    Önek önbelleği kurulamazsa ya da ilk önbellekli üretim desteklenmiyor
+    hatası verirse (ör. ONNX modeli) sarmalayıcı kendini kapatır. Diğer
+    hatalarda yalnızca o istek pipeline'da yeniden denenir; akışa token
+    gönderilmişse tekrar olmaması için hata yükseltilir.
+    """
+
+    def __init__(self, pipe, prefix: str) -> None:
+        self.pipe = pipe
+        self.prefix = prefix
+        self.tokenizer = pipe.tokenizer
+        self.model = pipe.model
+        self.enabled = True
+        self.prefix_hits = 0
+        self._prefix_ids = None
+        self._past_key_values = None
+        self._lock = threading.Lock()
+
+    def _prefix_cache(self):
+        with self._lock:
+            if self._past_key_values is None:
+                import torch
+
+                ids = self.tokenizer(self.prefix, return_tensors="pt").input_ids
+                ids = ids.to(self.model.device)
+                with torch.no_grad():
+                    output = self.model(ids, use_cache=True)
+                self._prefix_ids = ids
+                self._past_key_values = output.past_key_values
+            return self._prefix_ids, self._past_key_values
+
+    def __call__(self, prompt, **kwargs):
+        if (
+            not self.enabled
+            or not isinstance(prompt, str)
+            or not prompt.startswith(self.prefix)
+        ):
+            return self.pipe(prompt, **kwargs)
+        try:
+            prefix_ids, past_key_values = self._prefix_cache()
+        except Exception as exc:
+            logger.warning("Önek KV önbelleği kapatıldı: %s", exc)
+            self.enabled = False
+            return self.pipe(prompt, **kwargs)
+
+        watched = None
+        cached_kwargs = kwargs
+        if kwargs.get("streamer") is not None:
+            watched = _WatchedStreamer(kwargs["streamer"])
+            cached_kwargs = {**kwargs, "streamer": watched}
+        try:
+            text = self._generate(prompt, prefix_ids, past_key_values, **cached_kwargs)
+        except Exception as exc:
+            # İleri geçiş çalışıp generate(past_key_values=...) desteklenmeyebilir
+            # (ör. ONNX/ORT ya da farklı önbellek sınıfı); bu ilk çağrıda anlaşılır
+            if self.prefix_hits == 0 and isinstance(exc, _UNSUPPORTED_ERRORS):
+                logger.warning("Önek KV önbelleği kapatıldı: %s", exc)
+                self.enabled = False
+            else:
+                logger.warning("Önbellekli üretim başarısız: %s", exc)
+            if watched is not None and watched.used:
+                raise  # Gönderilen tokenlar aynı akışta tekrarlanmasın
+            return self.pipe(prompt, **kwargs)
+        self.prefix_hits += 1
+        return [{"generated_text": text}]
+
+    def _generate(
+        self,
+        prompt: str,
+        prefix_ids,
+        past_key_values,
+        *,
+        return_full_text: bool = True,
+        **generate_kwargs,
+    ) -> str:
+        import torch
+
+        suffix_ids = self.tokenizer(
+            prompt[len(self.prefix) :], add_special_tokens=False, return_tensors="pt"
+        ).input_ids.to(self.model.device)
+        # Önek ayrı tokenlaştırıldığından sınırda önbellekle birebir aynı kalır
+        input_ids = torch.cat([prefix_ids, suffix_ids], dim=-1)
+        with torch.no_grad():
+            output = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                # generate önbelleği yerinde büyütür; paylaşılan kopya korunur
+                past_key_values=copy.deepcopy(past_key_values),
+                **generate_kwargs,
+            )
+        text = self.tokenizer.decode(
+            output[0, input_ids.shape[-1] :], skip_special_tokens=True
+        )
+        return prompt + text if return_full_text else text
@@ -0,0 +1,290 @@
+"""LLM üretimleri için cevap önbelleği.
+
+Aynı kargo durumu için aynı soru tekrar sorulduğunda modeli yeniden
+çalıştırmak yerine önceki cevap döndürülür. Anahtar; normalleştirilmiş soru,
+kullanıcı adı, ilgili ``cargo_info`` alanları ve son sohbet geçmişinin
+özetinden (SHA-256) oluşur.
+
+Her kayıt, üretildiği andaki kargoların ``last_update`` değerlerini saklar.
+Okumada bu değerlerden biri değişmişse kayıt silinir ve ıska sayılır; böylece
+iade/iptal gibi yazmalardan sonra eski cevap hiç döndürülmez.
+
+İki depo vardır: işlem içi ``MemoryResponseStore`` (LRU + TTL) ve aynı dosyayı
+kullanan tüm işçilerin paylaştığı ``SQLiteResponseStore``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from cargo_repository import TTLCache
+from db_connection import ConnectionManager
+
+# Anahtara giren kargo alanları; last_update ayrıca kayıtla birlikte saklanır
+KEY_CARGO_FIELDS = (
+    "status",
+    "location",
+    "estimated_delivery",
+    "description",
+    "weight",
+    "carrier",
+)
+
+DEFAULT_MAXSIZE = 512
+DEFAULT_TTL_SECONDS = 600.0
+
+RESPONSE_CACHE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS response_cache (
+        cache_key TEXT PRIMARY KEY,
+        response TEXT NOT NULL,
+        versions TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        last_access REAL NOT NULL
+    )
+"""
+
+RESPONSE_CACHE_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_response_cache_last_access
+    ON response_cache (last_access)
+"""
+
+_SELECT_ENTRY_SQL = """
+    SELECT response, versions, expires_at FROM response_cache WHERE cache_key = ?
+"""
+
+_TOUCH_ENTRY_SQL = "UPDATE response_cache SET last_access = ? WHERE cache_key = ?"
+
+_UPSERT_ENTRY_SQL = """
+    INSERT OR REPLACE INTO response_cache
+        (cache_key, response, versions, expires_at, last_access)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_DELETE_ENTRY_SQL = "DELETE FROM response_cache WHERE cache_key = ?"
+
+# En yeni *maxsize* kayıt dışında kalanlar (LRU) silinir
+_TRIM_SQL = """
+    DELETE FROM response_cache WHERE cache_key IN (
+        SELECT cache_key FROM response_cache
+        ORDER BY last_access DESC LIMIT -1 OFFSET ?
+    )
+"""
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Kayıt: (cevap, {takip_no: last_update})
+Entry = Tuple[str, Dict[str, Optional[str]]]
+
+
+def normalize_question(question: str) -> str:
+    """Büyük/küçük harf, noktalama ve boşluk farklarını yok sayan biçim"""
+    text = _PUNCTUATION_RE.sub(" ", question.casefold())
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def history_digest(history_text: str) -> str:
+    return hashlib.sha256(history_text.encode("utf-8")).hexdigest()
+
+
+def response_cache_key(
+    question: str,
+    cargos: Mapping[str, Mapping],
+    *,
+    history_text: str = "",
+    user_name: str = "",
+) -> str:
+    """Soru, kargo alanları ve sohbet geçmişinden kararlı önbellek anahtarı üretir"""
+    payload = [
+        normalize_question(question),
+        user_name,
+        history_digest(history_text),
+        [
+            [tracking_number, [info.get(field) for field in KEY_CARGO_FIELDS]]
+            for tracking_number, info in cargos.items()
+        ],
+    ]
+    encoded = json.dumps(payload, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def cargo_versions(cargos: Mapping[str, Mapping]) -> Dict[str, Optional[str]]:
+    return {
+        tracking_number: info.get("last_update")
+        for tracking_number, info in cargos.items()
+    }
+
+
+class MemoryResponseStore:
+    """İşlem içi LRU + TTL cevap deposu"""
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._cache = TTLCache(maxsize, ttl_seconds, clock=clock)
+
+    def get(self, key: str) -> Entry | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, entry: Entry) -> None:
+        self._cache.set(key, entry)
+
+    def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class SQLiteResponseStore:
+    """İşçiler arasında paylaşılan, SQLite dosyasında LRU + TTL cevap deposu
+
+    Süreler işlemler arası karşılaştırılabilsin diye duvar saatiyle tutulur.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        *,
+        clock: Callable[[], float] = time.time,
+        connections: ConnectionManager | None = None,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize en az 1 olmalı")
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._clock = clock
+        # Önbellek dosyası uygulama veritabanından ayrıdır; kendi yöneticisi olur
+        self.connections = connections or ConnectionManager(db_path)
+        self.connections.run_with_retry(self._create_schema)
+
+    def _create_schema(self) -> None:
+        with self.connections.transaction() as conn:
+            conn.execute(RESPONSE_CACHE_TABLE_SQL)
+            conn.execute(RESPONSE_CACHE_INDEX_SQL)
+
+    def get(self, key: str) -> Entry | None:
+        def operation() -> Entry | None:
+            conn = self.connections.connection()
+            row = conn.execute(_SELECT_ENTRY_SQL, (key,)).fetchone()
+            if row is None:
+                return None
+            response, versions, expires_at = row
+            now = self._clock()
+            with conn:
+                if expires_at <= now:
+                    conn.execute(_DELETE_ENTRY_SQL, (key,))
+                    return None
+                conn.execute(_TOUCH_ENTRY_SQL, (now, key))
+            return response, json.loads(versions)
+
+        return self.connections.run_with_retry(operation)
+
+    def set(self, key: str, entry: Entry) -> None:
+        response, versions = entry
+        now = self._clock()
+
+        def operation() -> None:
+            with self.connections.transaction() as conn:
+                conn.execute(
+                    _UPSERT_ENTRY_SQL,
+                    (
+                        key,
+                        response,
+                        json.dumps(versions, ensure_ascii=False),
+                        now + self.ttl,
+                        now,
+                    ),
+                )
+                conn.execute(_TRIM_SQL, (self.maxsize,))
+
+        self.connections.run_with_retry(operation)
+
+    def delete(self, key: str) -> None:
+        def operation() -> None:
+            with self.connections.transaction() as conn:
+                conn.execute(_DELETE_ENTRY_SQL, (key,))
+
+        self.connections.run_with_retry(operation)
+
+    def clear(self) -> None:
+        def operation() -> None:
+            with self.connections.transaction() as conn:
+                conn.execute("DELETE FROM response_cache")
+
+        self.connections.run_with_retry(operation)
+
+    def __len__(self) -> int:
+        conn = self.connections.connection()
+        return conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Kargo durumuna bağlı LLM cevap önbelleği ve isabet sayaçları"""
+
+    def __init__(
+        self, store: MemoryResponseStore | SQLiteResponseStore | None = None
+    ) -> None:
+        self.store = store if store is not None else MemoryResponseStore()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str, cargos: Mapping[str, Mapping]) -> str | None:
+        """Kayıt varsa ve kargoların ``last_update`` değerleri aynıysa cevabı döndürür"""
+        entry = self.store.get(key)
+        if entry is not None:
+            response, versions = entry
+            if versions == cargo_versions(cargos):
+                self._count("hits")
+                return response
+            self.store.delete(key)
+            self._count("invalidations")
+        self._count("misses")
+        return None
+
+    def set(self, key: str, cargos: Mapping[str, Mapping], response: str) -> None:
+        self.store.set(key, (response, cargo_versions(cargos)))
+
+    def get_or_generate(
+        self,
+        key: str,
+        cargos: Mapping[str, Mapping],
+        generate: Callable[[], str],
+    ) -> str:
+        response = self.get(key, cargos)
+        if response is None:
+            response = generate()
+            self.set(key, cargos, response)
+        return response
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self.store),
+            }
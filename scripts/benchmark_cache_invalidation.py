@@ -0,0 +1,137 @@
+"""Concurrent-session load test comparing global and per-entity cache invalidation."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cargo_repository import CargoRepository, ChangeSet
+from setup_database import create_database
+
+
+class GlobalClearRepository(CargoRepository):
+    """Eski davranış: herhangi bir yazmada tüm önbellek temizlenir."""
+
+    def _invalidate_keys(self, keys) -> None:
+        self.invalidations += 1
+        self.clear()
+
+    def save_changes(self, changes: ChangeSet) -> None:
+        super().save_changes(changes)
+        self.clear()
+
+
+def _populate(db_path: Path, num_users: int, cargos_per_user: int) -> None:
+    conn = create_database(str(db_path))
+    conn.executemany(
+        "INSERT INTO users (id, name) VALUES (?, ?)",
+        ((f"user{i}", f"Kullanıcı {i}") for i in range(num_users)),
+    )
+    conn.executemany(
+        """
+        INSERT INTO cargos (tracking_number, user_id, status, last_update)
+        VALUES (?, ?, 'Teslim edildi', '2024-01-15 14:30')
+        """,
+        (
+            (f"TR{i * cargos_per_user + j:09d}", f"user{i}")
+            for i in range(num_users)
+            for j in range(cargos_per_user)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _run_session(repo, user_id, cargos_per_user, reruns, write_ratio, seed) -> None:
+    rng = random.Random(seed)
+    user_index = int(user_id[4:])
+    for rerun in range(reruns):
+        repo.get_user(user_id)
+        if rng.random() < write_ratio:
+            tracking_num = (
+                f"TR{user_index * cargos_per_user + rng.randrange(cargos_per_user):09d}"
+            )
+            changes = ChangeSet(user_id=user_id)
+            changes.update_cargo(tracking_num, last_update=f"2024-02-01 {rerun:05d}")
+            repo.save_changes(changes)
+
+
+def _run(strategy: type[CargoRepository], db_path: Path, args) -> dict:
+    workers = [
+        strategy(str(db_path), max_users=args.users, ttl_seconds=3600)
+        for _ in range(args.workers)
+    ]
+    rng = random.Random(args.seed)
+    sessions = [
+        (workers[i % args.workers], f"user{rng.randrange(args.users)}", i)
+        for i in range(args.sessions)
+    ]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        futures = [
+            pool.submit(
+                _run_session,
+                repo,
+                user_id,
+                args.cargos_per_user,
+                args.reruns,
+                args.write_ratio,
+                args.seed + index,
+            )
+            for repo, user_id, index in sessions
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "reloads": sum(repo.misses for repo in workers),
+        "cache_hits": sum(repo.hits for repo in workers),
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Eşzamanlı oturum yükü altında önbellek yeniden yükleme sayısını ölçer"
+    )
+    parser.add_argument("--users", type=int, default=2000, help="Kullanıcı sayısı")
+    parser.add_argument("--cargos-per-user", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="Simüle edilen işçi")
+    parser.add_argument("--sessions", type=int, default=400, help="Oturum sayısı")
+    parser.add_argument("--reruns", type=int, default=25, help="Oturum başına rerun")
+    parser.add_argument(
+        "--write-ratio",
+        type=float,
+        default=0.02,
+        help="Bir rerun'ın iade/iptal onayı olma olasılığı",
+    )
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, strategy in (
+            ("global_clear", GlobalClearRepository),
+            ("per_entity", CargoRepository),
+        ):
+            db_path = Path(tmp_dir) / f"{name}.db"
+            _populate(db_path, args.users, args.cargos_per_user)
+            results[name] = _run(strategy, db_path, args)
+
+    baseline = results["global_clear"]["reloads"]
+    results["reload_reduction"] = round(
+        1 - results["per_entity"]["reloads"] / max(baseline, 1), 3
+    )
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
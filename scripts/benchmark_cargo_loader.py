@@ -0,0 +1,151 @@
+"""Benchmark the set-based cargo loader against the legacy per-cargo history loop."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from cargo_repository import load_all_users
+from setup_database import create_database
+
+HISTORY_PER_CARGO = 4
+CARGOS_PER_USER = 3
+
+
+def _populate(db_path: Path, num_cargos: int, *, with_index: bool) -> None:
+    conn = create_database(str(db_path))
+    num_users = max(num_cargos // CARGOS_PER_USER, 1)
+
+    conn.executemany(
+        "INSERT INTO users (id, name, email, phone, member_since) VALUES (?, ?, ?, ?, ?)",
+        (
+            (f"user{i}", f"Kullanıcı {i}", None, None, "2024-01-01")
+            for i in range(num_users)
+        ),
+    )
+    conn.executemany(
+        """
+        INSERT INTO cargos (tracking_number, user_id, status, location, last_update)
+        VALUES (?, ?, 'Yolda', 'İstanbul, Türkiye', '2024-01-15 14:30')
+        """,
+        ((f"TR{i:09d}", f"user{i % num_users}") for i in range(num_cargos)),
+    )
+    conn.executemany(
+        """
+        INSERT INTO tracking_history (tracking_number, date, status, location)
+        VALUES (?, ?, 'Yolda', 'İstanbul Depo')
+        """,
+        (
+            (f"TR{i:09d}", f"2024-01-{10 + step:02d} 09:00")
+            for i in range(num_cargos)
+            for step in range(HISTORY_PER_CARGO)
+        ),
+    )
+    if with_index:
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS bench_history_tracking"
+            " ON tracking_history (tracking_number, date)"
+        )
+    conn.commit()
+    conn.close()
+
+
+def legacy_load(conn: sqlite3.Connection) -> dict:
+    """Önceki ``load_cargo_data`` davranışı: kargo başına bir hareket sorgusu."""
+
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT u.id, u.name, u.email, u.phone, u.member_since,
+               c.tracking_number, c.status, c.location, c.last_update,
+               c.estimated_delivery, c.description, c.weight, c.dimensions,
+               c.carrier, c.insurance, c.return_reason
+        FROM users u
+        LEFT JOIN cargos c ON u.id = c.user_id
+        ORDER BY u.id, c.tracking_number
+        """)
+    data: dict = {}
+    for row in cursor.fetchall():
+        user = data.setdefault(
+            row[0],
+            {"name": row[1], "email": row[2], "phone": row[3], "cargos": {}},
+        )
+        if row[5]:
+            user["cargos"][row[5]] = {"status": row[6], "tracking_history": []}
+
+    for user in data.values():
+        for tracking_num, cargo in user["cargos"].items():
+            cursor.execute(
+                """
+                SELECT date, status, location
+                FROM tracking_history
+                WHERE tracking_number = ?
+                ORDER BY date
+                """,
+                (tracking_num,),
+            )
+            cargo["tracking_history"] = [
+                {"date": h[0], "status": h[1], "location": h[2]}
+                for h in cursor.fetchall()
+            ]
+    return data
+
+
+def _time_loader(db_path: Path, loader) -> float:
+    with sqlite3.connect(db_path) as conn:
+        started = time.perf_counter()
+        loader(conn)
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Kargo yükleyicisini eski kargo başına sorgu döngüsüyle karşılaştırır"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Denenecek kargo sayıları",
+    )
+    parser.add_argument(
+        "--legacy-limit",
+        type=int,
+        default=10_000,
+        help="Eski döngünün çalıştırılacağı en büyük kargo sayısı",
+    )
+    parser.add_argument(
+        "--with-index",
+        action="store_true",
+        help="tracking_history(tracking_number, date) indeksi ile ölç",
+    )
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.sizes:
+            db_path = Path(tmp_dir) / f"bench_{size}.db"
+            _populate(db_path, size, with_index=args.with_index)
+
+            row = {
+                "cargos": size,
+                "set_based_s": round(_time_loader(db_path, load_all_users), 3),
+            }
+            if size <= args.legacy_limit:
+                legacy = _time_loader(db_path, legacy_load)
+                row["per_cargo_s"] = round(legacy, 3)
+                row["speedup"] = round(legacy / max(row["set_based_s"], 1e-9), 1)
+            else:
+                row["per_cargo_s"] = None
+            results.append(row)
+            db_path.unlink()
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
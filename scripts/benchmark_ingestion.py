@@ -0,0 +1,99 @@
+"""Measure how markdown ingestion (parse + chunk) scales with worker processes."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+from cargo_ai.documentation import load_markdown_chunks
+
+
+def _write_corpus(source_dir: Path, target_dir: Path, count: int, seed: int) -> None:
+    """Kaynak dokümanların bölümlerinden örneklenmiş yapay markdown dosyaları"""
+    rng = random.Random(seed)
+    paragraphs = [
+        block.strip()
+        for path in sorted(source_dir.glob("*.md"))
+        for block in path.read_text(encoding="utf-8").split("\n\n")
+        if block.strip() and not block.lstrip().startswith("#")
+    ]
+    for index in range(count):
+        lines = [f"# Doküman {index}"]
+        for section in range(rng.randint(2, 8)):
+            lines.append(f"\n## Bölüm {section}")
+            lines.extend(rng.choices(paragraphs, k=rng.randint(1, 6)))
+        (target_dir / f"doc_{index:06d}.md").write_text(
+            "\n".join(lines) + "\n", encoding="utf-8"
+        )
+
+
+def _measure(folder: Path, workers: int, repeat: int) -> tuple[float, List[str]]:
+    timings = []
+    chunk_ids: List[str] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = load_markdown_chunks(folder, workers=workers)
+        timings.append(time.perf_counter() - started)
+        chunk_ids = [chunk.chunk_id for chunk in chunks]
+    return min(timings), chunk_ids
+
+
+def run(folder: Path, workers: Sequence[int], repeat: int) -> dict:
+    report = {}
+    baseline_ids: List[str] | None = None
+    baseline_seconds = 0.0
+    for count in workers:
+        seconds, chunk_ids = _measure(folder, count, repeat)
+        if baseline_ids is None:
+            baseline_ids, baseline_seconds = chunk_ids, seconds
+        elif chunk_ids != baseline_ids:
+            raise RuntimeError(f"{count} süreçli çıktı sıralı çalıştırmadan farklı")
+        report[str(count)] = {
+            "seconds": round(seconds, 3),
+            "speedup": round(baseline_seconds / seconds, 2),
+        }
+    return {"chunks": len(baseline_ids or []), "workers": report}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Markdown korpusunun süreç havuzuyla işlenme ölçeklenmesini ölçer"
+    )
+    parser.add_argument(
+        "--source",
+        type=Path,
+        default=Path("docs/source_corpus"),
+        help="Örnek dokümanlar",
+    )
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        default=None,
+        help="Hazır markdown dizini (verilmezse yapay korpus üretilir)",
+    )
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        folder = args.corpus
+        if folder is None:
+            folder = Path(temp_dir)
+            _write_corpus(args.source, folder, args.files, args.seed)
+        files = sum(1 for _path in folder.glob("*.md"))
+        report = run(folder, args.workers, args.repeat)
+
+    report = {"files": files, "cpu_count": os.cpu_count(), **report}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Microbenchmark: legacy keyword scans vs. the compiled intent classifier."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+
+from intent_classifier import (
+    CANCEL_KEYWORDS,
+    POLICY_KEYWORDS,
+    POLICY_NEGATIVE_KEYWORDS,
+    RETURN_KEYWORDS,
+    IntentClassifier,
+)
+
+_LEGACY_TRACKING_RE = r"\b(TR\d{9})\b"
+
+SAMPLE_MESSAGES = [
+    "Merhaba, TR123456789 numaralı kargom nerede?",
+    "TR987654321 teslim aldım ama ürün kusurlu, iade etmek istiyorum.",
+    "TR555555555 siparişimi iptal et lütfen, vazgeçtim.",
+    "Teslimat süresi yoğun dönemlerde ne kadar uzuyor?",
+    "Kredi kartı ile ödeme yaptım, fiyat farkı iade edilir mi?",
+    "Yeni telefon modelinin piyasaya çıkış tarihi nedir?",
+    "Garanti kapsamında değişim yapılıyor mu?",
+    "Selam, nasılsınız?",
+]
+
+
+def legacy_classify(prompt: str):
+    """Sınıflandırıcı öncesi cargo_status_bot yolundaki taramalar"""
+    prompt_lower = prompt.lower()
+    match = re.search(_LEGACY_TRACKING_RE, prompt)
+    tracking_number = match.group(1) if match else None
+
+    action = None
+    if tracking_number:
+        if any(keyword in prompt_lower for keyword in RETURN_KEYWORDS):
+            if not any(keyword in prompt_lower for keyword in ["iptal et", "vazgeç"]):
+                action = "return"
+            elif "teslim" in prompt_lower or "aldım" in prompt_lower:
+                action = "return"
+        if action is None and any(k in prompt_lower for k in CANCEL_KEYWORDS):
+            if not any(keyword in prompt_lower for keyword in ["iade", "döndür"]):
+                action = "cancel"
+
+    if action is None:
+        match = re.search(_LEGACY_TRACKING_RE, prompt)
+        tracking_number = match.group(1) if match else None
+        if not tracking_number:
+            lowered = prompt.lower()
+            if any(keyword in lowered for keyword in POLICY_KEYWORDS):
+                lowered = prompt.lower()
+                any(keyword in lowered for keyword in POLICY_NEGATIVE_KEYWORDS)
+    return action
+
+
+def _rate(func, messages, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            func(message)
+    return repeat * len(messages) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Niyet tespiti için saniyedeki mesaj sayısını ölçer"
+    )
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    intent_classifier = IntentClassifier(
+        return_keywords=RETURN_KEYWORDS,
+        cancel_keywords=CANCEL_KEYWORDS,
+        policy_keywords=POLICY_KEYWORDS,
+        policy_negative_keywords=POLICY_NEGATIVE_KEYWORDS,
+    )
+    rng = random.Random(args.seed)
+    messages = [rng.choice(SAMPLE_MESSAGES) for _ in range(args.messages)]
+
+    mismatches = sum(
+        legacy_classify(message) != intent_classifier.classify(message).action
+        for message in messages
+    )
+    legacy = _rate(legacy_classify, messages, args.repeat)
+    compiled = _rate(intent_classifier.classify, messages, args.repeat)
+
+    print(
+        json.dumps(
+            {
+                "legacy_msgs_per_s": round(legacy),
+                "compiled_msgs_per_s": round(compiled),
+                "speedup": round(compiled / legacy, 2),
+                "mismatches": mismatches,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
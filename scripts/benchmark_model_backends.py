@@ -0,0 +1,124 @@
+"""Benchmark CPU inference backends: tokens/s, peak RSS and QA quality delta."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List
+
+from evaluate_models import _evaluate_split, _load_dataset
+
+from model_backends import MODEL_ID, available_backends, build_pipeline
+
+SYSTEM_PROMPT = (
+    "Sen CargoHub müşteri hizmetleri asistanısın. Politika ve süreç sorularını"
+    " kısa ve doğru cevapla. Bilgi yoksa bunu açıkça belirt."
+)
+
+
+class _PipelineResponder:
+    """``_evaluate_split`` için ``answer`` arayüzü; üretim süresini ve token sayısını toplar"""
+
+    def __init__(self, pipe, max_new_tokens: int) -> None:
+        self.pipe = pipe
+        self.max_new_tokens = max_new_tokens
+        self.generated_tokens = 0
+        self.seconds = 0.0
+
+    def answer(self, question: str) -> str:
+        prompt = f"{SYSTEM_PROMPT}\n\nSoru: {question}\n\nCevap:"
+        started = time.perf_counter()
+        # Arka uçlar karşılaştırılabilsin diye açgözlü (örneklemesiz) üretim
+        output = self.pipe(
+            prompt,
+            max_new_tokens=self.max_new_tokens,
+            do_sample=False,
+            return_full_text=False,
+        )
+        self.seconds += time.perf_counter() - started
+        text = output[0]["generated_text"]
+        self.generated_tokens += len(
+            self.pipe.tokenizer.encode(text, add_special_tokens=False)
+        )
+        return text
+
+
+def _run_backend(
+    backend: str, model_id: str, records: List[dict], max_new_tokens: int
+) -> Dict[str, object]:
+    """Ayrı işlemde çalışır; tepe RSS yalnızca bu arka ucu yansıtır"""
+    started = time.perf_counter()
+    pipe = build_pipeline(backend, model_id)
+    load_seconds = time.perf_counter() - started
+
+    responder = _PipelineResponder(pipe, max_new_tokens)
+    quality = _evaluate_split(responder, records)
+    seconds = responder.seconds or float("inf")
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 1),
+        "tokens_per_second": round(responder.generated_tokens / seconds, 2),
+        # Linux'ta ru_maxrss KiB cinsindendir
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "quality": {key: round(value, 3) for key, value in quality.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Model arka uçlarını hız, bellek ve kalite açısından karşılaştırır"
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=list(available_backends()),
+        choices=available_backends(),
+        help="İlk arka uç kalite farkı için referans alınır",
+    )
+    parser.add_argument("--model", default=MODEL_ID, help="Model kimliği")
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=Path("data/qa/test/test.jsonl"),
+        help="Kalite ölçümü için QA veri seti",
+    )
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    records = _load_dataset(args.dataset)
+    if not records:
+        raise SystemExit("Veri seti boş")
+
+    results = []
+    for backend in args.backends:
+        # Her arka uç temiz bir işlemde yüklenir; önceki modelin belleği sayılmaz
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            future = executor.submit(
+                _run_backend, backend, args.model, records, args.max_new_tokens
+            )
+            try:
+                results.append(future.result())
+            except Exception as exc:  # Eksik opsiyonel bağımlılık vb.
+                results.append({"backend": backend, "error": str(exc)})
+
+    baseline = next((r["quality"] for r in results if "quality" in r), None)
+    for result in results:
+        if baseline is not None and "quality" in result:
+            result["quality_delta"] = {
+                key: round(result["quality"].get(key, 0.0) - value, 3)
+                for key, value in baseline.items()
+            }
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
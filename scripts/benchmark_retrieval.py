@@ -0,0 +1,130 @@
+"""Compare TF-IDF and BM25 (inverted index) retrieval: latency and recall@k."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from statistics import mean
+from typing import Dict, List, Sequence
+
+from build_rag_index import _load_chunks
+from evaluate_models import _load_dataset
+
+from cargo_ai.bm25 import BM25Index
+from cargo_ai.documentation import DocumentChunk
+from cargo_ai.rag_pipeline import RAGPipeline
+
+SPLITS = ("train", "dev", "test")
+
+
+def _engines(chunks: Sequence[DocumentChunk]) -> Dict[str, object]:
+    tfidf = RAGPipeline()
+    tfidf.build(chunks)
+    bm25 = BM25Index()
+    bm25.build(chunks)
+    return {"tfidf": tfidf, "bm25": bm25}
+
+
+def _recall_at_k(engine, records: Sequence[dict], top_k: int) -> float | None:
+    """Kaynak chunk'ı olan sorularda bulunan kaynak chunk oranının ortalaması"""
+    scores = []
+    for record in records:
+        expected = set(record.get("source_chunks") or [])
+        if not expected:
+            continue
+        found = {
+            r.chunk.chunk_id for r in engine.retrieve(record["question"], top_k=top_k)
+        }
+        scores.append(len(found & expected) / len(expected))
+    return round(mean(scores), 3) if scores else None
+
+
+def _latency(engine, queries: Sequence[str], top_k: int, repeat: int) -> dict:
+    engine.retrieve(queries[0], top_k=top_k)  # Tembel yapıları ısıt
+    timings: List[float] = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            engine.retrieve(query, top_k=top_k)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": round(mean(timings), 3),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+    }
+
+
+def _synthetic_chunks(
+    chunks: Sequence[DocumentChunk], count: int, seed: int
+) -> List[DocumentChunk]:
+    """Gerçek korpusun kelime dağılımından örneklenmiş yapay chunk'lar"""
+    rng = random.Random(seed)
+    words = [word for chunk in chunks for word in chunk.text.split()]
+    lengths = [chunk.word_count for chunk in chunks]
+    synthetic = []
+    for index in range(count):
+        text = " ".join(rng.choices(words, k=rng.choice(lengths)))
+        synthetic.append(
+            DocumentChunk(
+                chunk_id=f"synthetic#{index}",
+                document_id="synthetic",
+                section_path=["Synthetic"],
+                text=text,
+                word_count=len(text.split()),
+                start_line=0,
+                end_line=0,
+            )
+        )
+    return synthetic
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="TF-IDF ve BM25 retrieval gecikmesini ve recall@k değerini karşılaştırır"
+    )
+    parser.add_argument(
+        "--chunk-file", type=Path, default=Path("data/index/chunks.jsonl")
+    )
+    parser.add_argument("--qa-dir", type=Path, default=Path("data/qa"))
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--synthetic-chunks",
+        type=int,
+        default=50000,
+        help="Gecikme ölçümü için büyütülmüş korpus boyutu (0 ile kapatılır)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    chunks = _load_chunks(args.chunk_file)
+    splits = {
+        split: _load_dataset(args.qa_dir / split / f"{split}.jsonl") for split in SPLITS
+    }
+    queries = [record["question"] for records in splits.values() for record in records]
+
+    report: Dict[str, dict] = {}
+    for name, engine in _engines(chunks).items():
+        report[name] = {
+            "recall_at_k": {
+                split: _recall_at_k(engine, records, args.top_k)
+                for split, records in splits.items()
+            },
+            "latency": _latency(engine, queries, args.top_k, args.repeat),
+        }
+
+    if args.synthetic_chunks:
+        corpus = chunks + _synthetic_chunks(chunks, args.synthetic_chunks, args.seed)
+        for name, engine in _engines(corpus).items():
+            report[name][f"latency_{len(corpus)}_chunks"] = _latency(
+                engine, queries, args.top_k, max(args.repeat // 4, 1)
+            )
+
+    print(json.dumps({"top_k": args.top_k, **report}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 from pathlib import Path
 
 from cargo_ai.documentation import DocumentChunk
+from cargo_ai.incremental_index import IncrementalIndex
 from cargo_ai.rag_pipeline import RAGPipeline
 
+INCREMENTAL_DIRNAME = "incremental_index"
+
 
 def _load_chunks(chunk_path: Path) -> list[DocumentChunk]:
     with chunk_path.open("r", encoding="utf-8") as fp:
@@ -31,6 +35,62 @@ def _load_chunks(chunk_path: Path) -> list[DocumentChunk]:
     return chunks
 
 
+def chunk_file_version(chunk_path: Path) -> str:
+    """Chunk dosyasının SHA-256 özeti (prepare_documents.py delta sürümleriyle aynı)"""
+    digest = hashlib.sha256()
+    with chunk_path.open("rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def update_incremental_index(
+    chunks: list[DocumentChunk],
+    index_dir: Path,
+    *,
+    force_compact: bool = False,
+    delta: dict | None = None,
+    source_version: str | None = None,
+) -> dict:
+    """Chunk dosyasındaki değişiklikleri artımlı indekse uygular
+
+    ``delta`` prepare_documents.py çıktısıdır; yalnızca indeksin en son
+    eşitlendiği chunk dosyasından (``base``) ``source_version`` özetli bu
+    dosyaya (``target``) götürüyorsa eklenen ve silinen chunk id'leri işlenir.
+    Arada kaçırılmış bir çalıştırma varsa tüm indeks karşılaştırılır.
+    """
+    if not (index_dir / "manifest.json").exists():
+        index = IncrementalIndex()
+        index.build(chunks)
+        index.source_version = source_version
+        index.save(index_dir)
+        return {"built": index.live_count}
+
+    index = IncrementalIndex.load(index_dir)
+    if (
+        delta is not None
+        and not delta.get("full", True)
+        and index.source_version is not None
+        and delta.get("base") == index.source_version
+        and delta.get("target") == source_version
+    ):
+        added_ids = set(delta["added"])
+        removed = index.remove(delta["removed"])
+        added = index.add([chunk for chunk in chunks if chunk.chunk_id in added_ids])
+    else:
+        current = {chunk.chunk_id for chunk in chunks}
+        removed = index.remove(
+            [chunk_id for chunk_id in index.chunk_ids() if chunk_id not in current]
+        )
+        added = index.add(chunks)
+    compacted = force_compact or index.needs_compaction
+    if compacted:
+        index.compact()
+    index.source_version = source_version
+    index.save(index_dir)
+    return {"added": added, "removed": removed, "compacted": compacted}
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="TF-IDF tabanlı RAG indeksi oluşturur")
     parser.add_argument(
@@ -45,14 +105,45 @@ def main() -> None:
         default=Path("data/index"),
         help="İndeks dosyasının yazılacağı dizin",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Yalnızca yeni/değişen chunk'ları ekleyip silinenleri işaretler",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Artımlı indeksteki delta ve silinen kayıtları ana indekse katlar",
+    )
+    parser.add_argument(
+        "--delta-file",
+        type=Path,
+        default=None,
+        help="prepare_documents.py tarafından yazılan ekleme/silme listesi",
+    )
     args = parser.parse_args()
 
     chunks = _load_chunks(args.chunk_file)
+    if args.incremental:
+        index_dir = args.output_dir / INCREMENTAL_DIRNAME
+        delta = None
+        if args.delta_file is not None and args.delta_file.exists():
+            delta = json.loads(args.delta_file.read_text(encoding="utf-8"))
+        summary = update_incremental_index(
+            chunks,
+            index_dir,
+            force_compact=args.compact,
+            delta=delta,
+            source_version=chunk_file_version(args.chunk_file),
+        )
+        print(f"Artımlı RAG indeksi güncellendi: {index_dir} {summary}")
+        return
+
     pipeline = RAGPipeline()
     pipeline.build(chunks)
-    pipeline.save(args.output_dir)
+    index_dir = pipeline.save(args.output_dir)
 
-    print(f"RAG indeksi kaydedildi: {args.output_dir / 'tfidf_index.pkl'}")
+    print(f"RAG indeksi kaydedildi: {index_dir}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+"""Measure module import time with ``python -X importtime`` and enforce a budget.
+
+Each module is imported in a fresh interpreter several times; the fastest
+run is compared against the budget so a noisy CI runner does not fail the
+check. Heavy model dependencies must stay lazy: if any of them shows up in
+the import tree the check fails regardless of timing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# İlk kullanımda yüklenmesi gereken ağır bağımlılıklar
+FORBIDDEN_MODULES = ("transformers", "torch", "huggingface_hub", "sklearn")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """``-X importtime`` çıktısını (modül, kendi süresi, kümülatif süre) kayıtlarına çevirir"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        rows.append(
+            {
+                "module": name.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    return rows
+
+
+def measure_import(module: str, ignore: Sequence[str] = ()) -> Dict[str, object]:
+    """*module*'ü yeni bir yorumlayıcıda import eder; *ignore* paketlerinin süresi düşülür"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import edilemedi:\n{result.stderr[-2000:]}")
+
+    rows = parse_importtime(result.stderr)
+    total = next(row for row in reversed(rows) if row["module"] == module)
+    ignored_us = sum(row["cumulative_us"] for row in rows if row["module"] in ignore)
+    loaded = {row["module"].split(".")[0] for row in rows}
+    return {
+        "milliseconds": (total["cumulative_us"] - ignored_us) / 1000,
+        "forbidden": sorted(loaded.intersection(FORBIDDEN_MODULES)),
+        "slowest": sorted(rows, key=lambda row: row["self_us"], reverse=True)[:5],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Modül import süresini ölçer ve bütçe aşılırsa hata verir"
+    )
+    parser.add_argument("modules", nargs="+", help="Ölçülecek modüller")
+    parser.add_argument(
+        "--budget-ms", type=float, default=300.0, help="Modül başına süre bütçesi"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--ignore",
+        nargs="*",
+        default=[],
+        help="Süresi bütçeden düşülecek paketler (ör. streamlit)",
+    )
+    args = parser.parse_args()
+
+    report = {}
+    failed = False
+    for module in args.modules:
+        runs = [measure_import(module, args.ignore) for _ in range(args.runs)]
+        best = min(runs, key=lambda run: run["milliseconds"])
+        over_budget = best["milliseconds"] > args.budget_ms
+        failed = failed or over_budget or bool(best["forbidden"])
+        report[module] = {
+            "best_ms": round(best["milliseconds"], 1),
+            "budget_ms": args.budget_ms,
+            "forbidden_imports": best["forbidden"],
+            "slowest_self_us": {
+                row["module"]: row["self_us"] for row in best["slowest"]
+            },
+        }
+
+    print(json.dumps(report, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -52,8 +52,8 @@ def main() -> None:
     parser.add_argument(
         "--index",
         type=Path,
-        default=Path("data/index/tfidf_index.pkl"),
-        help="RAG indeks dosyası",
+        default=Path("data/index/tfidf_index"),
+        help="RAG indeks dizini",
     )
     parser.add_argument(
         "--dataset",
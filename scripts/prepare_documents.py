@@ -1,39 +1,259 @@
-"""Prepare markdown documents into chunked JSONL payload for RAG."""
+"""Prepare markdown documents into chunked JSONL payload for RAG.
+
+Re-runs are incremental: a manifest next to the output records the content
+hash of every source file and the chunk ids it produced. Only new or
+changed files are parsed again (streamed section by section, or in a
+process pool); chunks of unchanged files are copied over as raw byte
+ranges. The add/remove delta of the run is written for
+``build_rag_index.py --incremental --delta-file``; it names the SHA-256 of
+the chunk file it starts from (``base``) and produces (``target``), so an
+index that missed a run falls back to a full comparison.
+"""
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+from contextlib import nullcontext
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cargo_ai import (
+    DocumentChunk,
+    TokenCounter,
+    chunk_markdown_files,
+    iter_chunks,
+    iter_markdown_sections,
+)
+from cargo_ai.index_store import chunk_to_dict
+
+MANIFEST_VERSION = 1
+COPY_BLOCK_SIZE = 1 << 20
+
+
+def manifest_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.manifest.json")
+
+
+def delta_path_for(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.delta.json")
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fp:
+        for block in iter(lambda: fp.read(COPY_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _line_digest(line: bytes) -> bytes:
+    return hashlib.blake2b(line, digest_size=16).digest()
+
+
+@lru_cache(maxsize=None)
+def _token_counter(tokenizer_name: str | None) -> TokenCounter:
+    """Süreç başına tek sayaç; verilirse Hugging Face tokenizer'ı yüklenir"""
+    if tokenizer_name is None:
+        return TokenCounter()
+    from transformers import AutoTokenizer
+
+    return TokenCounter(AutoTokenizer.from_pretrained(tokenizer_name))
+
+
+def _chunk_options(settings: dict) -> dict:
+    options = {"max_words": settings["max_words"], "overlap": settings["overlap"]}
+    if settings.get("max_tokens"):
+        options.update(
+            max_tokens=settings["max_tokens"],
+            overlap_tokens=settings["overlap_tokens"],
+            token_counter=_token_counter(settings["tokenizer"]),
+        )
+    return options
+
+
+def _chunk_line(chunk: DocumentChunk) -> Tuple[str, bytes]:
+    payload = json.dumps(chunk_to_dict(chunk), ensure_ascii=False) + "\n"
+    return chunk.chunk_id, payload.encode("utf-8")
+
+
+def _chunk_lines(md_path: Path, settings: dict) -> Iterator[Tuple[str, bytes]]:
+    """Dosyayı akış halinde parçalar; (chunk_id, JSONL satırı) çiftleri üretir"""
+    sections = iter_markdown_sections(md_path)
+    for chunk in iter_chunks(sections, **_chunk_options(settings)):
+        yield _chunk_line(chunk)
+
+
+_Previous = Tuple[
+    Dict[str, dict], Dict[str, Tuple[int, int]], Dict[str, bytes], Optional[str]
+]
+
 
-from cargo_ai import load_markdown_documents, make_chunks
+def _load_previous(output_path: Path, settings: dict) -> _Previous:
+    """Önceki manifest, dosya başına bayt aralıkları, satır özetleri ve çıktı özeti
 
+    Eski çıktı satır satır okunur; satırlar bellekte tutulmaz, değişmeyen
+    dosyaların aralıkları yazım sırasında doğrudan kopyalanır. Manifest
+    geçersizse ya da çıktı manifest'teki SHA-256 özetiyle uyuşmuyorsa
+    (elle düzenlenmiş, yarım yazılmış) boş döner.
+    """
+    manifest_path = manifest_path_for(output_path)
+    if not manifest_path.exists() or not output_path.exists():
+        return {}, {}, {}, None
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("settings") != settings
+    ):
+        return {}, {}, {}, None
 
-def prepare_documents(source_dir: Path, output_path: Path) -> None:
-    sections = load_markdown_documents(source_dir)
-    chunks = make_chunks(sections)
+    files: Dict[str, dict] = manifest["files"]
+    spans: Dict[str, Tuple[int, int]] = {}
+    digests: Dict[str, bytes] = {}
+    output_hash = hashlib.sha256()
+    # Çıktı dosyası manifest'teki dosya sırasıyla yazılır
+    with output_path.open("rb") as fp:
+        for name, entry in files.items():
+            start = fp.tell()
+            for chunk_id in entry["chunk_ids"]:
+                line = fp.readline()
+                if not line:
+                    return {}, {}, {}, None
+                output_hash.update(line)
+                digests[chunk_id] = _line_digest(line)
+            spans[name] = (start, fp.tell())
+        if fp.readline():
+            return {}, {}, {}, None
+    if output_hash.hexdigest() != manifest.get("output_sha256"):
+        return {}, {}, {}, None
+    return files, spans, digests, manifest["output_sha256"]
 
+
+def _copy_range(source, target, start: int, end: int) -> None:
+    source.seek(start)
+    remaining = end - start
+    while remaining:
+        block = source.read(min(COPY_BLOCK_SIZE, remaining))
+        target.write(block)
+        remaining -= len(block)
+
+
+def prepare_documents(
+    source_dir: Path,
+    output_path: Path,
+    *,
+    max_words: int = 200,
+    overlap: int = 40,
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+    tokenizer: str | None = None,
+    workers: int = 1,
+    force: bool = False,
+) -> dict:
+    settings = {"max_words": max_words, "overlap": overlap}
+    if max_tokens:
+        # Token modu ayarları manifest'e girer; değişirse tüm dosyalar yeniden işlenir
+        settings.update(
+            max_tokens=max_tokens,
+            overlap_tokens=(
+                max_tokens // 5 if overlap_tokens is None else overlap_tokens
+            ),
+            tokenizer=tokenizer,
+        )
+    old_files, spans, old_digests, old_output_hash = (
+        ({}, {}, {}, None) if force else _load_previous(output_path, settings)
+    )
+
+    paths = sorted(Path(source_dir).glob("*.md"))
+    hashes = {path.name: _file_hash(path) for path in paths}
+    changed = [
+        path
+        for path in paths
+        if old_files.get(path.name, {}).get("sha256") != hashes[path.name]
+    ]
+
+    # Tek süreçte dosyalar yazım sırasında akış halinde parçalanır
+    fresh: Dict[str, List[Tuple[str, bytes]]] = {}
+    if workers > 1 and len(changed) > 1:
+        # load_markdown_chunks ile aynı süreç havuzu; satırlar burada serileştirilir
+        parsed = chunk_markdown_files(
+            changed, workers=workers, **_chunk_options(settings)
+        )
+        fresh = {
+            path.name: [_chunk_line(chunk) for chunk in chunks]
+            for path, chunks in zip(changed, parsed)
+        }
+    changed_names = {path.name for path in changed}
+
+    files: Dict[str, dict] = {}
+    new_digests: Dict[str, bytes] = {}
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as fp:
-        for chunk in chunks:
-            fp.write(
-                json.dumps(
-                    {
-                        "chunk_id": chunk.chunk_id,
-                        "document_id": chunk.document_id,
-                        "section_path": chunk.section_path,
-                        "text": chunk.text,
-                        "word_count": chunk.word_count,
-                        "start_line": chunk.start_line,
-                        "end_line": chunk.end_line,
-                        "metadata": chunk.metadata,
-                    },
-                    ensure_ascii=False,
-                )
-                + "\n"
-            )
-
-    print(f"Kaydedilen chunk sayısı: {len(chunks)}")
+    temp_path = output_path.with_name(output_path.name + ".tmp")
+    with temp_path.open("wb") as fp, (
+        output_path.open("rb") if spans else nullcontext()
+    ) as previous:
+        for path in paths:
+            if path.name not in changed_names:
+                _copy_range(previous, fp, *spans[path.name])
+                chunk_ids = old_files[path.name]["chunk_ids"]
+                for chunk_id in chunk_ids:
+                    new_digests[chunk_id] = old_digests[chunk_id]
+            else:
+                entries = fresh.get(path.name)
+                if entries is None:
+                    entries = _chunk_lines(path, settings)
+                chunk_ids = []
+                for chunk_id, line in entries:
+                    fp.write(line)
+                    chunk_ids.append(chunk_id)
+                    new_digests[chunk_id] = _line_digest(line)
+            files[path.name] = {"sha256": hashes[path.name], "chunk_ids": chunk_ids}
+    output_hash = _file_hash(temp_path)
+    temp_path.replace(output_path)
+
+    delta = {
+        # Önceki manifest yoksa silinenler bilinmez; indeks tam karşılaştırma yapar
+        "full": not old_files,
+        # İndeks yalnızca base sürümüyle eşitlenmişse bu farkı uygulayabilir
+        "base": old_output_hash if old_files else None,
+        "target": output_hash,
+        "added": [
+            chunk_id
+            for chunk_id, digest in new_digests.items()
+            if old_digests.get(chunk_id) != digest
+        ],
+        "removed": [
+            chunk_id for chunk_id in old_digests if chunk_id not in new_digests
+        ],
+    }
+    manifest_path_for(output_path).write_text(
+        json.dumps(
+            {
+                "version": MANIFEST_VERSION,
+                "settings": settings,
+                "output_sha256": output_hash,
+                "files": files,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    delta_path_for(output_path).write_text(
+        json.dumps(delta, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+    summary = {
+        "files": len(paths),
+        "reparsed_files": len(changed),
+        "chunks": len(new_digests),
+        "added": len(delta["added"]),
+        "removed": len(delta["removed"]),
+    }
+    print(f"Kaydedilen chunk sayısı: {len(new_digests)} {summary}")
+    return summary
 
 
 def main() -> None:
@@ -52,8 +272,45 @@ def main() -> None:
         default=Path("data/index/chunks.jsonl"),
         help="Chunk verisinin yazılacağı dosya",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Değişen dosyaları işleyecek süreç sayısı (varsayılan: 1, havuz yok)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Manifest'i yok sayıp tüm dosyaları yeniden işler",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        help="Chunk'ları kelime yerine bu token bütçesine göre cümle sınırında böler",
+    )
+    parser.add_argument(
+        "--overlap-tokens",
+        type=int,
+        default=None,
+        help="Ardışık chunk'larda tekrarlanan token sayısı (varsayılan: bütçenin beşte biri)",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        default=None,
+        help="Token sayımı için Hugging Face tokenizer adı (örn. google/gemma-2b-it); "
+        "verilmezse hızlı yerel yaklaşım kullanılır",
+    )
     args = parser.parse_args()
-    prepare_documents(args.source, args.output)
+    prepare_documents(
+        args.source,
+        args.output,
+        max_tokens=args.max_tokens,
+        overlap_tokens=args.overlap_tokens,
+        tokenizer=args.tokenizer,
+        workers=args.workers,
+        force=args.force,
+    )
 
 
 if __name__ == "__main__":
@@ -1,189 +1,447 @@
+import argparse
 import json
+import math
+import os
+import random
+import re
 import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
 
+from db_migrations import create_query_indexes, drop_query_indexes, migrate
 
-def create_database():
-    """SQLite veritabanını ve tabloları oluşturur"""
-    conn = sqlite3.connect("cargo_database.db")
-    cursor = conn.cursor()
 
-    # Users tablosu
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            member_since DATE
-        )
-    """
-    )
+def create_database(db_path="cargo_database.db"):
+    """SQLite veritabanını oluşturur ve şemayı en son sürüme yükseltir"""
+    conn = sqlite3.connect(db_path)
 
-    # Cargos tablosu
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS cargos (
-            tracking_number TEXT PRIMARY KEY,
-            user_id TEXT NOT NULL,
-            status TEXT NOT NULL,
-            location TEXT,
-            last_update DATETIME,
-            estimated_delivery DATE,
-            description TEXT,
-            weight TEXT,
-            dimensions TEXT,
-            carrier TEXT,
-            insurance TEXT,
-            return_reason TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    """
-    )
+    # Tablolar, indeksler ve sürüm sayacı db_migrations içinde sürümlenir
+    migrate(conn)
 
-    # Tracking history tablosu
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS tracking_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            tracking_number TEXT NOT NULL,
-            date DATETIME NOT NULL,
-            status TEXT NOT NULL,
-            location TEXT,
-            FOREIGN KEY (tracking_number) REFERENCES cargos (tracking_number)
-        )
+    return conn
+
+
+USER_INSERT_SQL = """
+    INSERT INTO users (id, name, email, phone, member_since)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+CARGO_INSERT_SQL = """
+    INSERT INTO cargos (
+        tracking_number, user_id, status, location, last_update,
+        estimated_delivery, description, weight, dimensions,
+        carrier, insurance, return_reason
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+HISTORY_INSERT_SQL = """
+    INSERT INTO tracking_history (tracking_number, date, status, location)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Akış modunda yükleme süresince geçerli pragmalar. Günlük kapalıdır: yarıda
+# kalan aktarım yeniden çalıştırılmalıdır (tablolar baştan temizlenir).
+BULK_LOAD_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -64000,
+}
+
+# Akış modunda işlem başına eklenen satır sayısı
+BULK_BATCH_SIZE = 10_000
+JSON_READ_CHUNK_SIZE = 1 << 20
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Bir sayının devamı olabilecek karakterler
+_JSON_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+def iter_json_object(fp, chunk_size=JSON_READ_CHUNK_SIZE):
+    """Üst düzey JSON nesnesinin (anahtar, değer) çiftlerini sırayla üretir
+
+    Dosya parça parça okunur; bellekte en fazla bir okuma parçası ve o anki
+    kullanıcının kaydı bulunur. Hatalı JSON ``json.JSONDecodeError`` fırlatır.
     """
-    )
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        # Tamamlanamayan büyük kayıtlarda parça boyu ikiye katlanır
+        chunk = fp.read(max(chunk_size, len(buffer) - pos))
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+        return not eof
+
+    def next_char():
+        nonlocal pos
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or not read_more():
+                return buffer[pos : pos + 1]
+
+    def decode_value():
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if read_more():
+                    continue
+                raise
+            # Sayı, ardından sayıya ait olamayacak bir karakter gelmedikçe
+            # yarım okunmuş olabilir ("12." | "5" gibi parça sınırları)
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if (
+                is_number
+                and (end == len(buffer) or buffer[end] in _JSON_NUMBER_CHARS)
+                and read_more()
+            ):
+                continue
+            pos = end
+            return value
+
+    def fail(message):
+        return json.JSONDecodeError(message, buffer, pos)
+
+    if next_char() != "{":
+        raise fail("JSON nesnesi bekleniyordu")
+    pos += 1
+    if next_char() == "}":
+        return
+
+    while True:
+        if next_char() != '"':
+            raise fail("Anahtar bekleniyordu")
+        key = decode_value()
+        if next_char() != ":":
+            raise fail("':' bekleniyordu")
+        pos += 1
+        next_char()
+        yield key, decode_value()
+
+        separator = next_char()
+        pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise fail("',' veya '}' bekleniyordu")
+
+
+def _bulk_insert(conn, users, batch_size, commit_batches):
+    """Kullanıcıları satır gruplarına açıp ``executemany`` ile yazar"""
 
-    conn.commit()
-    return conn
+    cursor = conn.cursor()
+    user_rows, cargo_rows, history_rows = [], [], []
+    counts = {"users": 0, "cargos": 0, "tracking_history": 0}
+    started = last_report = time.perf_counter()
+
+    def flush():
+        cursor.executemany(USER_INSERT_SQL, user_rows)
+        cursor.executemany(CARGO_INSERT_SQL, cargo_rows)
+        cursor.executemany(HISTORY_INSERT_SQL, history_rows)
+        counts["users"] += len(user_rows)
+        counts["cargos"] += len(cargo_rows)
+        counts["tracking_history"] += len(history_rows)
+        user_rows.clear()
+        cargo_rows.clear()
+        history_rows.clear()
+        if commit_batches:
+            conn.commit()
+
+    for user_id, user_data in users:
+        user_rows.append(
+            (
+                user_id,
+                user_data["name"],
+                user_data.get("email"),
+                user_data.get("phone"),
+                user_data.get("member_since"),
+            )
+        )
 
+        for tracking_num, cargo_info in user_data["cargos"].items():
+            cargo_rows.append(
+                (
+                    tracking_num,
+                    user_id,
+                    cargo_info["status"],
+                    cargo_info.get("location"),
+                    cargo_info.get("last_update"),
+                    cargo_info.get("estimated_delivery"),
+                    cargo_info.get("description"),
+                    cargo_info.get("weight"),
+                    cargo_info.get("dimensions"),
+                    cargo_info.get("carrier"),
+                    cargo_info.get("insurance"),
+                    cargo_info.get("return_reason"),
+                )
+            )
+            for history_item in cargo_info.get("tracking_history", ()):
+                history_rows.append(
+                    (
+                        tracking_num,
+                        history_item["date"],
+                        history_item["status"],
+                        history_item.get("location"),
+                    )
+                )
 
-def migrate_json_to_sqlite(json_file="cargo_data.json"):
-    """JSON verilerini SQLite veritabanına aktarır"""
+        if len(user_rows) + len(cargo_rows) + len(history_rows) >= batch_size:
+            flush()
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                total = sum(counts.values())
+                print(f"   … {total:,} satır ({total / (now - started):,.0f} satır/sn)")
+                last_report = now
+
+    flush()
+    return counts, time.perf_counter() - started
+
+
+def migrate_json_to_sqlite(
+    json_file="cargo_data.json",
+    db_path="cargo_database.db",
+    streaming=False,
+    batch_size=BULK_BATCH_SIZE,
+):
+    """JSON verilerini SQLite veritabanına aktarır
+
+    Varsayılan mod dosyayı tek seferde okur ve tek işlemde yazar. ``streaming``
+    modu çok büyük dışa aktarımlar içindir: kullanıcılar dosyadan tek tek
+    okunur, satırlar ``batch_size``'lık işlemlerle yazılır, yükleme süresince
+    günlük kapatılır ve sorgu indeksleri yükleme sonrasına ertelenir.
+    ``.jsonl`` dosyaları (satır başına bir kullanıcı) her zaman akışla okunur.
+    """
 
     # JSON dosyasını oku
     try:
-        with open(json_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        f = open(json_file, "r", encoding="utf-8")
     except FileNotFoundError:
         print(f"❌ {json_file} dosyası bulunamadı!")
         return False
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON parse hatası: {e}")
-        return False
 
-    # Veritabanını oluştur
-    conn = create_database()
-    cursor = conn.cursor()
+    with f:
+        if str(json_file).endswith(".jsonl"):
+            users = iter_jsonl_users(f)
+        elif streaming:
+            users = iter_json_object(f)
+        else:
+            try:
+                users = json.load(f).items()
+            except json.JSONDecodeError as e:
+                print(f"❌ JSON parse hatası: {e}")
+                return False
+
+        # Veritabanını oluştur
+        conn = create_database(db_path)
+
+        try:
+            counts, elapsed = load_users(conn, users, streaming, batch_size)
+        except json.JSONDecodeError as e:
+            print(f"❌ JSON parse hatası: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ Veri aktarımı sırasında hata: {e}")
+            return False
+        finally:
+            conn.close()
+
+    _report_load(counts, elapsed)
+    return True
+
+
+def iter_jsonl_users(fp):
+    """Satır başına bir kullanıcı (``{"id": ..., ...}``) içeren JSONL okur"""
+    for line in fp:
+        if line.strip():
+            user = json.loads(line)
+            yield user.pop("id"), user
+
+
+def load_users(conn, users, streaming=False, batch_size=BULK_BATCH_SIZE):
+    """(kullanıcı ID, kullanıcı) çiftlerini tablolara yazar
+
+    Mevcut satırlar silinir. ``streaming`` modunda satırlar parça parça
+    işlemlerle yazılır, yükleme süresince günlük kapatılır ve sorgu indeksleri
+    yükleme sonrasına ertelenir. Satır sayıları ve geçen süre döndürülür.
+    """
+
+    saved_pragmas = {}
 
     try:
+        if streaming:
+            for name, value in BULK_LOAD_PRAGMAS.items():
+                saved_pragmas[name] = conn.execute(f"PRAGMA {name}").fetchone()[0]
+                conn.execute(f"PRAGMA {name} = {value}")
+            drop_query_indexes(conn)
+
         # Mevcut verileri temizle (eğer varsa)
-        cursor.execute("DELETE FROM tracking_history")
-        cursor.execute("DELETE FROM cargos")
-        cursor.execute("DELETE FROM users")
+        conn.execute("DELETE FROM tracking_history")
+        conn.execute("DELETE FROM cargos")
+        conn.execute("DELETE FROM users")
 
         # Verileri aktar
-        for user_id, user_data in data.items():
-            # User ekle
-            cursor.execute(
-                """
-                INSERT INTO users (id, name, email, phone, member_since)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-                (
-                    user_id,
-                    user_data["name"],
-                    user_data.get("email"),
-                    user_data.get("phone"),
-                    user_data.get("member_since"),
-                ),
-            )
-
-            # Cargos ekle
-            for tracking_num, cargo_info in user_data["cargos"].items():
-                cursor.execute(
-                    """
-                    INSERT INTO cargos (
-                        tracking_number, user_id, status, location, last_update,
-                        estimated_delivery, description, weight, dimensions,
-                        carrier, insurance, return_reason
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        tracking_num,
-                        user_id,
-                        cargo_info["status"],
-                        cargo_info.get("location"),
-                        cargo_info.get("last_update"),
-                        cargo_info.get("estimated_delivery"),
-                        cargo_info.get("description"),
-                        cargo_info.get("weight"),
-                        cargo_info.get("dimensions"),
-                        cargo_info.get("carrier"),
-                        cargo_info.get("insurance"),
-                        cargo_info.get("return_reason"),
-                    ),
-                )
-
-                # Tracking history ekle
-                if "tracking_history" in cargo_info:
-                    for history_item in cargo_info["tracking_history"]:
-                        cursor.execute(
-                            """
-                            INSERT INTO tracking_history (tracking_number, date, status, location)
-                            VALUES (?, ?, ?, ?)
-                        """,
-                            (
-                                tracking_num,
-                                history_item["date"],
-                                history_item["status"],
-                                history_item.get("location"),
-                            ),
-                        )
-
+        counts, elapsed = _bulk_insert(conn, users, batch_size, streaming)
         conn.commit()
-        print("✅ Veriler başarıyla SQLite veritabanına aktarıldı!")
-        return True
+        return counts, elapsed
 
-    except Exception as e:
+    except BaseException:
         conn.rollback()
-        print(f"❌ Veri aktarımı sırasında hata: {e}")
-        return False
+        raise
 
     finally:
-        conn.close()
+        if streaming:
+            # Yarıda kalan yüklemede de indeksler ve pragmalar geri gelir
+            create_query_indexes(conn)
+            conn.commit()
+            for name, value in saved_pragmas.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+
+
+def _report_load(counts, elapsed):
+    total = sum(counts.values())
+    print(
+        f"✅ Veriler başarıyla SQLite veritabanına aktarıldı! "
+        f"({counts['users']:,} kullanıcı, {counts['cargos']:,} kargo, "
+        f"{counts['tracking_history']:,} hareket; "
+        f"{total / max(elapsed, 1e-9):,.0f} satır/sn)"
+    )
+
+
+SAMPLE_STATUSES = [
+    "Hazırlanıyor",
+    "Yola çıktı",
+    "Yolda",
+    "Dağıtımda",
+    "Teslim edildi",
+    "İade İşlemi",
+]
+SAMPLE_CARRIERS = ["Aras Kargo", "MNG Kargo", "Sürat Kargo", "UPS", "DHL"]
+SAMPLE_LOCATIONS = ["İstanbul", "Ankara", "İzmir", "Bursa", "Antalya", "Konya", "Adana"]
+
+# "Sipariş alındı" sonrası hareketler: (hareket, içerdiği kargo durumları, konum eki)
+_HISTORY_STEPS = (
+    (
+        "Paket hazırlandı",
+        {"Yola çıktı", "Yolda", "Dağıtımda", "Teslim edildi", "İade İşlemi"},
+        " Depo",
+    ),
+    (
+        "Yola çıktı",
+        {"Yola çıktı", "Yolda", "Dağıtımda", "Teslim edildi", "İade İşlemi"},
+        " Dağıtım",
+    ),
+    ("Yolda", {"Yolda", "Dağıtımda", "Teslim edildi", "İade İşlemi"}, ", Türkiye"),
+    ("Dağıtıma çıktı", {"Dağıtımda", "Teslim edildi", "İade İşlemi"}, " Şubesi"),
+    ("Teslim edildi", {"Teslim edildi"}, ", Türkiye"),
+    ("İade talebi alındı", {"İade İşlemi"}, " İade Merkezi"),
+)
+
+# Yük testi verisi Faker yerine bu havuzlardan üretilir (hızlı ve tekrarlanabilir)
+_FIRST_NAMES = [
+    "Ahmet", "Mehmet", "Mustafa", "Ali", "Hüseyin", "Emre", "Burak", "Can",
+    "Ayşe", "Fatma", "Zeynep", "Elif", "Merve", "Esra", "Özge", "Şeyma",
+]  # fmt: skip
+_LAST_NAMES = [
+    "Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın",
+    "Özdemir", "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Koç", "Kurt",
+]  # fmt: skip
+_PRODUCTS = [
+    "Laptop", "Telefon", "Kitap seti", "Spor ayakkabı", "Kahve makinesi",
+    "Kulaklık", "Mont", "Oyuncak", "Saat", "Parfüm", "Tablet", "Blender",
+]  # fmt: skip
+_ASCII_FOLD = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+
+# Kullanıcı ve takip numaraları 9 haneli uzaydan (900M değer) seçilir
+ID_SPACE = 900_000_000
+ID_OFFSET = 100_000_000
+LOAD_TEST_SHARD_SIZE = 10_000
+
+
+def _sample_cargo(rng, created_date, description, now):
+    """Durumu ve hareket geçmişi tutarlı rastgele bir kargo kaydı üretir"""
+
+    status = rng.choice(SAMPLE_STATUSES)
+    cargo = {
+        "status": status,
+        "location": f"{rng.choice(SAMPLE_LOCATIONS)}, Türkiye",
+        "last_update": created_date.strftime("%Y-%m-%d %H:%M"),
+        "estimated_delivery": (
+            created_date.replace(day=min(created_date.day + rng.randint(1, 7), 28))
+        ).strftime("%Y-%m-%d"),
+        "description": description,
+        "weight": f"{rng.uniform(0.1, 5.0):.1f} kg",
+        "dimensions": f"{rng.randint(10, 50)}x{rng.randint(5, 30)}x{rng.randint(2, 20)} cm",
+        "carrier": rng.choice(SAMPLE_CARRIERS),
+        "insurance": rng.choice(["Evet", "Hayır"]),
+    }
+
+    # Sigorta varsa değer ekle
+    if cargo["insurance"] == "Evet":
+        cargo["insurance"] += f" - {rng.randint(5, 100) * 1000} TL"
+
+    # Tracking history oluştur
+    current_date = created_date
+    history = [
+        {
+            "date": current_date.strftime("%Y-%m-%d %H:%M"),
+            "status": "Sipariş alındı",
+            "location": f"{rng.choice(SAMPLE_LOCATIONS)} Depo",
+        }
+    ]
+    for step, statuses, suffix in _HISTORY_STEPS:
+        if status in statuses:
+            # Önceki hareket ile şimdi arasında rastgele bir an
+            current_date += (now - current_date) * rng.random()
+            history.append(
+                {
+                    "date": current_date.strftime("%Y-%m-%d %H:%M"),
+                    "status": step,
+                    "location": f"{rng.choice(SAMPLE_LOCATIONS)}{suffix}",
+                }
+            )
 
+    cargo["tracking_history"] = history
+    return cargo
 
-def generate_sample_data(num_users=10, num_cargos_per_user=3):
-    """Örnek veri üretir ve JSON dosyasına kaydeder"""
 
-    import random
+def generate_sample_data(num_users=10, num_cargos_per_user=3, seed=None):
+    """Faker ile demo verisi üretir ve JSON dosyasına kaydeder
+
+    Yük testi boyutunda veri için ``generate_load_test_data`` kullanın.
+    """
 
     from faker import Faker
 
+    rng = random.Random(seed)
     fake = Faker("tr_TR")
+    if seed is not None:
+        fake.seed_instance(seed)
 
-    # Durum seçenekleri
-    statuses = [
-        "Hazırlanıyor",
-        "Yola çıktı",
-        "Yolda",
-        "Dağıtımda",
-        "Teslim edildi",
-        "İade İşlemi",
-    ]
-    carriers = ["Aras Kargo", "MNG Kargo", "Sürat Kargo", "UPS", "DHL"]
-    locations = ["İstanbul", "Ankara", "İzmir", "Bursa", "Antalya", "Konya", "Adana"]
+    # Küçük demolarda kısa ID'ler; kullanıcı sayısı arttıkça uzay genişler
+    max_user_number = max(999, 10 * num_users)
+    tracking_numbers = set()
+    now = datetime.now()
 
     sample_data = {}
 
     for i in range(num_users):
-        user_id = f"user{random.randint(100, 999)}"
+        user_id = f"user{rng.randint(100, max_user_number)}"
 
         # Benzersiz user_id garantisi
         while user_id in sample_data:
-            user_id = f"user{random.randint(100, 999)}"
+            user_id = f"user{rng.randint(100, max_user_number)}"
 
         user = {
             "name": fake.name(),
@@ -196,162 +454,222 @@ def generate_sample_data(num_users=10, num_cargos_per_user=3):
         }
 
         # Her user için rastgele sayıda cargo oluştur
-        num_cargos = random.randint(1, num_cargos_per_user)
+        num_cargos = rng.randint(1, num_cargos_per_user)
 
         for j in range(num_cargos):
-            tracking_num = f"TR{random.randint(100000000, 999999999)}"
+            tracking_num = f"TR{rng.randint(100000000, 999999999)}"
 
             # Benzersiz tracking number garantisi
-            existing_tracking = []
-            for u in sample_data.values():
-                existing_tracking.extend(u["cargos"].keys())
-            while tracking_num in existing_tracking:
-                tracking_num = f"TR{random.randint(100000000, 999999999)}"
+            while tracking_num in tracking_numbers:
+                tracking_num = f"TR{rng.randint(100000000, 999999999)}"
+            tracking_numbers.add(tracking_num)
 
-            status = random.choice(statuses)
             created_date = fake.date_time_between(start_date="-30d", end_date="now")
-
-            cargo = {
-                "status": status,
-                "location": f"{random.choice(locations)}, Türkiye",
-                "last_update": created_date.strftime("%Y-%m-%d %H:%M"),
-                "estimated_delivery": (
-                    created_date.replace(
-                        day=min(created_date.day + random.randint(1, 7), 28)
-                    )
-                ).strftime("%Y-%m-%d"),
-                "description": fake.sentence(nb_words=4),
-                "weight": f"{random.uniform(0.1, 5.0):.1f} kg",
-                "dimensions": f"{random.randint(10, 50)}x{random.randint(5, 30)}x{random.randint(2, 20)} cm",
-                "carrier": random.choice(carriers),
-                "insurance": random.choice(["Evet", "Hayır"]),
-            }
-
-            # Sigorta varsa değer ekle
-            if cargo["insurance"] == "Evet":
-                cargo["insurance"] += f" - {random.randint(5, 100) * 1000} TL"
-
-            # Tracking history oluştur
-            history = []
-            current_date = created_date
-
-            # Başlangıç durumu
-            history.append(
-                {
-                    "date": current_date.strftime("%Y-%m-%d %H:%M"),
-                    "status": "Sipariş alındı",
-                    "location": f"{random.choice(locations)} Depo",
-                }
+            user["cargos"][tracking_num] = _sample_cargo(
+                rng, created_date, fake.sentence(nb_words=4), now
             )
 
-            # Ara durumlar
-            if status in [
-                "Yola çıktı",
-                "Yolda",
-                "Dağıtımda",
-                "Teslim edildi",
-                "İade İşlemi",
-            ]:
-                current_date = fake.date_time_between(
-                    start_date=current_date, end_date="now"
-                )
-                history.append(
-                    {
-                        "date": current_date.strftime("%Y-%m-%d %H:%M"),
-                        "status": "Paket hazırlandı",
-                        "location": f"{random.choice(locations)} Depo",
-                    }
-                )
+        sample_data[user_id] = user
 
-            if status in [
-                "Yola çıktı",
-                "Yolda",
-                "Dağıtımda",
-                "Teslim edildi",
-                "İade İşlemi",
-            ]:
-                current_date = fake.date_time_between(
-                    start_date=current_date, end_date="now"
-                )
-                history.append(
-                    {
-                        "date": current_date.strftime("%Y-%m-%d %H:%M"),
-                        "status": "Yola çıktı",
-                        "location": f"{random.choice(locations)} Dağıtım",
-                    }
-                )
+    # JSON dosyasına kaydet
+    with open("cargo_data.json", "w", encoding="utf-8") as f:
+        json.dump(sample_data, f, ensure_ascii=False, indent=2)
 
-            if status in ["Yolda", "Dağıtımda", "Teslim edildi", "İade İşlemi"]:
-                current_date = fake.date_time_between(
-                    start_date=current_date, end_date="now"
-                )
-                history.append(
-                    {
-                        "date": current_date.strftime("%Y-%m-%d %H:%M"),
-                        "status": "Yolda",
-                        "location": f"{random.choice(locations)}, Türkiye",
-                    }
-                )
+    print(
+        f"✅ {len(sample_data)} kullanıcı ve toplam {len(tracking_numbers)} kargo ile örnek veri üretildi!"
+    )
 
-            if status in ["Dağıtımda", "Teslim edildi", "İade İşlemi"]:
-                current_date = fake.date_time_between(
-                    start_date=current_date, end_date="now"
-                )
-                history.append(
-                    {
-                        "date": current_date.strftime("%Y-%m-%d %H:%M"),
-                        "status": "Dağıtıma çıktı",
-                        "location": f"{random.choice(locations)} Şubesi",
-                    }
-                )
+    return sample_data
 
-            if status == "Teslim edildi":
-                current_date = fake.date_time_between(
-                    start_date=current_date, end_date="now"
-                )
-                history.append(
-                    {
-                        "date": current_date.strftime("%Y-%m-%d %H:%M"),
-                        "status": "Teslim edildi",
-                        "location": f"{random.choice(locations)}, Türkiye",
-                    }
-                )
 
-            if status == "İade İşlemi":
-                current_date = fake.date_time_between(
-                    start_date=current_date, end_date="now"
-                )
-                history.append(
-                    {
-                        "date": current_date.strftime("%Y-%m-%d %H:%M"),
-                        "status": "İade talebi alındı",
-                        "location": f"{random.choice(locations)} İade Merkezi",
-                    }
-                )
+def _id_permutation(seed):
+    """ID uzayında *seed*'e bağlı bir eşleme (a·i + b) mod N döndürür
+
+    ``a`` uzay boyutuyla aralarında asal olduğundan farklı sıra numaraları
+    farklı ID'lere gider; benzersizlik için küme veya koordinasyon gerekmez.
+    """
+    rng = random.Random(seed)
+    while True:
+        a = rng.randrange(1, ID_SPACE)
+        if math.gcd(a, ID_SPACE) == 1:
+            return a, rng.randrange(ID_SPACE)
+
 
-            cargo["tracking_history"] = history
+def _permuted_id(index, permutation):
+    a, b = permutation
+    return ID_OFFSET + (a * index + b) % ID_SPACE
+
+
+def _generate_shard(task):
+    """[start, end) aralığındaki kullanıcıları üretir (işçi süreçte çalışır)
+
+    Her kullanıcının rastgele üreteci seed ve sıra numarasından türetilir;
+    çıktı işçi sayısından ve parça boyundan bağımsızdır.
+    """
+
+    start, end, num_cargos_per_user, seed, now, as_jsonl = task
+    user_permutation = _id_permutation(seed)
+    cargo_permutation = _id_permutation(seed + 1)
+    users = []
+    counts = {"users": 0, "cargos": 0, "tracking_history": 0}
+
+    for index in range(start, end):
+        rng = random.Random((seed << 40) + index)
+        user_number = _permuted_id(index, user_permutation)
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        user = {
+            "name": f"{first} {last}",
+            "email": f"{first}.{last}{user_number % 1000}@example.com".translate(
+                _ASCII_FOLD
+            ).lower(),
+            "phone": f"05{rng.randint(30, 59)} {rng.randint(100, 999)}"
+            f" {rng.randint(10, 99)} {rng.randint(10, 99)}",
+            "member_since": (now - timedelta(days=rng.randrange(730)))
+            .date()
+            .isoformat(),
+            "cargos": {},
+        }
+
+        for j in range(rng.randint(1, num_cargos_per_user)):
+            tracking_num = (
+                f"TR{_permuted_id(index * num_cargos_per_user + j, cargo_permutation)}"
+            )
+            created_date = now - timedelta(minutes=rng.randrange(30 * 24 * 60))
+            cargo = _sample_cargo(rng, created_date, rng.choice(_PRODUCTS), now)
             user["cargos"][tracking_num] = cargo
+            counts["tracking_history"] += len(cargo["tracking_history"])
 
-        sample_data[user_id] = user
+        counts["users"] += 1
+        counts["cargos"] += len(user["cargos"])
+        users.append((f"user{user_number}", user))
 
-    # JSON dosyasına kaydet
-    with open("cargo_data.json", "w", encoding="utf-8") as f:
-        json.dump(sample_data, f, ensure_ascii=False, indent=2)
+    if as_jsonl:
+        lines = "".join(
+            json.dumps({"id": user_id, **user}, ensure_ascii=False) + "\n"
+            for user_id, user in users
+        )
+        return lines, counts
+    return users, counts
+
+
+def _ordered_results(func, tasks, workers):
+    """*tasks* sonuçlarını sırayla üretir; bellekte sınırlı sayıda parça tutar"""
+    if workers <= 1:
+        yield from map(func, tasks)
+        return
+
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(func, task) for task in islice(tasks, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            for task in islice(tasks, 1):
+                pending.append(pool.submit(func, task))
+            yield result
+
+
+def generate_load_test_data(
+    num_users,
+    num_cargos_per_user=3,
+    output="cargo_database.db",
+    workers=None,
+    seed=42,
+    reference_date=None,
+    shard_size=LOAD_TEST_SHARD_SIZE,
+):
+    """Yük testi için büyük ölçekli veri üretir ve doğrudan diske yazar
+
+    Kullanıcılar ``shard_size``'lık parçalara bölünüp ``workers`` süreçte
+    üretilir; parçalar sırayla SQLite veritabanına (akış modunda toplu yükleme)
+    veya ``.jsonl`` uzantılı çıktıya satır başına bir kullanıcı olarak yazılır.
+    Aynı ``seed`` ve ``reference_date`` aynı veriyi üretir. Yazılan satır
+    sayıları döndürülür.
+    """
 
+    if num_users * num_cargos_per_user > ID_SPACE:
+        raise ValueError("Takip numarası uzayı bu kadar kargo için yetersiz")
+
+    workers = workers or os.cpu_count() or 1
+    now = reference_date or datetime.now().replace(second=0, microsecond=0)
+    as_jsonl = str(output).endswith(".jsonl")
+    tasks = (
+        (
+            start,
+            min(start + shard_size, num_users),
+            num_cargos_per_user,
+            seed,
+            now,
+            as_jsonl,
+        )
+        for start in range(0, num_users, shard_size)
+    )
+    results = _ordered_results(_generate_shard, tasks, workers)
+
+    if not as_jsonl:
+        conn = create_database(output)
+        try:
+            counts, elapsed = load_users(
+                conn,
+                (user for users, _ in results for user in users),
+                streaming=True,
+            )
+        finally:
+            conn.close()
+        _report_load(counts, elapsed)
+        return counts
+
+    started = time.perf_counter()
+    counts = {"users": 0, "cargos": 0, "tracking_history": 0}
+    with open(output, "w", encoding="utf-8") as f:
+        for lines, shard_counts in results:
+            f.write(lines)
+            for key, value in shard_counts.items():
+                counts[key] += value
+    elapsed = time.perf_counter() - started
     print(
-        f"✅ {len(sample_data)} kullanıcı ve toplam {sum(len(u['cargos']) for u in sample_data.values())} kargo ile örnek veri üretildi!"
+        f"✅ {counts['users']:,} kullanıcı ve {counts['cargos']:,} kargo {output}"
+        f" dosyasına yazıldı ({counts['cargos'] / max(elapsed, 1e-9):,.0f} kargo/sn)"
     )
+    return counts
 
-    return sample_data
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Örnek veri üretir ve SQLite veritabanına aktarır"
+    )
+    parser.add_argument("--users", type=int, default=20, help="Kullanıcı sayısı")
+    parser.add_argument("--cargos-per-user", type=int, default=5)
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Yük testi verisi için hedef (.db veya .jsonl); verilmezse demo "
+        "verisi cargo_data.json üzerinden cargo_database.db'ye aktarılır",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Süreç sayısı")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.output:
+        print("🔄 Yük testi verisi üretiliyor...")
+        generate_load_test_data(
+            args.users,
+            args.cargos_per_user,
+            output=args.output,
+            workers=args.workers,
+            seed=args.seed,
+        )
+        return
 
-if __name__ == "__main__":
     # Örnek veri üret
     print("🔄 Örnek veri üretiliyor...")
-    generate_sample_data(num_users=20, num_cargos_per_user=5)
+    generate_sample_data(num_users=args.users, num_cargos_per_user=args.cargos_per_user)
 
     # SQLite'e aktar
     print("🔄 Veriler SQLite'e aktarılıyor...")
     migrate_json_to_sqlite()
 
     print("✅ İşlem tamamlandı!")
+
+
+if __name__ == "__main__":
+    main()
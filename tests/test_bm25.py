@@ -0,0 +1,79 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from cargo_ai.bm25 import BM25Index, tokenize
+from cargo_ai.documentation import DocumentChunk
+from cargo_ai.qa_generation import generate_questions
+from cargo_ai.rag_pipeline import HybridResponder
+
+
+def _chunks(texts):
+    return [
+        DocumentChunk(f"c{i}", "doc", ["Bölüm"], text, len(text.split()), 0, 0)
+        for i, text in enumerate(texts)
+    ]
+
+
+def _exhaustive(index, query, k):
+    """Tüm posting listelerini toplayan referans BM25 skorlaması"""
+    totals = {}
+    for term in dict.fromkeys(tokenize(query)):
+        posting = index.postings.get(term)
+        if posting is None:
+            continue
+        for doc_id, impact in zip(posting.doc_ids.tolist(), posting.impacts.tolist()):
+            totals[doc_id] = totals.get(doc_id, 0.0) + impact
+    ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+    return [doc_id for doc_id, _score in ranked[:k]]
+
+
+def test_max_score_matches_exhaustive_scoring():
+    rng = random.Random(7)
+    vocabulary = [f"terim{i}" for i in range(300)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    texts = [
+        " ".join(rng.choices(vocabulary, weights, k=rng.randint(3, 40)))
+        for _ in range(2000)
+    ]
+    index = BM25Index(normalize_scores=False)
+    index.build(_chunks(texts))
+
+    for _ in range(100):
+        query = " ".join(rng.choices(vocabulary, weights, k=rng.randint(1, 5)))
+        for top_k in (1, 3, 10):
+            results = index.retrieve(query, top_k=top_k)
+            assert [int(r.chunk.chunk_id[1:]) for r in results] == _exhaustive(
+                index, query, top_k
+            )
+
+
+def test_scores_are_normalized_and_ties_follow_chunk_order():
+    index = BM25Index()
+    index.build(_chunks(["kargo iade", "kargo iade", "teslimat", "kargo iade"]))
+
+    results = index.retrieve("iade fiyatı", top_k=2)
+
+    assert [r.chunk.chunk_id for r in results] == ["c0", "c1"]
+    assert all(0 < r.score < 1 for r in results)
+    assert index.retrieve("bilinmeyen kelimeler") == []
+    assert index.retrieve_batch(["iade", "  "], top_k=1)[1] == []
+
+
+def test_plugs_into_hybrid_responder():
+    _qa_items, chunks = generate_questions(Path("docs/source_corpus"))
+    index = BM25Index()
+    index.build(chunks)
+
+    responder = HybridResponder(index, min_score=0.09)
+
+    answer = responder.answer("Standart teslimat süresi ne kadar?")
+    assert answer is not None
+    assert "2-4 iş günü" in answer
+    assert responder.answer("Ürünlerin fiyatı ne kadar?") is None
+
+
+def test_retrieve_requires_built_index():
+    with pytest.raises(RuntimeError):
+        BM25Index().retrieve("iade")
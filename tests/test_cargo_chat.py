@@ -25,6 +25,7 @@ from cargo_chat import (
     detect_return_cancel_intent,
     extract_tracking_number,
     load_cargo_data,
+    lookup_user_cargos,
 )
 
 
@@ -364,6 +365,28 @@ class TestCargoChat:
         assert success is False
         assert "uygun değildir" in message
 
+    def test_create_cancel_request_records_changes(self, sample_data):
+        """İptal talebinin değişiklik kümesine yazılmasını test et"""
+        from cargo_repository import ChangeSet
+
+        user_cargos = sample_data["user123"]
+        changes = ChangeSet(user_id="user123")
+
+        success, _message = create_cancel_request(
+            "TR987654321", user_cargos, changes=changes
+        )
+        assert success is True
+        assert list(changes.cargo_updates) == ["TR987654321"]
+        assert changes.cargo_updates["TR987654321"]["status"] == "İptal Edildi"
+        assert [event["status"] for _tn, event in changes.history_events] == [
+            "İptal talebi alındı"
+        ]
+
+        # Başarısız talep değişiklik üretmez
+        failed = ChangeSet()
+        create_cancel_request("TR123456789", user_cargos, changes=failed)
+        assert not failed
+
     @patch("cargo_chat.load_model")
     def test_cargo_status_bot_basic(self, mock_load_model, sample_data):
         """Temel cargo status bot fonksiyonunu test et"""
@@ -386,6 +409,110 @@ class TestCargoChat:
         result = cargo_status_bot(None, "merhaba", user_cargos)
         assert "takip numaranızı bulamadım" in result
 
+    def test_lookup_user_cargos(self, sample_data):
+        """Takip numaraları tek geçişte, sırayla ve tekrarsız aranır"""
+        found, missing = lookup_user_cargos(
+            sample_data["user123"],
+            ["TR987654321", "TR000000000", "TR123456789", "TR987654321"],
+        )
+
+        assert list(found) == ["TR987654321", "TR123456789"]
+        assert missing == ["TR000000000"]
+
+    def test_cargo_status_bot_multiple_tracking_numbers(self, sample_data):
+        """Birden çok takip numarası tek birleşik cevapla yanıtlanır"""
+        user_cargos = sample_data["user123"]
+        prompt = "TR123456789, TR987654321 ve TR000000000 nerede?"
+
+        result = cargo_status_bot(None, prompt, user_cargos)
+        assert result.index("**TR123456789**") < result.index("**TR987654321**")
+        assert "Teslim edildi" in result and "Hazırlanıyor" in result
+        assert "bulunamadı: TR000000000" in result
+
+        # Model varken tüm kargolar için tek üretim çağrısı yapılır
+        pipe = MagicMock(return_value=[{"generated_text": " Birleşik cevap "}])
+        result = cargo_status_bot(pipe, prompt, user_cargos)
+        assert pipe.call_count == 1
+        full_prompt = pipe.call_args[0][0]
+        assert "TR123456789" in full_prompt and "TR987654321" in full_prompt
+        assert result.startswith("Birleşik cevap")
+
+        result = cargo_status_bot(None, "TR000000000 TR111111111", user_cargos)
+        assert "bulunamadı" in result
+
+    def test_cargo_status_bot_caches_generations(self, sample_data):
+        """Aynı soru ve kargo durumu için model yeniden çağrılmaz"""
+        import cargo_chat
+
+        cargo_chat.response_cache.clear()
+        user_cargos = sample_data["user123"]
+        pipe = MagicMock(return_value=[{"generated_text": "Kargonuz teslim edildi"}])
+
+        cargo_status_bot(pipe, "TR123456789 nerede?", user_cargos)
+        cargo_status_bot(pipe, "TR123456789   NEREDE", user_cargos)
+        assert pipe.call_count == 1
+
+        user_cargos["cargos"]["TR123456789"]["last_update"] = "2025-11-01 10:00"
+        cargo_status_bot(pipe, "TR123456789 nerede?", user_cargos)
+        assert pipe.call_count == 2
+        assert cargo_chat.response_cache.invalidations >= 1
+
+    def test_cargo_status_bot_stream(self, sample_data):
+        """Akış modunda cevap parça parça gelir ve sonunda önbelleğe yazılır"""
+        import cargo_chat
+
+        cargo_chat.response_cache.clear()
+        user_cargos = sample_data["user123"]
+        pipe = MagicMock()
+
+        def fake_stream(pipe, full_prompt, on_complete=None, **kwargs):
+            yield "Kargonuz"
+            yield " teslim edildi."
+
+        with patch("cargo_chat.stream_pipeline", side_effect=fake_stream) as stream:
+            chunks = list(
+                cargo_chat.cargo_status_bot_stream(
+                    pipe, "TR123456789 ne zaman geldi?", user_cargos
+                )
+            )
+            assert chunks == ["Kargonuz", " teslim edildi."]
+
+            # Aynı soru önbellekten tek parça döner
+            chunks = list(
+                cargo_chat.cargo_status_bot_stream(
+                    pipe, "TR123456789 ne zaman geldi?", user_cargos
+                )
+            )
+            assert chunks == ["Kargonuz teslim edildi."]
+            assert stream.call_count == 1
+
+        # Model gerektirmeyen cevaplar tek parça str olarak akar
+        assert list(
+            cargo_chat.cargo_status_bot_stream(None, "merhaba", user_cargos)
+        ) == [cargo_status_bot(None, "merhaba", user_cargos)]
+
+    def test_run_generation_uses_batch_scheduler(self):
+        """Toplama açıkken üretim paylaşılan zamanlayıcı üzerinden yapılır"""
+        import cargo_chat
+
+        pipe = MagicMock(return_value=[[{"generated_text": " toplu cevap "}]])
+        with patch("cargo_chat.LLM_BATCH_SIZE", 4):
+            scheduler = cargo_chat.get_batch_scheduler(pipe)
+            try:
+                assert cargo_chat.get_batch_scheduler(pipe) is scheduler
+                assert cargo_chat.run_generation(pipe, "istem") == "toplu cevap"
+                assert pipe.call_args.args[0] == ["istem"]
+                assert scheduler.stats()["requests"] == 1
+                # Zamanlayıcı takılırsa oturum sonsuza dek beklemez
+                with patch.object(scheduler, "generate", return_value="x") as gen:
+                    cargo_chat.run_generation(pipe, "istem")
+                assert gen.call_args.kwargs["timeout"] == cargo_chat.LLM_BATCH_TIMEOUT_S
+            finally:
+                scheduler.close(5)
+                cargo_chat._batch_scheduler = None
+
+        assert cargo_chat.get_batch_scheduler(pipe) is None
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
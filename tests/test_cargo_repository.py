@@ -0,0 +1,237 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from cargo_repository import (  # noqa: E402
+    CargoRepository,
+    ChangeSet,
+    TTLCache,
+    apply_changes,
+    load_all_users,
+)
+from setup_database import create_database  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """İki kullanıcı ve sırasız eklenmiş hareketlerle geçici veritabanı"""
+    path = tmp_path / "repo.db"
+    conn = create_database(str(path))
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+        [
+            ("user123", "Ahmet Yılmaz", "ahmet@example.com", "555-0123", "2023-01-01"),
+            ("user456", "Ayşe Kaya", None, None, "2023-05-01"),
+        ],
+    )
+    conn.executemany(
+        """
+        INSERT INTO cargos (tracking_number, user_id, status, location, last_update)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [
+            ("TR123456789", "user123", "Teslim edildi", "İstanbul", "2024-01-15 14:30"),
+            ("TR987654321", "user123", "Hazırlanıyor", "İstanbul Depo", None),
+        ],
+    )
+    conn.executemany(
+        """
+        INSERT INTO tracking_history (tracking_number, date, status, location)
+        VALUES (?, ?, ?, ?)
+        """,
+        [
+            ("TR123456789", "2024-01-15 14:30", "Teslim edildi", "İstanbul"),
+            ("TR987654321", "2024-01-10 09:00", "Sipariş alındı", "İstanbul Depo"),
+            ("TR123456789", "2024-01-10 09:00", "Sipariş alındı", "İstanbul Depo"),
+            ("TR000000000", "2024-01-01 00:00", "Sahipsiz", None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+class TestLoadAllUsers:
+    """Küme tabanlı kargo yükleyicisinin testleri"""
+
+    def test_groups_history_per_cargo_in_date_order(self, db_path):
+        with sqlite3.connect(db_path) as conn:
+            data = load_all_users(conn)
+
+        assert set(data) == {"user123", "user456"}
+        cargos = data["user123"]["cargos"]
+        assert list(cargos) == ["TR123456789", "TR987654321"]
+        assert [h["status"] for h in cargos["TR123456789"]["tracking_history"]] == [
+            "Sipariş alındı",
+            "Teslim edildi",
+        ]
+        assert len(cargos["TR987654321"]["tracking_history"]) == 1
+
+    def test_user_without_cargos_has_empty_mapping(self, db_path):
+        with sqlite3.connect(db_path) as conn:
+            data = load_all_users(conn)
+
+        assert data["user456"]["name"] == "Ayşe Kaya"
+        assert data["user456"]["cargos"] == {}
+
+    def test_issues_single_history_query(self, db_path):
+        statements = []
+        with sqlite3.connect(db_path) as conn:
+            conn.set_trace_callback(statements.append)
+            load_all_users(conn)
+
+        history_queries = [s for s in statements if "FROM tracking_history" in s]
+        assert len(history_queries) == 1
+
+
+class TestTTLCache:
+    """LRU + TTL önbelleğinin testleri"""
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "a" en son kullanılan olur
+        cache.set("c", 3)
+
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_expires_entries_after_ttl(self):
+        now = [0.0]
+        cache = TTLCache(maxsize=4, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+
+        now[0] = 9.9
+        assert cache.get("a") == 1
+        now[0] = 10.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestCargoRepository:
+    """Kullanıcı bazlı tembel yükleme testleri"""
+
+    def test_get_user_reads_only_requested_user(self, db_path):
+        repo = CargoRepository(db_path)
+        user = repo.get_user("user123")
+
+        assert user["name"] == "Ahmet Yılmaz"
+        assert list(user["cargos"]) == ["TR123456789", "TR987654321"]
+        history = user["cargos"]["TR123456789"]["tracking_history"]
+        assert [h["date"] for h in history] == ["2024-01-10 09:00", "2024-01-15 14:30"]
+        assert repo.get_user("user999") is None
+        assert repo.get_user("") is None
+
+    def test_get_user_is_cached_and_returns_copies(self, db_path):
+        repo = CargoRepository(db_path)
+        first = repo.get_user("user123")
+        first["cargos"]["TR123456789"]["status"] = "Değişti"
+
+        second = repo.get_user("user123")
+        assert second["cargos"]["TR123456789"]["status"] == "Teslim edildi"
+        assert (repo.hits, repo.misses) == (1, 1)
+
+        repo.invalidate_user("user123")
+        repo.get_user("user123")
+        assert repo.misses == 2
+
+    def test_user_cache_is_bounded(self, db_path):
+        repo = CargoRepository(db_path, max_users=1)
+        repo.get_user("user123")
+        repo.get_user("user456")
+        repo.get_user("user123")
+
+        assert repo.misses == 3
+
+    def test_get_cargo(self, db_path):
+        repo = CargoRepository(db_path)
+        cargo = repo.get_cargo("TR987654321")
+
+        assert cargo["status"] == "Hazırlanıyor"
+        assert cargo["tracking_history"][0]["status"] == "Sipariş alındı"
+        assert repo.get_cargo("TR000000000") is None
+
+
+class TestChangeSet:
+    """Fark tabanlı kaydetme testleri"""
+
+    def test_apply_changes_updates_only_changed_rows(self, db_path):
+        changes = ChangeSet(user_id="user123")
+        changes.update_cargo(
+            "TR987654321", status="İptal Edildi", last_update="2024-02-01 10:00"
+        )
+        changes.add_history(
+            "TR987654321",
+            {"date": "2024-02-01 10:00", "status": "İptal talebi alındı"},
+        )
+
+        statements = []
+        with sqlite3.connect(db_path) as conn:
+            before = conn.execute("SELECT id FROM tracking_history").fetchall()
+            conn.set_trace_callback(statements.append)
+            apply_changes(conn, changes)
+            conn.set_trace_callback(None)
+
+            rows = dict(conn.execute("SELECT tracking_number, status FROM cargos"))
+            after = conn.execute("SELECT id FROM tracking_history").fetchall()
+
+        assert rows == {"TR123456789": "Teslim edildi", "TR987654321": "İptal Edildi"}
+        assert after[: len(before)] == before
+        assert len(after) == len(before) + 1
+        assert not any(s.lstrip().upper().startswith("DELETE") for s in statements)
+        assert sum("UPDATE cargos" in s for s in statements) == 1
+
+    def test_rejects_unknown_fields(self):
+        with pytest.raises(ValueError):
+            ChangeSet().update_cargo("TR123456789", cancel_reason="x")
+
+    def test_save_changes_invalidates_affected_entries(self, db_path):
+        repo = CargoRepository(db_path)
+        repo.get_user("user123")
+        repo.get_user("user456")
+
+        changes = ChangeSet()
+        changes.update_cargo("TR123456789", status="İade İşlemi")
+        repo.save_changes(changes)
+
+        assert repo.get_user("user123")["cargos"]["TR123456789"]["status"] == (
+            "İade İşlemi"
+        )
+        repo.get_user("user456")
+        assert (repo.hits, repo.misses) == (1, 3)
+
+
+class TestCrossWorkerInvalidation:
+    """Sürüm sayacı ile kayıt bazlı geçersiz kılma testleri"""
+
+    def test_other_worker_reloads_only_changed_user(self, db_path):
+        reader = CargoRepository(db_path)
+        writer = CargoRepository(db_path)
+        reader.get_user("user123")
+        reader.get_user("user456")
+
+        changes = ChangeSet(user_id="user123")
+        changes.update_cargo("TR123456789", status="İade İşlemi")
+        writer.save_changes(changes)
+
+        reader.get_user("user456")
+        assert reader.hits == 1
+
+        user = reader.get_user("user123")
+        assert user["cargos"]["TR123456789"]["status"] == "İade İşlemi"
+        assert reader.misses == 3
+
+    def test_refresh_without_writes_keeps_cache(self, db_path):
+        repo = CargoRepository(db_path)
+        repo.get_user("user123")
+        repo.refresh()
+        repo.get_user("user123")
+
+        assert (repo.hits, repo.misses, repo.invalidations) == (1, 1, 0)
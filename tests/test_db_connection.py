@@ -0,0 +1,94 @@
+import gc
+import os
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from db_connection import ConnectionManager  # noqa: E402
+
+
+class TestConnectionManager:
+    """Paylaşılan bağlantı yöneticisinin testleri"""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        manager = ConnectionManager(str(tmp_path / "pool.db"), busy_timeout_ms=1234)
+        yield manager
+        manager.close_all()
+
+    def test_connection_is_configured(self, manager):
+        conn = manager.connection()
+
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    def test_connection_is_reused_per_thread(self, manager):
+        main_conn = manager.connection()
+        assert manager.connection() is main_conn
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(manager.connection()))
+        thread.start()
+        thread.join()
+
+        assert other[0] is not main_conn
+
+    def test_connections_are_closed_when_threads_exit(self, manager):
+        manager.connection()
+        used = []
+
+        def work():
+            conn = manager.connection()
+            conn.execute("SELECT 1")
+            used.append(conn)
+
+        for _ in range(20):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        assert manager.open_connections == 1
+        with pytest.raises(sqlite3.ProgrammingError):
+            used[0].execute("SELECT 1")
+
+    def test_transaction_commits_and_rolls_back(self, manager):
+        manager.connection().execute("CREATE TABLE t (x INTEGER)")
+
+        with manager.transaction() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+        with pytest.raises(RuntimeError):
+            with manager.transaction() as conn:
+                conn.execute("INSERT INTO t VALUES (2)")
+                raise RuntimeError("iptal")
+
+        rows = manager.connection().execute("SELECT x FROM t").fetchall()
+        assert rows == [(1,)]
+
+    def test_run_with_retry_retries_busy_errors(self, manager, monkeypatch):
+        monkeypatch.setattr("db_connection.BUSY_BACKOFF_SECONDS", 0)
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise sqlite3.OperationalError("database is locked")
+            return "ok"
+
+        assert manager.run_with_retry(flaky) == "ok"
+        assert len(calls) == 3
+
+        def broken():
+            calls.append(1)
+            raise sqlite3.OperationalError("no such table: t")
+
+        calls.clear()
+        with pytest.raises(sqlite3.OperationalError):
+            manager.run_with_retry(broken)
+        assert len(calls) == 1
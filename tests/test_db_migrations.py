@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Mock external dependencies BEFORE any other imports
+sys.modules["transformers"] = MagicMock()
+sys.modules["huggingface_hub"] = MagicMock()
+sys.modules["streamlit"] = MagicMock()
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import cargo_chat  # noqa: E402
+import db_viewer  # noqa: E402
+from cargo_repository import (  # noqa: E402
+    ChangeSet,
+    apply_changes,
+    load_all_users,
+    load_cargo,
+    load_user,
+)
+from db_migrations import LATEST_VERSION, get_schema_version, migrate  # noqa: E402
+from setup_database import create_database  # noqa: E402
+
+EXPECTED_INDEXES = {
+    "idx_cargos_user_tracking",
+    "idx_cargos_status_last_update",
+    "idx_cargos_last_update",
+    "idx_cargos_carrier",
+    "idx_tracking_history_tracking_date",
+    "idx_tracking_history_date",
+    "idx_entity_versions_version",
+}
+
+# Tasarım gereği tüm tabloyu okuyan sorgular (önizleme ve dışa aktarma)
+FULL_SCAN_ALLOWED = ("SELECT * FROM",)
+
+
+def _index_names(conn):
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    return {row[0] for row in rows}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = create_database(str(tmp_path / "plans.db"))
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+        [(f"user{i}", f"Kullanıcı {i}", None, None, None) for i in range(50)],
+    )
+    conn.executemany(
+        """
+        INSERT INTO cargos (tracking_number, user_id, status, last_update, carrier)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                f"TR{i:09d}",
+                f"user{i % 50}",
+                "Yolda",
+                f"2024-01-{i % 28 + 1:02d}",
+                "Aras",
+            )
+            for i in range(200)
+        ],
+    )
+    conn.executemany(
+        """
+        INSERT INTO tracking_history (tracking_number, date, status, location)
+        VALUES (?, ?, 'Yolda', 'İstanbul')
+        """,
+        [(f"TR{i % 200:09d}", f"2024-01-{i % 28 + 1:02d}") for i in range(600)],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+class TestMigrate:
+    """Şema sürümleme ve yerinde yükseltme testleri"""
+
+    def test_new_database_is_at_latest_version(self, tmp_path):
+        conn = create_database(str(tmp_path / "new.db"))
+
+        assert get_schema_version(conn) == LATEST_VERSION
+        assert EXPECTED_INDEXES <= _index_names(conn)
+        assert migrate(conn) == LATEST_VERSION  # tekrar çalıştırmak güvenli
+        conn.close()
+
+    def test_upgrades_legacy_database_in_place(self, tmp_path):
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE users (id TEXT PRIMARY KEY, name TEXT NOT NULL)")
+        conn.execute("""
+            CREATE TABLE cargos (
+                tracking_number TEXT PRIMARY KEY, user_id TEXT NOT NULL,
+                status TEXT NOT NULL, last_update DATETIME, carrier TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE tracking_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, tracking_number TEXT NOT NULL,
+                date DATETIME NOT NULL, status TEXT NOT NULL, location TEXT
+            )
+        """)
+        conn.execute("INSERT INTO users VALUES ('user123', 'Ahmet Yılmaz')")
+        conn.execute(
+            "INSERT INTO cargos VALUES ('TR123456789', 'user123', 'Yolda', NULL, NULL)"
+        )
+        conn.commit()
+        assert get_schema_version(conn) == 0
+
+        assert migrate(conn) == LATEST_VERSION
+
+        assert EXPECTED_INDEXES <= _index_names(conn)
+        assert conn.execute("SELECT COUNT(*) FROM cargos").fetchone()[0] == 1
+        conn.close()
+
+    def test_partial_target_and_newer_schema(self, tmp_path):
+        conn = sqlite3.connect(str(tmp_path / "partial.db"))
+
+        assert migrate(conn, target=1) == 1
+        assert "idx_cargos_user_tracking" not in _index_names(conn)
+
+        conn.execute(f"PRAGMA user_version = {LATEST_VERSION + 1}")
+        with pytest.raises(RuntimeError):
+            migrate(conn)
+        conn.close()
+
+
+class TestQueryPlans:
+    """cargo_chat ve db_viewer sorgularının EXPLAIN QUERY PLAN regresyon testi"""
+
+    def _trace(self, conn, operations):
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            with patch("db_viewer.get_db_connection", return_value=conn), patch(
+                "cargo_chat.get_db_connection", return_value=conn
+            ):
+                for operation in operations:
+                    operation()
+        finally:
+            conn.set_trace_callback(None)
+        return [
+            s
+            for s in statements
+            if s.lstrip().split(None, 1)[0].upper() in {"SELECT", "UPDATE", "DELETE"}
+        ]
+
+    def _assert_indexed(self, conn, statement):
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+        compact = " ".join(statement.split())
+
+        for step in plan:
+            if step.startswith("SCAN") and "USING" not in step:
+                assert compact.startswith(FULL_SCAN_ALLOWED), (compact, plan)
+
+        # Sıralama yalnızca eşitlikle daraltılmış (SEARCH) küçük kümelerde kabul
+        table_steps = [s for s in plan if s.startswith(("SCAN", "SEARCH"))]
+        unbounded = any(s.startswith("SCAN") for s in table_steps)
+        for step in plan:
+            if step in ("USE TEMP B-TREE FOR ORDER BY", "USE TEMP B-TREE FOR GROUP BY"):
+                assert not unbounded, (compact, plan)
+
+    def test_db_viewer_queries_use_indexes(self, conn):
+        statements = self._trace(
+            conn,
+            [
+                db_viewer.get_table_info,
+                db_viewer.get_users_data,
+                lambda: db_viewer.get_users_data(search_term="Kullanıcı 1"),
+                db_viewer.get_cargos_data,
+                lambda: db_viewer.get_cargos_data(user_filter="user1"),
+                lambda: db_viewer.get_cargos_data(status_filter="Yolda"),
+                lambda: db_viewer.get_cargos_data("user1", "Yolda"),
+                db_viewer.get_tracking_history,
+                lambda: db_viewer.get_tracking_history("TR000000001"),
+                lambda: db_viewer.get_user_cargo_list("user1"),
+                lambda: db_viewer.get_table_preview("cargos"),
+                lambda: db_viewer.export_data("tracking_history"),
+            ],
+        )
+
+        assert len(statements) >= 15
+        for statement in statements:
+            self._assert_indexed(conn, statement)
+
+    def test_cargo_chat_queries_use_indexes(self, conn):
+        changes = ChangeSet(user_id="user1")
+        changes.update_cargo("TR000000001", status="İade İşlemi")
+        changes.add_history("TR000000001", {"date": "2024-02-01", "status": "İade"})
+
+        statements = self._trace(
+            conn,
+            [
+                lambda: load_all_users(conn),
+                lambda: load_user(conn, "user1"),
+                lambda: load_cargo(conn, "TR000000001"),
+                lambda: apply_changes(conn, changes),
+                lambda: cargo_chat.save_cargo_data({"user2": load_user(conn, "user2")}),
+            ],
+        )
+
+        assert any("UPDATE cargos" in s for s in statements)
+        for statement in statements:
+            self._assert_indexed(conn, statement)
@@ -0,0 +1,224 @@
+from cargo_ai.documentation import (
+    DocumentSection,
+    TokenCounter,
+    _parse_markdown_sections,
+    chunk_markdown_files,
+    iter_chunks,
+    iter_markdown_sections,
+    load_markdown_chunks,
+    load_markdown_documents,
+    load_markdown_file,
+    make_chunks,
+)
+
+DOCUMENT = """# Politika
+Genel giriş.
+
+## İade
+İade süresi 14 gündür.
+
+### Koşullar
+Ürün kullanılmamış olmalıdır.
+## Boş Bölüm
+
+# Ek
+Son satır.
+"""
+
+
+def test_sections_are_yielded_as_headings_close():
+    consumed = []
+
+    def lines():
+        for line in DOCUMENT.splitlines(keepends=True):
+            consumed.append(line)
+            yield line
+
+    sections = _parse_markdown_sections(lines(), "politika")
+    first = next(sections)
+
+    assert first.path == ["Politika"] and first.content == "Genel giriş."
+    # İlk bölüm, bir sonraki başlık okunur okunmaz üretilir
+    assert consumed[-1] == "## İade\n"
+
+    rest = list(sections)
+    assert [section.path for section in rest] == [
+        ["Politika", "İade"],
+        ["Politika", "İade", "Koşullar"],
+        ["Ek"],
+    ]
+    assert (rest[1].start_line, rest[1].end_line) == (7, 8)
+    assert rest[-1].end_line == len(DOCUMENT.splitlines())
+
+
+def test_file_loaders_agree(tmp_path):
+    path = tmp_path / "Iade Politikasi.md"
+    path.write_text(DOCUMENT, encoding="utf-8")
+
+    streamed = list(iter_markdown_sections(path))
+
+    assert streamed == load_markdown_file(path)
+    assert {section.document_id for section in streamed} == {"iade_politikasi"}
+
+
+def test_chunk_windows_overlap_and_count_words():
+    words = [f"k{i}" for i in range(25)]
+    section = DocumentSection(
+        "doc", "Uzun Bölüm", 2, ["Uzun Bölüm"], "\n".join(words), 1, 30
+    )
+
+    chunks = list(iter_chunks([section], max_words=10, overlap=3))
+
+    assert [chunk.chunk_id for chunk in chunks] == [
+        "doc#uzun_bölüm#0",
+        "doc#uzun_bölüm#1",
+        "doc#uzun_bölüm#2",
+        "doc#uzun_bölüm#3",
+    ]
+    assert [chunk.text.split() for chunk in chunks] == [
+        words[0:10],
+        words[7:17],
+        words[14:24],
+        words[21:25],
+    ]
+    assert [chunk.word_count for chunk in chunks] == [10, 10, 10, 4]
+
+
+def test_process_pool_keeps_serial_order(tmp_path):
+    for name in ("c_kargo", "a_iade", "b_teslimat"):
+        (tmp_path / f"{name}.md").write_text(DOCUMENT, encoding="utf-8")
+
+    sections = load_markdown_documents(tmp_path)
+    chunks = load_markdown_chunks(tmp_path, max_words=4, overlap=1)
+
+    assert load_markdown_documents(tmp_path, workers=2) == sections
+    assert load_markdown_chunks(tmp_path, max_words=4, overlap=1, workers=2) == chunks
+    assert load_markdown_chunks(tmp_path, max_tokens=8, workers=2) == (
+        load_markdown_chunks(tmp_path, max_tokens=8)
+    )
+    per_file = chunk_markdown_files(
+        sorted(tmp_path.glob("*.md")), workers=2, max_words=4, overlap=1
+    )
+    assert [len(file_chunks) for file_chunks in per_file] == [len(chunks) // 3] * 3
+    assert [chunk for file_chunks in per_file for chunk in file_chunks] == chunks
+    assert [chunk.document_id for chunk in chunks[:: len(chunks) // 3]] == [
+        "a_iade",
+        "b_teslimat",
+        "c_kargo",
+    ]
+
+
+class CharTokenizer:
+    """Her karakteri bir token sayan ve çağrıları kaydeden sahte tokenizer"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, add_special_tokens=True):
+        assert add_special_tokens is False
+        self.calls += 1
+        return list(text.replace(" ", ""))
+
+
+SENTENCES = [
+    "Kargo yola çıktı.",
+    "Teslimat iki gün sürer!",
+    "Adres değişikliği mümkün mü?",
+    "Evet.",
+    "Şube hafta içi açıktır.",
+]
+
+
+def _section(text):
+    return DocumentSection("doc", "SSS", 2, ["SSS"], text, 1, 9)
+
+
+def test_token_mode_packs_whole_sentences_within_budget():
+    counter = TokenCounter(CharTokenizer())
+    section = _section(" ".join(SENTENCES[:3]) + "\n" + "\n".join(SENTENCES[3:]))
+
+    chunks = make_chunks(
+        [section], max_tokens=40, overlap_tokens=10, token_counter=counter
+    )
+
+    assert [chunk.text for chunk in chunks] == [
+        "Kargo yola çıktı. Teslimat iki gün sürer!",
+        "Adres değişikliği mümkün mü? Evet.",
+        "Evet. Şube hafta içi açıktır.",
+    ]
+    assert all(counter.count(chunk.text) <= 40 for chunk in chunks)
+    assert [chunk.word_count for chunk in chunks] == [7, 5, 5]
+    assert [chunk.chunk_id for chunk in chunks][-1] == "doc#sss#2"
+
+
+def test_long_sentences_fall_back_to_word_runs():
+    counter = TokenCounter()
+    section = _section(" ".join(["kargotakip"] * 12))
+
+    chunks = make_chunks(
+        [section], max_tokens=10, overlap_tokens=0, token_counter=counter
+    )
+
+    # Yerel yaklaşım "kargotakip" kelimesini 3 parça sayar
+    assert counter.count("kargotakip") == 3
+    assert [chunk.word_count for chunk in chunks] == [3, 3, 3, 3]
+
+
+def test_token_counts_are_cached_per_section():
+    tokenizer = CharTokenizer()
+    counter = TokenCounter(tokenizer, cache_size=1)
+    sections = [_section(" ".join(SENTENCES)), _section("Tek cümle.")]
+
+    for budget in (20, 40, 120):  # 20 tokenda uzun cümleler kelimelere bölünür
+        make_chunks(sections[:1], max_tokens=budget, token_counter=counter)
+    calls = tokenizer.calls
+    for budget in (20, 40, 120):
+        make_chunks(sections[:1], max_tokens=budget, token_counter=counter)
+    assert tokenizer.calls == calls
+
+    make_chunks(sections, max_tokens=40, token_counter=counter)
+    make_chunks(sections[:1], max_tokens=40, token_counter=counter)
+    assert tokenizer.calls == calls + 1 + len(SENTENCES)
+
+
+def test_streamed_lines_match_splitlines(tmp_path):
+    text = "# Başlık\fİlk satır.\n## Alt\u2028Satır\viki\x85üç.\r\n# Son\u2029Bitti.\n"
+    path = tmp_path / "ayraclar.md"
+    path.write_text(text, encoding="utf-8", newline="")
+
+    sections = list(iter_markdown_sections(path))
+
+    assert [section.path for section in sections] == [
+        ["Başlık"],
+        ["Başlık", "Alt"],
+        ["Son"],
+    ]
+    assert sections[1].content == "Satır\niki\nüç."
+    assert sections[-1].end_line == len(text.splitlines())
+
+
+def test_words_over_budget_are_cut_into_pieces():
+    counter = TokenCounter(CharTokenizer())
+    section = _section("kargotakipnumarası kısa")
+
+    chunks = make_chunks(
+        [section], max_tokens=4, overlap_tokens=0, token_counter=counter
+    )
+
+    assert [chunk.text for chunk in chunks] == [
+        "karg",
+        "otak",
+        "ipnu",
+        "mara",
+        "sı",
+        "kısa",
+    ]
+    assert all(counter.count(chunk.text) <= 4 for chunk in chunks)
+    # Yerel yaklaşımda da 40 harflik kelime bütçeyi aşan parça üretmez
+    local = TokenCounter()
+    assert [tokens for _text, tokens, _words in local.split_words("x" * 40, 3)] == [
+        3,
+        3,
+        3,
+        1,
+    ]
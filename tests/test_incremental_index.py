@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import pytest
+
+from cargo_ai.documentation import DocumentChunk
+from cargo_ai.incremental_index import IncrementalIndex
+from cargo_ai.qa_generation import generate_questions
+from cargo_ai.rag_pipeline import HybridResponder
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    _qa_items, chunks = generate_questions(Path("docs/source_corpus"))
+    return chunks
+
+
+def _replace_text(chunk, text):
+    return DocumentChunk(
+        chunk.chunk_id,
+        chunk.document_id,
+        chunk.section_path,
+        text,
+        len(text.split()),
+        chunk.start_line,
+        chunk.end_line,
+    )
+
+
+def _ranking(index, query):
+    return [(r.chunk.chunk_id, round(r.score, 9)) for r in index.retrieve(query)]
+
+
+def test_updates_match_a_full_rebuild_after_compaction(corpus):
+    index = IncrementalIndex()
+    index.build(corpus[:-3])
+
+    changed = _replace_text(corpus[0], "uzay kargosu için özel teslimat koşulları")
+    assert index.add(corpus) == 3
+    assert index.add(corpus) == 0  # Değişmeyen chunk'lar atlanır
+    assert index.add([changed]) == 1
+    assert index.remove([corpus[1].chunk_id, "olmayan#chunk"]) == 1
+
+    # Silinen ve eski sürümü değişen chunk sorgularda görünmez
+    hits = [r.chunk.chunk_id for r in index.retrieve("uzay kargosu", top_k=10)]
+    assert hits == [changed.chunk_id]
+    assert corpus[1].chunk_id not in {
+        r.chunk.chunk_id for r in index.retrieve(corpus[1].text, top_k=20)
+    }
+    assert index.live_count == len(corpus) - 1
+    assert index.needs_compaction
+
+    index.compact()
+    assert len(index.delta) == 0
+    assert not index.needs_compaction
+
+    rebuilt = IncrementalIndex()
+    rebuilt.build([changed, *corpus[2:]])
+    for query in ("Standart teslimat iade", "uzay kargosu", "iptal süreci"):
+        assert _ranking(index, query) == _ranking(rebuilt, query)
+
+
+def test_save_and_load_keep_delta_and_tombstones(corpus, tmp_path):
+    index = IncrementalIndex()
+    index.build(corpus[:-1])
+    index.add([corpus[-1]])
+    index.remove([corpus[0].chunk_id])
+    index.save(tmp_path)
+
+    loaded = IncrementalIndex.load(tmp_path)
+
+    assert sorted(loaded.chunk_ids()) == sorted(index.chunk_ids())
+    for query in ("Standart teslimat süresi ne kadar?", corpus[-1].text):
+        assert _ranking(loaded, query) == _ranking(index, query)
+
+    loaded.compact()
+    loaded.save(tmp_path)
+    reopened = IncrementalIndex.load(tmp_path)
+    assert len(reopened.delta) == 0
+    assert reopened.live_count == len(corpus) - 1
+
+
+def test_plugs_into_hybrid_responder(corpus):
+    index = IncrementalIndex()
+    index.build(corpus)
+
+    responder = HybridResponder(index, min_score=0.22)
+
+    answer = responder.answer("Standart teslimat süresi ne kadar?")
+    assert answer is not None
+    assert "2-4 iş günü" in answer
+    assert responder.answer("Ürünlerin fiyatı ne kadar?") is None
+
+
+def test_save_swaps_directory_and_links_unchanged_segments(corpus, tmp_path):
+    index_dir = tmp_path / "index"
+    index = IncrementalIndex()
+    index.build(corpus[:-1])
+    index.save(index_dir)
+
+    reader = IncrementalIndex.load(index_dir)
+    expected = _ranking(reader, "Standart teslimat süresi ne kadar?")
+    counts_file = index_dir / "main" / "counts_data.npy"
+    inode = counts_file.stat().st_ino
+
+    writer = IncrementalIndex.load(index_dir)
+    writer.add([corpus[-1]])
+    writer.save(index_dir)
+
+    # Ana segment değişmediği için yeniden yazılmaz, yeni dizine bağlanır
+    assert counts_file.stat().st_ino == inode
+    assert _ranking(reader, "Standart teslimat süresi ne kadar?") == expected
+    assert [path.name for path in tmp_path.iterdir()] == ["index"]
+    assert IncrementalIndex.load(index_dir).live_count == len(corpus)
+
+
+def test_compacting_away_every_chunk_leaves_an_empty_index(corpus, tmp_path):
+    index = IncrementalIndex()
+    index.build(corpus)
+    index.remove(chunk.chunk_id for chunk in corpus)
+    index.compact()
+    index.save(tmp_path)
+
+    loaded = IncrementalIndex.load(tmp_path)
+
+    assert loaded.live_count == 0 and len(loaded.main) == 0
+    assert loaded.retrieve("Standart teslimat süresi ne kadar?") == []
+    assert loaded.add(corpus[:1]) == 1
+    assert loaded.chunk_ids() == [corpus[0].chunk_id]
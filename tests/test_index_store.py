@@ -0,0 +1,121 @@
+import json
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from cargo_ai.index_store import INDEX_FORMAT_VERSION, read_index
+from cargo_ai.qa_generation import generate_questions
+from cargo_ai.rag_pipeline import RAGPipeline
+
+
+@pytest.fixture(scope="module")
+def built_pipeline():
+    _qa_items, chunks = generate_questions(Path("docs/source_corpus"))
+    pipeline = RAGPipeline()
+    pipeline.build(chunks)
+    return pipeline
+
+
+def test_saved_index_round_trips_without_pickle(built_pipeline, tmp_path):
+    index_dir = built_pipeline.save(tmp_path)
+
+    assert index_dir == tmp_path / RAGPipeline.INDEX_DIRNAME
+    assert not list(index_dir.glob("*.pkl"))
+
+    loaded = RAGPipeline()
+    loaded.load(index_dir)
+
+    assert len(loaded.chunks) == len(built_pipeline.chunks)
+    assert loaded.chunks[-1] == built_pipeline.chunks[-1]
+    for query in ("Standart teslimat süresi ne kadar?", "iade süreci"):
+        expected = built_pipeline.retrieve(query)
+        actual = loaded.retrieve(query)
+        assert [r.chunk.chunk_id for r in actual] == [
+            r.chunk.chunk_id for r in expected
+        ]
+        assert [r.score for r in actual] == pytest.approx([r.score for r in expected])
+
+
+def _memmap_base(array):
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array
+
+
+def test_index_arrays_are_memory_mapped(built_pipeline, tmp_path):
+    index = read_index(built_pipeline.save(tmp_path))
+
+    for array in (index.matrix.data, index.matrix.indices, index.matrix.indptr):
+        assert _memmap_base(array) is not None
+        assert not array.flags.writeable
+    assert index.manifest["version"] == INDEX_FORMAT_VERSION
+
+
+def test_unknown_index_version_is_rejected(built_pipeline, tmp_path):
+    index_dir = built_pipeline.save(tmp_path)
+    manifest_path = index_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest["version"] = INDEX_FORMAT_VERSION + 1
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="version"):
+        RAGPipeline().load(index_dir)
+
+
+def test_legacy_pickle_index_still_loads(built_pipeline, tmp_path):
+    legacy_path = tmp_path / "tfidf_index.pkl"
+    with legacy_path.open("wb") as fp:
+        pickle.dump(
+            {
+                "chunks": built_pipeline.chunks,
+                "vectorizer": built_pipeline.embedder.vectorizer,
+                "matrix": built_pipeline.matrix,
+            },
+            fp,
+        )
+
+    loaded = RAGPipeline()
+    with pytest.warns(DeprecationWarning):
+        loaded.load(legacy_path)
+
+    assert loaded.retrieve("Standart teslimat süresi ne kadar?")
+
+
+def test_rewriting_an_index_keeps_loaded_readers_valid(built_pipeline, tmp_path):
+    index_dir = built_pipeline.save(tmp_path)
+    reader = RAGPipeline()
+    reader.load(index_dir)
+    expected = [r.chunk.chunk_id for r in reader.retrieve("iade süreci")]
+
+    built_pipeline.save(tmp_path)
+
+    # Eski eşlemeler silinen dosyalara bağlı kalır, yeni dizin ise tam yazılmıştır
+    assert [r.chunk.chunk_id for r in reader.retrieve("iade süreci")] == expected
+    assert sorted(p.name for p in tmp_path.iterdir()) == [RAGPipeline.INDEX_DIRNAME]
+    assert read_index(index_dir).manifest["version"] == INDEX_FORMAT_VERSION
+
+
+def test_term_major_matrix_is_mapped_from_disk(built_pipeline, tmp_path):
+    index_dir = built_pipeline.save(tmp_path)
+    loaded = RAGPipeline()
+    loaded.load(index_dir)
+
+    assert loaded.retrieve("iade süreci")
+    term_matrix = loaded._term_major()
+    assert term_matrix.format == "csc"
+    for array in (term_matrix.data, term_matrix.indices, term_matrix.indptr):
+        assert _memmap_base(array) is not None
+
+    # term_major bayrağı olmayan indeksler matrisi bellekte kurmaya devam eder
+    manifest_path = index_dir / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    del manifest["term_major"]
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    legacy = RAGPipeline()
+    legacy.load(index_dir)
+    assert _memmap_base(legacy._term_major().data) is None
+    assert [r.chunk.chunk_id for r in legacy.retrieve("iade süreci")] == [
+        r.chunk.chunk_id for r in loaded.retrieve("iade süreci")
+    ]
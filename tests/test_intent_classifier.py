@@ -0,0 +1,136 @@
+import os
+import random
+import re
+import sys
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from intent_classifier import (  # noqa: E402
+    CANCEL_KEYWORDS,
+    POLICY_KEYWORDS,
+    POLICY_NEGATIVE_KEYWORDS,
+    RETURN_KEYWORDS,
+    IntentClassifier,
+    KeywordScanner,
+)
+
+
+def legacy_decisions(prompt):
+    """Sınıflandırıcı öncesi cargo_chat kararları (referans)"""
+    lowered = prompt.lower()
+    match = re.search(r"\b(TR\d{9})\b", prompt)
+    tracking = match.group(1) if match else None
+
+    action = None
+    if tracking:
+        if any(k in lowered for k in RETURN_KEYWORDS) and (
+            not any(k in lowered for k in ["iptal et", "vazgeç"])
+            or "teslim" in lowered
+            or "aldım" in lowered
+        ):
+            action = "return"
+        elif any(k in lowered for k in CANCEL_KEYWORDS) and not any(
+            k in lowered for k in ["iade", "döndür"]
+        ):
+            action = "cancel"
+
+    return (
+        action,
+        tracking if action else None,
+        tracking,
+        any(k in lowered for k in POLICY_KEYWORDS),
+        any(k in lowered for k in POLICY_NEGATIVE_KEYWORDS),
+    )
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier(
+        return_keywords=RETURN_KEYWORDS,
+        cancel_keywords=CANCEL_KEYWORDS,
+        policy_keywords=POLICY_KEYWORDS,
+        policy_negative_keywords=POLICY_NEGATIVE_KEYWORDS,
+    )
+
+
+def decisions(classifier, prompt):
+    intent = classifier.classify(prompt)
+    return (
+        intent.action,
+        intent.tracking_number if intent.action else None,
+        intent.tracking_number,
+        intent.is_policy,
+        intent.is_policy_negative,
+    )
+
+
+class TestKeywordScanner:
+    """Tek geçişli anahtar kelime taramasının testleri"""
+
+    def test_reports_nested_and_overlapping_keywords(self):
+        scanner = KeywordScanner(
+            {"cancel": ["iptal", "durdur"], "phrase": ["iptal et"], "short": ["ur"]}
+        )
+
+        def groups(text):
+            return scanner.groups(scanner.scan(text))
+
+        assert groups("kargoyu iptal etmek") == {"cancel", "phrase"}
+        assert groups("durdurun") == {"cancel", "short"}
+        assert groups("hiçbiri") == frozenset()
+
+    def test_rejects_empty_keywords(self):
+        with pytest.raises(ValueError):
+            KeywordScanner({"return": ["iade", ""]})
+
+
+class TestIntentClassifier:
+    """Derlenmiş sınıflandırıcının eski kararlarla birebir aynılığı"""
+
+    @pytest.mark.parametrize(
+        "prompt",
+        [
+            "TR123456789 iade et",
+            "TR123456789 döndür",
+            "TR987654321 iptal et",
+            "TR123456789 nerede",
+            "Normal soru",
+            "TR123456789 teslim aldım ama vazgeçtim, iade etmek istiyorum",
+            "TR123456789 siparişi durdurun lütfen",
+            "TR123456789 iptal et ve iade et",
+            "İADE süresi kaç gün? TR123456789",
+            "Kredi kartı ile ödeme yaptım, fiyat farkı iade edilir mi?",
+            "tr123456789 iptal",
+            "TR123456789 TR987654321 vazgeç",
+        ],
+    )
+    def test_matches_legacy_examples(self, classifier, prompt):
+        assert decisions(classifier, prompt) == legacy_decisions(prompt)
+
+    def test_matches_legacy_on_random_messages(self, classifier):
+        rng = random.Random(0)
+        vocabulary = sorted(
+            set(POLICY_KEYWORDS + POLICY_NEGATIVE_KEYWORDS + RETURN_KEYWORDS)
+            | set(CANCEL_KEYWORDS)
+            | {"teslim", "aldım", "teslimat", "kargo", "nerede", "İade", "DUR"}
+            | {"TR123456789", "TR987654321", "TR12345678", "TR1234567890"}
+            | {"xTR123456789", "_TR123456789", "çTR123456789", "merhaba", "ödeme"}
+        )
+        for _ in range(3000):
+            words = rng.choices(vocabulary, k=rng.randint(0, 6))
+            glue = rng.choice([" ", "", ", ", "-"])
+            prompt = glue.join(words)
+            assert decisions(classifier, prompt) == legacy_decisions(prompt), prompt
+            assert classifier.classify(prompt).tracking_numbers == tuple(
+                re.findall(r"\b(TR\d{9})\b", prompt)
+            ), prompt
+
+    def test_returns_all_tracking_numbers(self, classifier):
+        intent = classifier.classify("TR111111111, TR222222222 ve TR333333333 nerede?")
+
+        assert intent.tracking_numbers == ("TR111111111", "TR222222222", "TR333333333")
+        assert intent.tracking_number == "TR111111111"
+        assert intent.action is None
@@ -0,0 +1,189 @@
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from llm_batching import BatchScheduler, _Request  # noqa: E402
+
+
+class FakePipe:
+    """Her çağrıdaki istem listesini kaydeden sahte pipeline"""
+
+    def __init__(self, gate=None, error=None, outputs=None, delay=0.0):
+        self.tokenizer = SimpleNamespace(pad_token=None, eos_token="<eos>")
+        self.calls = []
+        self.gate = gate
+        self.error = error
+        self.outputs = outputs
+        self.delay = delay
+
+    def __call__(self, prompts, batch_size=None, **options):
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        self.calls.append((list(prompts), batch_size, options))
+        if self.error is not None:
+            raise self.error
+        if self.outputs is not None:
+            return self.outputs
+        return [[{"generated_text": f" cevap: {prompt} "}] for prompt in prompts]
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def factory(pipe, **kwargs):
+        scheduler = BatchScheduler(pipe, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield factory
+    for scheduler in schedulers:
+        scheduler.close(5)
+
+
+class TestBatchScheduler:
+    """Mikro-toplama zamanlayıcısı testleri"""
+
+    def test_concurrent_requests_share_one_call(self, make_scheduler):
+        pipe = FakePipe()
+        scheduler = make_scheduler(pipe, max_batch_size=4, max_wait_ms=500)
+
+        results = {}
+
+        def ask(index):
+            results[index] = scheduler.generate(f"soru {index}", max_new_tokens=300)
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert results == {i: f"cevap: soru {i}" for i in range(4)}
+        assert len(pipe.calls) == 1
+        prompts, batch_size, options = pipe.calls[0]
+        assert sorted(prompts) == [f"soru {i}" for i in range(4)]
+        assert batch_size == 4 and options == {"max_new_tokens": 300}
+        assert scheduler.stats()["largest_batch"] == 4
+        assert pipe.tokenizer.padding_side == "left"
+        assert pipe.tokenizer.pad_token == "<eos>"
+
+    def test_splits_by_batch_size_and_options(self, make_scheduler):
+        gate = threading.Event()
+        pipe = FakePipe(gate=gate)
+        scheduler = make_scheduler(pipe, max_batch_size=2, max_wait_ms=200)
+
+        # İlk çağrı kapıda beklerken diğerleri kuyrukta birikir
+        first = scheduler.submit("ilk")
+        futures = [scheduler.submit(f"s{i}", temperature=0.7) for i in range(3)]
+        futures.append(scheduler.submit("farklı", temperature=0.1))
+        gate.set()
+
+        assert first.result(5) == "cevap: ilk"
+        assert [f.result(5) for f in futures] == [
+            "cevap: s0",
+            "cevap: s1",
+            "cevap: s2",
+            "cevap: farklı",
+        ]
+        assert all(len(prompts) <= 2 for prompts, _size, _opts in pipe.calls)
+        for prompts, _size, options in pipe.calls:
+            if "farklı" in prompts:
+                assert prompts == ["farklı"] and options == {"temperature": 0.1}
+
+    def test_errors_reach_every_waiting_request(self, make_scheduler):
+        pipe = FakePipe(error=RuntimeError("bellek yetersiz"))
+        scheduler = make_scheduler(pipe, max_batch_size=4, max_wait_ms=50)
+
+        futures = [scheduler.submit(f"soru {i}") for i in range(3)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="bellek yetersiz"):
+                future.result(5)
+
+    def test_malformed_output_fails_requests_and_keeps_worker(self, make_scheduler):
+        pipe = FakePipe(outputs=[[{"text": "eksik alan"}], [{"generated_text": 3}]])
+        scheduler = make_scheduler(pipe, max_batch_size=2, max_wait_ms=200)
+
+        futures = [scheduler.submit("a"), scheduler.submit("b")]
+        for future in futures:
+            with pytest.raises(KeyError):
+                future.result(5)
+
+        # İş parçacığı ayakta kalır, sonraki istekler cevaplanır
+        pipe.outputs = None
+        assert scheduler.generate("c", timeout=5) == "cevap: c"
+
+    def test_generate_times_out_and_cancels_queued_request(self, make_scheduler):
+        gate = threading.Event()
+        scheduler = make_scheduler(FakePipe(gate=gate), max_batch_size=1, max_wait_ms=0)
+
+        scheduler.submit("çalışan")
+        with pytest.raises(TimeoutError):
+            scheduler.generate("bekleyen", timeout=0.1)
+        gate.set()
+        assert scheduler.generate("sonraki", timeout=5) == "cevap: sonraki"
+
+    def test_close_fails_requests_left_behind(self, make_scheduler):
+        gate = threading.Event()
+        scheduler = make_scheduler(FakePipe(gate=gate), max_batch_size=1, max_wait_ms=0)
+
+        running = scheduler.submit("çalışan")
+        queued = scheduler.submit("kuyrukta")
+        closer = threading.Thread(target=scheduler.close, args=(5,))
+        closer.start()
+        while scheduler._queue.qsize() < 2:  # _STOP kuyruğa girene kadar
+            time.sleep(0.01)
+        # close sırasında kontrolü geçmiş bir istek durdurma işaretinin arkasına düşer
+        behind = Future()
+        scheduler._queue.put(_Request("arkada", (), behind))
+        gate.set()
+        closer.join(5)
+
+        assert running.result(5) == "cevap: çalışan"
+        assert queued.result(5) == "cevap: kuyrukta"
+        with pytest.raises(RuntimeError, match="kapatıldı"):
+            behind.result(5)
+        with pytest.raises(RuntimeError, match="kapatıldı"):
+            scheduler.submit("sonra")
+
+    def test_generate_timeout_covers_queueing_and_waiting(self, make_scheduler):
+        scheduler = make_scheduler(
+            FakePipe(delay=0.3), max_batch_size=1, max_wait_ms=0, max_queue_size=1
+        )
+        scheduler.submit("çalışan")
+        time.sleep(0.05)
+        scheduler.submit("kuyrukta")
+
+        started = time.monotonic()
+        # Kuyrukta ~0.25 sn beklenir; kalan süre cevap beklemeye harcanır
+        with pytest.raises(TimeoutError):
+            scheduler.generate("geç", timeout=0.5)
+        assert time.monotonic() - started < 0.7
+
+    def test_queue_depth_is_bounded(self, make_scheduler):
+        gate = threading.Event()
+        scheduler = make_scheduler(
+            FakePipe(gate=gate), max_batch_size=1, max_wait_ms=0, max_queue_size=1
+        )
+
+        scheduler.submit("çalışan")
+        # Çalışan istek kuyruktan alınana kadar kısa süre beklenebilir
+        scheduler.submit("kuyrukta", timeout=1)
+        with pytest.raises(queue.Full):
+            scheduler.submit("fazla", timeout=0.05)
+        gate.set()
+
+    def test_rejects_invalid_settings(self):
+        with pytest.raises(ValueError):
+            BatchScheduler(FakePipe(), max_batch_size=0)
@@ -0,0 +1,94 @@
+import os
+import queue
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import llm_streaming  # noqa: E402
+from llm_streaming import stream_pipeline  # noqa: E402
+
+_END = object()
+
+
+class FakeStreamer:
+    """TextIteratorStreamer gibi kuyruktan parça okuyan sahte streamer"""
+
+    def __init__(self, tokenizer, **kwargs):
+        self.kwargs = kwargs
+        self.queue = queue.Queue()
+
+    def put_text(self, text):
+        self.queue.put(text)
+
+    def end(self):
+        self.queue.put(_END)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get(timeout=5)
+            if item is _END:
+                return
+            yield item
+
+
+class FakePipe:
+    """Tokenları streamer'a arka plan iş parçacığından yazan sahte pipeline"""
+
+    tokenizer = object()
+
+    def __init__(self, tokens, error=None):
+        self.tokens = tokens
+        self.error = error
+        self.calls = []
+
+    def __call__(self, prompt, streamer=None, **kwargs):
+        self.calls.append(kwargs)
+        for token in self.tokens:
+            streamer.put_text(token)
+        if self.error is not None:
+            raise self.error
+        streamer.end()
+        return [{"generated_text": "".join(self.tokens)}]
+
+
+@pytest.fixture
+def fake_streamer():
+    with patch.object(llm_streaming, "_streamer_class", return_value=FakeStreamer):
+        yield
+
+
+class TestStreamPipeline:
+    """stream_pipeline testleri"""
+
+    def test_yields_tokens_and_reports_ttft(self, fake_streamer):
+        pipe = FakePipe(["Kargonuz", " yolda", ""])
+        metrics = []
+
+        chunks = list(
+            stream_pipeline(
+                pipe, "soru", on_complete=metrics.append, max_new_tokens=300
+            )
+        )
+
+        assert chunks == ["Kargonuz", " yolda"]
+        assert pipe.calls == [{"max_new_tokens": 300}]
+        assert metrics[0].chunks == 2
+        assert 0 <= metrics[0].ttft_seconds <= metrics[0].total_seconds
+
+    def test_generation_error_is_raised_to_consumer(self, fake_streamer):
+        pipe = FakePipe(["Kargo"], error=RuntimeError("bellek yetersiz"))
+
+        stream = stream_pipeline(pipe, "soru")
+        assert next(stream) == "Kargo"
+        with pytest.raises(RuntimeError, match="bellek yetersiz"):
+            next(stream)
+
+    def test_falls_back_to_single_chunk_without_tokenizer(self):
+        pipe = MagicMock(spec=["__call__"])
+        pipe.return_value = [{"generated_text": " Tek parça cevap "}]
+
+        assert list(stream_pipeline(pipe, "soru")) == ["Tek parça cevap"]
@@ -0,0 +1,41 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import model_backends  # noqa: E402
+from model_backends import available_backends, build_pipeline  # noqa: E402
+
+
+class TestBuildPipeline:
+    """Model arka ucu seçimi testleri"""
+
+    def test_dispatches_to_selected_backend(self):
+        builder = MagicMock(return_value="pipe")
+        with patch.dict(model_backends.BACKENDS, {"int8": builder}):
+            assert build_pipeline("int8", "model-id") == "pipe"
+        builder.assert_called_once_with("model-id")
+        assert set(available_backends()) == {"fp32", "int8", "bf16", "onnx"}
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError, match="fp16"):
+            build_pipeline("fp16")
+
+    def test_bf16_falls_back_to_fp32_without_cpu_support(self):
+        with patch.object(
+            model_backends, "bf16_supported", return_value=False
+        ), patch.object(
+            model_backends, "_build_fp32", return_value="fp32-pipe"
+        ) as fp32:
+            assert build_pipeline("bf16", "model-id") == "fp32-pipe"
+        fp32.assert_called_once_with("model-id")
+
+    def test_onnx_requires_optimum(self):
+        with patch.dict(
+            sys.modules, {"optimum": None, "optimum.onnxruntime": None}
+        ), pytest.raises(RuntimeError, match="optimum"):
+            build_pipeline("onnx")
@@ -1,5 +1,8 @@
+import subprocess
+import sys
 from pathlib import Path
 
+from cargo_ai.documentation import DocumentChunk
 from cargo_ai.qa_generation import generate_datasets, generate_questions
 from cargo_ai.rag_pipeline import HybridResponder, RAGPipeline
 
@@ -34,3 +37,47 @@ def test_rag_pipeline_retrieval(tmp_path):
 
     negative_answer = responder.answer("Ürünlerin fiyatı ne kadar?")
     assert negative_answer is None
+
+
+def test_rag_pipeline_import_is_lazy():
+    # scikit-learn yalnızca indeks kurulurken/sorgulanırken yüklenmeli
+    code = "import sys, cargo_ai.rag_pipeline; print('sklearn' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_retrieve_batch_matches_single_queries():
+    _qa_items, chunks = generate_questions(Path("docs/source_corpus"))
+    pipeline = RAGPipeline()
+    pipeline.build(chunks)
+
+    queries = ["Standart teslimat süresi ne kadar?", "   ", "iade süreci", "xyz"]
+    batch = pipeline.retrieve_batch(queries, top_k=4)
+
+    assert batch[1] == []
+    for query, results in zip(queries, batch):
+        single = pipeline.retrieve(query, top_k=4)
+        assert [r.chunk.chunk_id for r in results] == [r.chunk.chunk_id for r in single]
+    scores = [r.score for r in batch[0]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_ties_and_zero_scores_follow_chunk_order():
+    texts = ["kargo iade", "kargo iade", "teslimat", "fatura", "kargo iade"]
+    chunks = [
+        DocumentChunk(f"c{i}", "doc", ["Bölüm"], text, len(text.split()), 0, 0)
+        for i, text in enumerate(texts)
+    ]
+    pipeline = RAGPipeline()
+    pipeline.build(chunks)
+
+    # Eşit skorlu üç chunk'tan düşük indeksli ikisi, sıfır skorlular indeks sırasıyla
+    assert [r.chunk.chunk_id for r in pipeline.retrieve("iade", top_k=2)] == [
+        "c0",
+        "c1",
+    ]
+    results = pipeline.retrieve("iade", top_k=10)
+    assert [r.chunk.chunk_id for r in results] == ["c0", "c1", "c4", "c2", "c3"]
+    assert [r.score for r in results[3:]] == [0.0, 0.0]
@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts"))
+
+from build_rag_index import (  # noqa: E402
+    _load_chunks,
+    chunk_file_version,
+    update_incremental_index,
+)
+from prepare_documents import delta_path_for, prepare_documents  # noqa: E402
+
+from cargo_ai.incremental_index import IncrementalIndex  # noqa: E402
+
+
+def _corpus(tmp_path):
+    source = tmp_path / "source"
+    shutil.copytree("docs/source_corpus", source)
+    return source
+
+
+def _delta(output):
+    return json.loads(delta_path_for(output).read_text(encoding="utf-8"))
+
+
+def test_rerun_only_reparses_changed_files(tmp_path):
+    source = _corpus(tmp_path)
+    output = tmp_path / "chunks.jsonl"
+
+    first = prepare_documents(source, output, workers=1)
+    baseline = output.read_text(encoding="utf-8")
+    assert first["reparsed_files"] == first["files"]
+    assert _delta(output)["full"]
+
+    second = prepare_documents(source, output, workers=1)
+    assert second["reparsed_files"] == 0
+    assert output.read_text(encoding="utf-8") == baseline
+    delta = _delta(output)
+    assert {key: delta[key] for key in ("full", "added", "removed")} == {
+        "full": False,
+        "added": [],
+        "removed": [],
+    }
+    assert delta["base"] == delta["target"] == chunk_file_version(output)
+
+    target = sorted(source.glob("*.md"))[0]
+    target.write_text(
+        target.read_text(encoding="utf-8") + "\n## Yeni Bölüm\nUzay kargosu.\n",
+        encoding="utf-8",
+    )
+    third = prepare_documents(source, output, workers=1)
+    delta = _delta(output)
+    assert third["reparsed_files"] == 1
+    assert delta["added"] and not delta["full"]
+    assert all(chunk_id.startswith(target.stem) for chunk_id in delta["added"])
+
+    target.unlink()
+    prepare_documents(source, output, workers=1)
+    delta = _delta(output)
+    assert delta["removed"] and not delta["added"]
+
+
+def test_edited_output_is_rebuilt_instead_of_copied(tmp_path):
+    source = _corpus(tmp_path)
+    output = tmp_path / "chunks.jsonl"
+    prepare_documents(source, output)
+    baseline = output.read_text(encoding="utf-8")
+
+    # Satır sayısı aynı kalsa da içerik manifest'teki özetle uyuşmaz
+    output.write_text(baseline.replace("kargo", "KARGO"), encoding="utf-8")
+    rerun = prepare_documents(source, output)
+
+    assert rerun["reparsed_files"] == rerun["files"]
+    assert output.read_text(encoding="utf-8") == baseline
+    assert _delta(output)["full"]
+
+
+def test_process_pool_output_matches_serial(tmp_path):
+    source = _corpus(tmp_path)
+    serial = tmp_path / "serial.jsonl"
+    pooled = tmp_path / "pooled.jsonl"
+
+    prepare_documents(source, serial, workers=1)
+    prepare_documents(source, pooled, workers=2)
+
+    assert serial.read_bytes() == pooled.read_bytes()
+
+
+def test_delta_updates_the_incremental_index(tmp_path):
+    source = _corpus(tmp_path)
+    output = tmp_path / "chunks.jsonl"
+    index_dir = tmp_path / "index"
+
+    def sync():
+        prepare_documents(source, output, workers=1)
+        chunks = _load_chunks(output)
+        summary = update_incremental_index(
+            chunks,
+            index_dir,
+            delta=_delta(output),
+            source_version=chunk_file_version(output),
+        )
+        ids = sorted(IncrementalIndex.load(index_dir).chunk_ids())
+        assert ids == sorted(chunk.chunk_id for chunk in chunks)
+        return summary
+
+    sync()
+    extra = source / "uzay_kargosu.md"
+    extra.write_text(
+        "# Uzay Kargosu\n\n## Teslimat\nUzay kargosu ayda bir gönderilir.\n",
+        encoding="utf-8",
+    )
+    assert sync() == {"added": 1, "removed": 0, "compacted": False}
+
+    extra.unlink()
+    assert sync()["removed"] == 1
+
+
+def test_delta_from_a_missed_run_falls_back_to_a_full_diff(tmp_path):
+    source = _corpus(tmp_path)
+    output = tmp_path / "chunks.jsonl"
+    index_dir = tmp_path / "index"
+
+    def update():
+        chunks = _load_chunks(output)
+        update_incremental_index(
+            chunks,
+            index_dir,
+            delta=_delta(output),
+            source_version=chunk_file_version(output),
+        )
+        return chunks
+
+    prepare_documents(source, output, workers=1)
+    update()
+
+    # İndeks güncellenmeden iki hazırlık: ilk farkı yalnızca ilk delta içerir
+    extra = source / "uzay_kargosu.md"
+    extra.write_text("# Uzay Kargosu\n\n## Teslimat\nAyda bir.\n", encoding="utf-8")
+    prepare_documents(source, output, workers=1)
+    removed = sorted(source.glob("*.md"))[0]
+    removed.unlink()
+    prepare_documents(source, output, workers=1)
+    assert not _delta(output)["added"]
+
+    chunks = update()
+    index = IncrementalIndex.load(index_dir)
+    assert sorted(index.chunk_ids()) == sorted(chunk.chunk_id for chunk in chunks)
+    assert any(chunk_id.startswith("uzay_kargosu") for chunk_id in index.chunk_ids())
+    assert index.source_version == chunk_file_version(output)
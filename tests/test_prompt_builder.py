@@ -0,0 +1,168 @@
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from prompt_builder import PrefixCachedPipeline, PromptBuilder  # noqa: E402
+
+
+class WordTokenizer:
+    """Her kelimeyi bir token sayan sahte tokenizer"""
+
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+    def decode(self, ids, skip_special_tokens=False):
+        return " ".join(ids)
+
+
+def _history(*contents):
+    roles = ["user", "assistant"]
+    return [
+        {"role": roles[index % 2], "content": content}
+        for index, content in enumerate(contents)
+    ]
+
+
+class TestPromptBuilder:
+    """Token bütçeli prompt oluşturma testleri"""
+
+    def test_prefix_is_static_and_suffix_carries_request(self):
+        builder = PromptBuilder(WordTokenizer())
+
+        first = builder.build("nerede?", user_name="Ahmet", context="Kargo bilgisi:")
+        second = builder.build("ne zaman?", user_name="Ayşe", context="Kargo bilgisi:")
+
+        assert first.prefix == second.prefix == builder.prefix
+        assert "Ahmet" not in first.prefix
+        assert first.text.startswith(builder.prefix)
+        assert "Müşteri adı: Ahmet" in first.suffix
+        assert first.suffix.endswith("Kullanıcı sorusu: nerede?\n\nCevabın:")
+        assert first.history_text == ""
+
+    def test_history_fits_budget_keeping_newest_messages(self):
+        tokenizer = WordTokenizer()
+        base = PromptBuilder(tokenizer).build("soru", user_name="Ahmet", context="")
+        history = _history(
+            "TR111111111 nerede",
+            "kelime " * 50,
+            "TR222222222 ne durumda",
+            "yolda ilerliyor",
+        )
+
+        # Başlık (2) + son iki mesaj (3 + 4) + özet satırı (6) sığar; 10 tokena
+        # kısaltılan uzun mesaj (12) sığmaz
+        builder = PromptBuilder(
+            tokenizer, max_tokens=base.tokens + 18, max_message_tokens=10
+        )
+        built = builder.build("soru", user_name="Ahmet", context="", history=history)
+
+        assert built.tokens <= builder.max_tokens
+        assert "Asistan: yolda ilerliyor" in built.history_text
+        assert "Kullanıcı: TR222222222 ne durumda" in built.history_text
+        assert built.dropped_messages == 2
+        # Atılan mesajlardaki takip numaraları özet satırında kalır
+        assert "TR111111111" in built.history_text
+        assert "kelime" not in built.history_text
+
+    def test_long_messages_are_truncated(self):
+        builder = PromptBuilder(WordTokenizer(), max_message_tokens=3)
+        history = _history("bir iki üç dört beş")
+
+        built = builder.build("soru", user_name="Ahmet", context="", history=history)
+
+        assert "Kullanıcı: bir iki üç …" in built.history_text
+
+    def test_word_count_fallback_without_tokenizer(self):
+        builder = PromptBuilder(max_history_messages=2)
+        history = _history("eski", "daha eski", "yeni", "en yeni")
+
+        built = builder.build("soru", user_name="Ahmet", context="", history=history)
+
+        assert "eski" not in built.history_text.replace("en yeni", "")
+        assert built.history_text.endswith("Kullanıcı: yeni\nAsistan: en yeni")
+
+
+class TestPrefixCachedPipeline:
+    """Önek KV önbelleği sarmalayıcısının geri dönüş davranışı"""
+
+    def test_non_matching_prompts_go_to_pipeline(self):
+        pipe = MagicMock(return_value=[{"generated_text": "cevap"}])
+        wrapped = PrefixCachedPipeline(pipe, "SİSTEM\n\n")
+
+        assert wrapped("başka istem", max_new_tokens=5) == [{"generated_text": "cevap"}]
+        wrapped(["SİSTEM\n\nbir", "SİSTEM\n\niki"], batch_size=2)
+
+        assert pipe.call_count == 2
+        assert wrapped.prefix_hits == 0
+        assert wrapped.tokenizer is pipe.tokenizer
+
+    def test_disables_itself_when_prefix_cache_fails(self):
+        pipe = MagicMock(return_value=[{"generated_text": "cevap"}])
+        wrapped = PrefixCachedPipeline(pipe, "SİSTEM\n\n")
+
+        with patch.object(
+            wrapped, "_prefix_cache", side_effect=RuntimeError("desteklenmiyor")
+        ):
+            assert wrapped("SİSTEM\n\nsoru") == [{"generated_text": "cevap"}]
+
+        assert not wrapped.enabled
+        wrapped("SİSTEM\n\nsoru")
+        pipe.assert_called_with("SİSTEM\n\nsoru")
+
+    def test_falls_back_when_cached_generate_fails(self):
+        pipe = MagicMock(return_value=[{"generated_text": "cevap"}])
+        wrapped = PrefixCachedPipeline(pipe, "SİSTEM\n\n")
+
+        with patch.object(
+            wrapped, "_prefix_cache", return_value=("ids", "kv")
+        ), patch.object(
+            wrapped, "_generate", side_effect=TypeError("past_key_values")
+        ) as generate:
+            assert wrapped("SİSTEM\n\nsoru", max_new_tokens=5) == [
+                {"generated_text": "cevap"}
+            ]
+            wrapped("SİSTEM\n\nikinci")
+
+        assert generate.call_count == 1
+        assert not wrapped.enabled and wrapped.prefix_hits == 0
+        pipe.assert_called_with("SİSTEM\n\nikinci")
+
+    def test_other_generate_errors_retry_once_and_keep_cache(self):
+        pipe = MagicMock(return_value=[{"generated_text": "cevap"}])
+        wrapped = PrefixCachedPipeline(pipe, "SİSTEM\n\n")
+
+        with patch.object(
+            wrapped, "_prefix_cache", return_value=("ids", "kv")
+        ), patch.object(
+            wrapped, "_generate", side_effect=[RuntimeError("CUDA OOM"), "yanıt"]
+        ):
+            assert wrapped("SİSTEM\n\nsoru") == [{"generated_text": "cevap"}]
+            assert wrapped("SİSTEM\n\nikinci", return_full_text=False) == [
+                {"generated_text": "yanıt"}
+            ]
+
+        assert wrapped.enabled and wrapped.prefix_hits == 1
+        pipe.assert_called_once_with("SİSTEM\n\nsoru")
+
+    def test_failure_after_streaming_started_is_not_replayed(self):
+        pipe = MagicMock(return_value=[{"generated_text": "cevap"}])
+        wrapped = PrefixCachedPipeline(pipe, "SİSTEM\n\n")
+        streamer = MagicMock()
+
+        def generate(prompt, prefix_ids, past_key_values, *, streamer, **kwargs):
+            streamer.put("ilk token")
+            raise TypeError("yarıda kesildi")
+
+        with patch.object(
+            wrapped, "_prefix_cache", return_value=("ids", "kv")
+        ), patch.object(wrapped, "_generate", side_effect=generate):
+            with pytest.raises(TypeError):
+                wrapped("SİSTEM\n\nsoru", streamer=streamer)
+
+        streamer.put.assert_called_once_with("ilk token")
+        pipe.assert_not_called()
@@ -0,0 +1,127 @@
+import os
+import sys
+
+import pytest
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from response_cache import (  # noqa: E402
+    MemoryResponseStore,
+    ResponseCache,
+    SQLiteResponseStore,
+    normalize_question,
+    response_cache_key,
+)
+
+CARGO = {
+    "status": "Yolda",
+    "location": "Ankara",
+    "last_update": "2024-01-10 09:00",
+    "estimated_delivery": "2024-01-12",
+    "description": "Laptop",
+}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store_factory(request, tmp_path):
+    """Aynı testleri iki depo türüyle çalıştırır"""
+
+    def factory(maxsize=8, ttl_seconds=60.0, clock=None):
+        clock = clock or FakeClock()
+        if request.param == "memory":
+            return MemoryResponseStore(maxsize, ttl_seconds, clock=clock)
+        return SQLiteResponseStore(
+            str(tmp_path / "responses.db"), maxsize, ttl_seconds, clock=clock
+        )
+
+    return factory
+
+
+class TestCacheKey:
+    """Anahtar üretimi testleri"""
+
+    def test_normalizes_question(self):
+        assert normalize_question("  Kargom NEREDE?? ") == "kargom nerede"
+        assert response_cache_key(
+            "Kargom nerede?", {"TR123456789": CARGO}
+        ) == response_cache_key("kargom   nerede", {"TR123456789": CARGO})
+
+    def test_depends_on_cargo_fields_and_history(self):
+        key = response_cache_key("nerede", {"TR123456789": CARGO})
+
+        moved = dict(CARGO, location="İzmir")
+        assert key != response_cache_key("nerede", {"TR123456789": moved})
+        assert key != response_cache_key(
+            "nerede", {"TR123456789": CARGO}, history_text="Kullanıcı: merhaba"
+        )
+        assert key != response_cache_key(
+            "nerede", {"TR123456789": CARGO}, user_name="Ayşe"
+        )
+
+
+class TestResponseCache:
+    """Bellek ve SQLite depolarıyla önbellek davranışı"""
+
+    def test_hit_and_miss_counters(self, store_factory):
+        cache = ResponseCache(store_factory())
+        cargos = {"TR123456789": CARGO}
+        calls = []
+
+        def generate():
+            calls.append(1)
+            return "Kargonuz Ankara'da"
+
+        assert cache.get_or_generate("k", cargos, generate) == "Kargonuz Ankara'da"
+        assert cache.get_or_generate("k", cargos, generate) == "Kargonuz Ankara'da"
+
+        assert len(calls) == 1
+        assert cache.stats() == {"hits": 1, "misses": 1, "invalidations": 0, "size": 1}
+
+    def test_last_update_change_invalidates_entry(self, store_factory):
+        cache = ResponseCache(store_factory())
+        cache.set("k", {"TR123456789": CARGO}, "eski cevap")
+
+        updated = {"TR123456789": dict(CARGO, last_update="2024-01-11 10:00")}
+        assert cache.get("k", updated) is None
+        assert cache.invalidations == 1
+        # Kayıt silinir; eski durum geri gelse bile cevap yeniden üretilir
+        assert cache.get("k", {"TR123456789": CARGO}) is None
+
+    def test_lru_and_ttl_eviction(self, store_factory):
+        clock = FakeClock()
+        cache = ResponseCache(store_factory(maxsize=2, ttl_seconds=10, clock=clock))
+        cargos = {"TR123456789": CARGO}
+
+        cache.set("a", cargos, "A")
+        clock.now += 1
+        cache.set("b", cargos, "B")
+        clock.now += 1
+        assert cache.get("a", cargos) == "A"  # a en son kullanılan olur
+        clock.now += 1
+        cache.set("c", cargos, "C")
+
+        assert cache.get("b", cargos) is None
+        assert cache.get("a", cargos) == "A"
+
+        clock.now += 11
+        assert cache.get("c", cargos) is None
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    cargos = {"TR123456789": CARGO}
+
+    ResponseCache(SQLiteResponseStore(path)).set("k", cargos, "paylaşılan")
+    other = ResponseCache(SQLiteResponseStore(path))
+
+    assert other.get("k", cargos) == "paylaşılan"
+    assert other.hits == 1
@@ -1,8 +1,10 @@
+import io
 import json
 import os
 import sqlite3
 import sys
 import tempfile
+from datetime import datetime
 from unittest.mock import MagicMock
 
 import pytest
@@ -13,8 +15,14 @@ sys.modules["faker"] = MagicMock()
 # Test modüllerini import et
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from db_migrations import QUERY_INDEXES  # noqa: E402
 from setup_database import create_database  # noqa: E402
-from setup_database import generate_sample_data, migrate_json_to_sqlite
+from setup_database import (
+    generate_load_test_data,
+    generate_sample_data,
+    iter_json_object,
+    migrate_json_to_sqlite,
+)
 
 
 class TestSetupDatabase:
@@ -182,6 +190,132 @@ class TestSetupDatabase:
         result = migrate_json_to_sqlite("nonexistent_file.json")
         assert result is False
 
+    def test_iter_json_object_across_chunk_boundaries(self):
+        """Akış ayrıştırıcısı küçük okuma parçalarında da aynı sonucu vermeli"""
+        data = {
+            "user1": {"name": 'Ali \\"Veli\\"', "cargos": {"TR1": {"n": 12345}}},
+            "user2": {"name": "Ayşe", "cargos": {}},
+            "user3": {"n": [1.5, -20, None, True]},
+        }
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+
+        for chunk_size in (1, 3, 7, 1 << 20):
+            items = list(iter_json_object(io.StringIO(text), chunk_size=chunk_size))
+            assert dict(items) == data
+            assert [key for key, _ in items] == list(data)
+
+        assert list(iter_json_object(io.StringIO(" { } "))) == []
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_object(io.StringIO('{"user1": {"name": "x"}'), 4))
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_object(io.StringIO("[1, 2]")))
+
+    def test_iter_json_object_numbers_split_by_chunks(self):
+        """Parça sınırı sayının ortasına düşse de sonuç json.load ile aynı olmalı"""
+        text = (
+            '{"a": 12.5, "b": 12.5e3, "c": -7E-2, "d": 0, "e": 1e+10,'
+            ' "f": {"g": [3.25e-1, 4]}, "h": -0.0, "i": 123456789}'
+        )
+        expected = json.load(io.StringIO(text))
+
+        for chunk_size in range(1, 9):
+            items = list(iter_json_object(io.StringIO(text), chunk_size=chunk_size))
+            assert dict(items) == expected
+            assert [key for key, _ in items] == list(expected)
+
+    def test_migrate_json_to_sqlite_streaming(self, sample_json_data, tmp_path):
+        """Akış modu aynı satırları yazmalı, indeksleri ve günlüğü geri getirmeli"""
+        db_path = str(tmp_path / "stream.db")
+        sqlite3.connect(db_path).execute("PRAGMA journal_mode = WAL").close()
+
+        result = migrate_json_to_sqlite(
+            sample_json_data, db_path=db_path, streaming=True, batch_size=2
+        )
+        assert result is True
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT id, name FROM users").fetchall() == [
+            ("user123", "Ahmet Yılmaz")
+        ]
+        assert conn.execute("SELECT COUNT(*) FROM cargos").fetchone()[0] == 1
+        history = conn.execute(
+            "SELECT status FROM tracking_history ORDER BY date"
+        ).fetchall()
+        assert history == [("Sipariş alındı",), ("Teslim edildi",)]
+
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        assert set(QUERY_INDEXES) <= indexes
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_migrate_json_to_sqlite_streaming_invalid_json(self, tmp_path):
+        """Akış modunda bozuk JSON False döndürmeli"""
+        json_file = tmp_path / "broken.json"
+        json_file.write_text('{"user1": {"name": "x", "cargos": {}}, "user2": ')
+
+        result = migrate_json_to_sqlite(
+            str(json_file), db_path=str(tmp_path / "broken.db"), streaming=True
+        )
+        assert result is False
+
+    def test_generate_load_test_data_is_reproducible(self, tmp_path):
+        """Aynı seed, işçi sayısından bağımsız olarak aynı JSONL'i üretmeli"""
+        reference = datetime(2024, 6, 1, 12, 0)
+        outputs = []
+        for workers, shard_size in ((1, 1000), (2, 7)):
+            path = tmp_path / f"load_{workers}.jsonl"
+            counts = generate_load_test_data(
+                50,
+                4,
+                output=str(path),
+                workers=workers,
+                seed=7,
+                reference_date=reference,
+                shard_size=shard_size,
+            )
+            outputs.append(path.read_text(encoding="utf-8"))
+
+        assert outputs[0] == outputs[1]
+        users = [json.loads(line) for line in outputs[0].splitlines()]
+        tracking_numbers = [tn for user in users for tn in user["cargos"]]
+        assert counts["users"] == len(users) == len({user["id"] for user in users})
+        assert counts["cargos"] == len(set(tracking_numbers)) == len(tracking_numbers)
+        assert all(len(tn) == 11 and tn.startswith("TR") for tn in tracking_numbers)
+
+        other = tmp_path / "other_seed.jsonl"
+        generate_load_test_data(50, 4, output=str(other), workers=1, seed=8)
+        assert other.read_text(encoding="utf-8") != outputs[0]
+
+    def test_generate_load_test_data_writes_sqlite(self, tmp_path):
+        """SQLite çıktısı doğrudan yazılmalı ve JSONL aktarımıyla aynı olmalı"""
+        reference = datetime(2024, 6, 1, 12, 0)
+        db_path = str(tmp_path / "load.db")
+        jsonl_path = str(tmp_path / "load.jsonl")
+        counts = generate_load_test_data(
+            30, 3, output=db_path, workers=1, seed=3, reference_date=reference
+        )
+        generate_load_test_data(
+            30, 3, output=jsonl_path, workers=1, seed=3, reference_date=reference
+        )
+        assert migrate_json_to_sqlite(jsonl_path, db_path=str(tmp_path / "j.db"))
+
+        def dump(path):
+            conn = sqlite3.connect(path)
+            rows = [
+                conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+                for table in ("users", "cargos", "tracking_history")
+            ]
+            conn.close()
+            return rows
+
+        users, cargos, history = dump(db_path)
+        assert (len(users), len(cargos), len(history)) == (
+            counts["users"],
+            counts["cargos"],
+            counts["tracking_history"],
+        )
+        assert dump(db_path) == dump(str(tmp_path / "j.db"))
+
     @pytest.mark.skip(reason="Faker mock is complex due to import inside function")
     def test_generate_sample_data(self, tmp_path):
         """Örnek veri üretimini test et - SKIPPED due to Faker import issues"""
@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+
+# Test modüllerini import et
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from warmup import (  # noqa: E402
+    FAILED,
+    LOADING,
+    PENDING,
+    READY,
+    UNAVAILABLE,
+    Warmup,
+)
+
+
+class TestWarmup:
+    """Arka plan ısınması ve hazır olma durumu testleri"""
+
+    def test_components_load_in_background(self):
+        gate = threading.Event()
+
+        def slow_model():
+            gate.wait(5)
+            return "pipe"
+
+        warmup = Warmup({"policy_index": lambda: "index", "model": slow_model})
+        assert not warmup.started
+        assert warmup.status("model") == PENDING
+
+        warmup.start()
+        assert warmup.start() is warmup  # ikinci çağrı yeni iş parçacığı açmaz
+        assert warmup.wait("policy_index", 5) == "index"
+        # Model yüklenirken get beklemez, None döner
+        assert warmup.status("model") == LOADING
+        assert warmup.get("model") is None
+
+        gate.set()
+        assert warmup.wait("model", 5) == "pipe"
+        assert warmup.is_ready("model")
+
+    def test_unavailable_and_failed_components(self):
+        def broken():
+            raise RuntimeError("indeks bozuk")
+
+        warmup = Warmup({"model": lambda: None, "policy_index": broken}).start()
+        warmup.wait("model", 5)
+        warmup.wait("policy_index", 5)
+
+        snapshot = warmup.snapshot()
+        assert snapshot["model"]["state"] == UNAVAILABLE
+        assert snapshot["policy_index"]["state"] == FAILED
+        assert snapshot["policy_index"]["error"] == "indeks bozuk"
+        assert snapshot["model"]["seconds"] >= 0
+        assert not warmup.is_ready("model")
+        assert READY not in {info["state"] for info in snapshot.values()}
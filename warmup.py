@@ -0,0 +1,109 @@
+"""Ağır bileşenlerin arka planda ısınması ve hazır olma durumu.
+
+Model ve politika indeksi süreç başında bir arka plan iş parçacığında
+sırayla yüklenir; arayüz beklemeden çizilir. Her bileşenin durumu
+``status`` / ``snapshot`` ile okunur. Hazır olmayan bileşen için ``get``
+None döndürür; çağıran taraf şablon cevaplarla devam eder.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+# Yükleyici None döndürdü (ör. token ya da indeks dosyası yok)
+UNAVAILABLE = "unavailable"
+FAILED = "failed"
+
+FINAL_STATES = (READY, UNAVAILABLE, FAILED)
+
+
+class Warmup:
+    """Bileşenleri verilen sırayla tek arka plan iş parçacığında yükler"""
+
+    def __init__(self, loaders: Mapping[str, Callable[[], Any]]) -> None:
+        self._loaders = dict(loaders)
+        self._values: Dict[str, Any] = {}
+        self._states: Dict[str, str] = {name: PENDING for name in self._loaders}
+        self._errors: Dict[str, str] = {}
+        self._seconds: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> "Warmup":
+        """Isınmayı başlatır; tekrar çağrılırsa bir şey yapmaz"""
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="warmup", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def _set_state(self, name: str, state: str) -> None:
+        with self._condition:
+            self._states[name] = state
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        for name, loader in self._loaders.items():
+            self._set_state(name, LOADING)
+            started = time.perf_counter()
+            try:
+                value = loader()
+            except Exception as exc:
+                logger.error("%s yüklenemedi: %s", name, exc)
+                with self._condition:
+                    self._errors[name] = str(exc)
+                state = FAILED
+            else:
+                with self._condition:
+                    self._values[name] = value
+                state = UNAVAILABLE if value is None else READY
+            with self._condition:
+                self._seconds[name] = time.perf_counter() - started
+            logger.info("Isınma: %s %s (%.1fs)", name, state, self._seconds[name])
+            self._set_state(name, state)
+
+    def status(self, name: str) -> str:
+        with self._condition:
+            return self._states[name]
+
+    def is_ready(self, name: str) -> bool:
+        return self.status(name) == READY
+
+    def get(self, name: str) -> Any:
+        """Bileşen hazırsa değerini, değilse None döndürür (beklemez)"""
+        with self._condition:
+            return self._values.get(name)
+
+    def wait(self, name: str, timeout: float | None = None) -> Any:
+        """Bileşen son durumuna ulaşana kadar en fazla *timeout* saniye bekler"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._states[name] in FINAL_STATES, timeout
+            )
+            return self._values.get(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Her bileşenin durumu, hata mesajı ve yükleme süresi"""
+        with self._condition:
+            return {
+                name: {
+                    "state": state,
+                    "error": self._errors.get(name),
+                    "seconds": self._seconds.get(name),
+                }
+                for name, state in self._states.items()
+            }